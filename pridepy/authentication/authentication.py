@@ -2,7 +2,9 @@
 # -*- coding: utf-8 -*-
 import logging
 import sys
-import requests
+
+from pridepy.authentication.token_cache import TokenCache
+from pridepy.util.api_handling import Util
 
 
 class Authentication:
@@ -11,6 +13,7 @@ class Authentication:
     """
 
     base_url = "https://www.ebi.ac.uk/pride/private/ws/archive/v2"
+    token_cache = TokenCache()  # Shared by all the private operations of the process
 
     def __init__(self):
         pass
@@ -30,7 +33,7 @@ class Authentication:
             '{"Credentials":{"username":"' + username + '", "password":"' + password + '"}}'
         )
 
-        response = requests.post(url, data=credentials, headers=headers)
+        response = Util.http_request("POST", url, data=credentials, headers=headers)
 
         if (not response.ok) or response.status_code != 200:
             logging.error("Failed to get the token for user {}".format(username))
@@ -40,6 +43,24 @@ class Authentication:
             token = response.text
         return token
 
+    def get_cached_token(self, username, password):
+        """
+        Get a PRIDE API token from the token cache, logging in only if the cached token of the user
+        is missing, about to expire or was requested with another password.
+        :param username: username (email)
+        :param password: password
+        :return: If authenticated, a token is returned
+        """
+        return self.token_cache.get(username, password, lambda: self.get_token(username, password))
+
+    def invalidate_token(self, username, token=None):
+        """
+        Remove the cached token of a user, so that the next call logs in again
+        :param username: username (email)
+        :param token: rejected token, the cached token is only removed if it is this one
+        """
+        self.token_cache.invalidate(username, token)
+
     def validate_token(self, token):
         """
         Check if the token is valid and not expired
@@ -49,6 +70,6 @@ class Authentication:
         url = self.base_url + "/token-validation"
         headers = {"Authorization": "Bearer " + token}
 
-        response = requests.post(url, headers=headers)
+        response = Util.http_request("POST", url, headers=headers)
 
         return response.ok and response.status_code == 200 and response.text == "Token Valid"
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from pridepy.util.api_handling import Util
+
+
+class TokenCache:
+    """
+    Cache of PRIDE API tokens per user, so that private operations log in once instead of once per
+    call. The expiry of a token is read locally from its JWT payload, and a new token is only
+    requested when the cached one is about to expire. Tokens can also be kept on disk, in a file
+    readable only by its owner, to be reused by the next commands of a script. A token is only
+    served to the password it was requested with, checked against a salted hash of the password.
+    """
+
+    DEFAULT_LIFETIME = 3600  # Seconds a token without expiry claim is used
+    EXPIRY_MARGIN = 60  # Seconds before expiry a token is requested again
+    HASH_ITERATIONS = 100000  # PBKDF2 iterations of the password hash kept with a token
+
+    def __init__(self, path: str = None, persist: bool = None):
+        """
+        :param path: file of the tokens kept on disk, tokens.json in the pridepy cache directory
+            if None
+        :param persist: keep the tokens on disk, PRIDEPY_TOKEN_CACHE=1 if None
+        """
+        self.path = path
+        self.persist = persist
+        self._tokens: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _path(self) -> str:
+        return self.path or os.path.join(Util.get_cache_dir(), "tokens.json")
+
+    def _persist(self) -> bool:
+        if self.persist is not None:
+            return self.persist
+        return os.environ.get("PRIDEPY_TOKEN_CACHE", "").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def get_expiry(token: str) -> Optional[float]:
+        """
+        Read the expiry of a JWT without checking its signature.
+        :param token: PRIDE API token
+        :return: expiry as a Unix timestamp, or None if the token is not a JWT with an exp claim
+        """
+        parts = token.split(".")
+        if len(parts) != 3:
+            return None
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        try:
+            exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+            return float(exp) if exp is not None else None
+        except (ValueError, TypeError, AttributeError):
+            return None
+
+    @classmethod
+    def hash_password(cls, password: str, salt: str) -> str:
+        """
+        :param password: password of the user
+        :param salt: random salt of the cached token, in hex
+        :return: PBKDF2 hash of the password, in hex
+        """
+        return hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), bytes.fromhex(salt), cls.HASH_ITERATIONS
+        ).hex()
+
+    def _is_valid(self, entry: Optional[Dict], password: str = None) -> bool:
+        """
+        :return: True if the token of entry is not about to expire and, when password is given,
+            was requested with this password
+        """
+        if not isinstance(entry, dict) or not {"token", "expires_at", "salt", "hash"} <= set(
+            entry
+        ):
+            return False
+        if entry["expires_at"] - self.EXPIRY_MARGIN <= time.time():
+            return False
+        return password is None or hmac.compare_digest(
+            entry["hash"], self.hash_password(password, entry["salt"])
+        )
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self._path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, tokens: Dict[str, Dict]):
+        path = self._path()
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(tokens, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+
+    def get(self, username: str, password: str, login: Callable[[], str]) -> str:
+        """
+        Get the token of a user, logging in only if there is no valid cached token requested with
+        the same password.
+        :param username: username (email)
+        :param password: password of the user
+        :param login: function requesting a new token
+        :return: PRIDE API token
+        """
+        with self._lock:
+            entry = self._tokens.get(username)
+            if not self._is_valid(entry, password) and self._persist():
+                entry = self._load().get(username)
+                if self._is_valid(entry, password):
+                    self._tokens[username] = entry
+            if self._is_valid(entry, password):
+                return entry["token"]
+
+            logging.info("Requesting a new token for user {}".format(username))
+            token = login()
+            expires_at = self.get_expiry(token) or time.time() + self.DEFAULT_LIFETIME
+            salt = os.urandom(16).hex()
+            entry = {
+                "token": token,
+                "expires_at": expires_at,
+                "salt": salt,
+                "hash": self.hash_password(password, salt),
+            }
+            self._tokens[username] = entry
+            if self._persist():
+                tokens = {user: e for user, e in self._load().items() if self._is_valid(e)}
+                tokens[username] = entry
+                self._save(tokens)
+            return token
+
+    def invalidate(self, username: str, token: str = None):
+        """
+        Forget the token of a user, for instance after it was rejected by the API.
+        :param username: username (email)
+        :param token: rejected token; a newer token of the user, e.g. requested by another thread
+        after the same rejection, is kept
+        """
+        with self._lock:
+            entry = self._tokens.get(username)
+            if entry is not None and token is not None and entry["token"] != token:
+                return
+            self._tokens.pop(username, None)
+            if self._persist():
+                tokens = self._load()
+                if tokens.pop(username, None) is not None:
+                    self._save(tokens)
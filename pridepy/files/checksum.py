@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+
+class StreamingChecksum:
+    """
+    Hash of a file computed from the bytes received by a download, so the file is not read again
+    from disk to be verified. The algorithm is inferred from the length of the expected hex digest.
+    """
+
+    ALGORITHMS = {32: "md5", 40: "sha1", 64: "sha256"}
+    READ_SIZE = 1024 * 1024
+
+    def __init__(self, expected: str):
+        self.expected = expected.lower()
+        self.algorithm = self.ALGORITHMS[len(self.expected)]
+        self._hash = hashlib.new(self.algorithm)
+
+    def update(self, data: bytes):
+        self._hash.update(data)
+
+    def update_from_file(self, file_path: str, size: int = None):
+        """
+        Start the hash again from the first size bytes of a file on disk, e.g. the part of a resumed
+        download received by an earlier run, or a file written out of order by a segmented download.
+        :param file_path: path of the file
+        :param size: number of bytes to hash, the whole file if None
+        """
+        self._hash = hashlib.new(self.algorithm)
+        if size is None:
+            size = os.path.getsize(file_path)
+        if size <= 0:
+            return
+        with open(file_path, "rb") as f:
+            while size > 0:
+                data = f.read(min(self.READ_SIZE, size))
+                if not data:
+                    break
+                self._hash.update(data)
+                size -= len(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def matches(self) -> bool:
+        return self.hexdigest() == self.expected
+
+
+class ChecksumWriter:
+    """
+    Non-seekable file object that hashes the bytes written to a file. s3transfer writes the parts of
+    a multipart download in order to a non-seekable target, so the parts can be hashed as they arrive.
+    """
+
+    def __init__(self, fileobj, checksum: StreamingChecksum):
+        self._fileobj = fileobj
+        self._checksum = checksum
+
+    def write(self, data: bytes) -> int:
+        self._checksum.update(data)
+        return self._fileobj.write(data)
+
+    def seekable(self) -> bool:
+        return False
+
+
+class ChecksumVerifier:
+    """
+    Expected checksums of the files of a project (from <accession>-checksum.tsv) and the result of
+    the verification of every downloaded file. A file that does not match is removed, so it can be
+    downloaded again from the first byte.
+    """
+
+    VERIFIED = "verified"
+    MISMATCH = "mismatch"
+
+    def __init__(self, checksums: Dict[str, str]):
+        """
+        :param checksums: expected hex digest per file name
+        """
+        self.checksums = checksums
+        self.results: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_checksum_file(cls, checksum_file: str) -> "ChecksumVerifier":
+        """
+        Read a PRIDE checksum file, with one file name and its checksum per tab separated line.
+        Lines without a valid hex digest, e.g. a header, are ignored.
+        :param checksum_file: path of the checksum file
+        :return: ChecksumVerifier
+        """
+        checksums = {}
+        with open(checksum_file) as f:
+            for line in f:
+                fields = line.strip().split("\t")
+                if len(fields) < 2:
+                    continue
+                file_name, checksum = os.path.basename(fields[0].strip()), fields[-1].strip()
+                if len(checksum) in StreamingChecksum.ALGORITHMS and re.fullmatch(
+                    "[0-9a-fA-F]+", checksum
+                ):
+                    checksums[file_name] = checksum
+        logging.info(f"Read {len(checksums)} checksums from {checksum_file}")
+        return cls(checksums)
+
+    def new_checksum(self, file_name: str) -> Optional[StreamingChecksum]:
+        """
+        :return: a StreamingChecksum for the file, or None if its checksum is not known
+        """
+        expected = self.checksums.get(file_name)
+        return StreamingChecksum(expected) if expected else None
+
+    def check(self, file_name: str, file_path: str, checksum: StreamingChecksum = None) -> bool:
+        """
+        Compare the hash of a downloaded file with its expected checksum and record the result.
+        :param file_name: file name in the checksum file
+        :param file_path: path of the downloaded file, removed if it does not match
+        :param checksum: hash computed during the download, the file is read from disk if None
+        :return: False if the file does not match its checksum
+        """
+        if checksum is None:
+            checksum = self.new_checksum(file_name)
+            if checksum is None:
+                return True
+            checksum.update_from_file(file_path)
+
+        if checksum.matches():
+            logging.info(f"Checksum verified for {file_path}")
+            with self._lock:
+                self.results[file_name] = self.VERIFIED
+            return True
+
+        logging.error(
+            f"Checksum mismatch for {file_path}: expected {checksum.expected}, "
+            f"got {checksum.hexdigest()} ({checksum.algorithm})"
+        )
+        with self._lock:
+            self.results[file_name] = self.MISMATCH
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        return False
+
+    def pop_mismatches(self) -> List[str]:
+        """
+        :return: names of the files that did not match since the last call
+        """
+        with self._lock:
+            mismatches = [name for name, state in self.results.items() if state == self.MISMATCH]
+            for name in mismatches:
+                del self.results[name]
+        return mismatches
@@ -1,28 +1,43 @@
 #!/usr/bin/env python
+import fnmatch
 import ftplib
 import importlib.resources
 import logging
 import os
 import platform
+import queue
 import re
 import subprocess
-import urllib
-import urllib.request
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from ftplib import FTP
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import socket
 from urllib.parse import urlparse
 import xml.etree.ElementTree as ET
 
 import boto3
 import botocore
-import requests
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
 from botocore.config import Config
+from s3transfer.subscribers import BaseSubscriber
 from tqdm import tqdm
 
 from pridepy.authentication.authentication import Authentication
+from pridepy.files.checksum import ChecksumVerifier, ChecksumWriter, StreamingChecksum
+from pridepy.files.http_engine import HttpDownloadEngine, HttpTransfer
+from pridepy.files.protocol_selector import ProtocolSelector
+from pridepy.files.scheduler import ConnectionLimiter
+from pridepy.files.segments import IncompleteDownloadError, SegmentState
+from pridepy.files.writer import BufferedFileWriter
+from pridepy.files.journal import TransferJournal
+from pridepy.project.project import Project
 from pridepy.util.api_handling import Util
+from pridepy.util.metadata_cache import MetadataCache
 
 
 class Progress:
@@ -47,6 +62,24 @@ class Progress:
         self.pbar.close()
 
 
+class S3TransferSubscriber(BaseSubscriber):
+    """
+    s3transfer subscriber that reports progress and provides the file size already known from the
+    PRIDE API, so s3transfer does not send a HEAD request for every file.
+    """
+
+    def __init__(self, size, callback):
+        self.size = size
+        self.callback = callback
+
+    def on_queued(self, future, **kwargs):
+        if self.size is not None:
+            future.meta.provide_transfer_size(self.size)
+
+    def on_progress(self, future, bytes_transferred, **kwargs):
+        self.callback(bytes_transferred)
+
+
 class Files:
     """
     This class handles PRIDE API files endpoint.
@@ -58,14 +91,45 @@ class Files:
     PRIDE_ARCHIVE_FTP = "ftp.pride.ebi.ac.uk"
     S3_URL = "https://hh.fire.sdo.ebi.ac.uk"
     S3_BUCKET = "pride-public"
+    GLOBUS_URL = "https://g-a8b222.dd271.03c0.data.globus.org/"
+    PROBE_BYTES = 8 * 1024 * 1024  # Bytes downloaded by the probe of a protocol
+    PROBE_SECONDS = 10  # Maximum duration of the probe of a protocol
+    AUTO_CHUNK_BYTES = 2 * 1024 * 1024 * 1024  # Bytes downloaded between two throughput checks
+    METADATA_WORKERS = 8  # File lists of projects fetched at the same time
+    FTP_REST_UNSUPPORTED = {"500", "501", "502", "504"}  # Replies to a REST the server can not do
+    # Errors of an FTP transfer that are worth another attempt on a new connection; a segmented
+    # download that gave up is resumed from its saved state
+    FTP_TRANSFER_ERRORS = (
+        IncompleteDownloadError,
+        socket.timeout,
+        socket.error,
+        EOFError,
+        ftplib.error_temp,
+        ftplib.error_perm,
+        ftplib.error_reply,
+    )
+    SEGMENTED_PROTOCOLS = {"ftp", "globus"}  # Protocols opening one connection per segment
+    # Server of every protocol, whose connections are shared by the projects of a batch
+    PROTOCOL_HOSTS = {
+        "ftp": PRIDE_ARCHIVE_FTP,
+        "aspera": "fasp.ebi.ac.uk",
+        "globus": urlparse(GLOBUS_URL).hostname,
+        "s3": urlparse(S3_URL).hostname,
+    }
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-    def __init__(self):
-        pass
+    def __init__(self, refresh: bool = False):
+        """
+        :param refresh: download the project file listings again instead of using the metadata cache
+        """
+        self.metadata_cache = MetadataCache(refresh=refresh)
 
-    async def stream_all_files_metadata(self, output_file, accession=None):
+    async def stream_all_files_metadata(self, output_file, accession=None, output_format="json"):
         """
         get stream all project files from PRIDE API in JSON format
+        :param output_file: output file
+        :param accession: project accession, all the files of PRIDE if None
+        :param output_format: json, ndjson to write one file record per line, or parquet
         """
         if accession is None:
             request_url = f"{self.V3_API_BASE_URL}/files/all"
@@ -77,19 +141,23 @@ class Files:
         response = Util.get_api_call(count_request_url, headers)
         total_records = response.json()
 
-        regex_search_pattern = '"fileName"'
         await Util.stream_response_to_file(
-            output_file, total_records, regex_search_pattern, request_url, headers
+            output_file, total_records, '"fileName"', request_url, headers, output_format
         )
 
-    def stream_all_files_by_project(self, accession) -> List[Dict]:
+    def iter_all_files_by_project(self, accession) -> Iterator[Dict]:
         """
-        get stream all project files from PRIDE API in JSON format
+        Iterate over all project files from PRIDE API in JSON format, as they are received
         """
         request_url = f"{self.V3_API_BASE_URL}/projects/{accession}/files/all"
         headers = {"Accept": "application/JSON"}
-        record_files = Util.read_json_stream(api_url=request_url, headers=headers)
-        return record_files
+        return self.metadata_cache.iter_json(request_url, headers, accession)
+
+    def stream_all_files_by_project(self, accession) -> List[Dict]:
+        """
+        get stream all project files from PRIDE API in JSON format
+        """
+        return list(self.iter_all_files_by_project(accession))
 
     def get_all_raw_file_list(self, project_accession):
         """
@@ -98,9 +166,9 @@ class Files:
         :return: raw file list in JSON format
         """
 
-        record_files = self.stream_all_files_by_project(project_accession)
+        record_files = self.iter_all_files_by_project(project_accession)
 
-        # Filter projects by fileCategory = RAW
+        # Filter projects by fileCategory = RAW while the records are received
         raw_files = [file for file in record_files if file["fileCategory"]["value"] == "RAW"]
         return raw_files
 
@@ -112,6 +180,11 @@ class Files:
         protocol,
         aspera_maximum_bandwidth: str,
         checksum_check: bool = False,
+        workers: int = 1,
+        segments: int = 1,
+        s3_max_concurrency: int = 10,
+        s3_chunk_size: int = 8,
+        journal: bool = False,
     ):
         """
         This method will download all the raw files from PRIDE PROJECT
@@ -121,13 +194,27 @@ class Files:
         :param protocol: ftp, aspera, globus
         :param aspera_maximum_bandwidth: Aspera maximum bandwidth
         :param checksum_check: Download checksum for a given project.
+        :param workers: Number of files downloaded in parallel.
+        :param segments: Number of byte ranges of a large file downloaded in parallel.
+        :param s3_max_concurrency: Number of parts of a file downloaded at the same time from S3.
+        :param s3_chunk_size: Size of every part of a multipart S3 download in MB.
+        :param journal: Keep a transfer journal in the output folder to resume interrupted batches.
         :return: None
         """
 
         if not (os.path.isdir(output_folder)):
             os.mkdir(output_folder)
 
-        raw_files = self.get_all_raw_file_list(accession)
+        if journal:
+            raw_files = self._get_planned_file_list(
+                accession,
+                output_folder,
+                ["RAW"],
+                lambda: self.get_all_raw_file_list(accession),
+                refresh=self.metadata_cache.refresh,
+            )
+        else:
+            raw_files = self.get_all_raw_file_list(accession)
 
         self.download_files(
             raw_files,
@@ -137,6 +224,11 @@ class Files:
             protocol,
             aspera_maximum_bandwidth=aspera_maximum_bandwidth,
             checksum_check=checksum_check,
+            workers=workers,
+            segments=segments,
+            s3_max_concurrency=s3_max_concurrency,
+            s3_chunk_size=s3_chunk_size,
+            journal=journal,
         )
 
     @staticmethod
@@ -146,102 +238,56 @@ class Files:
         skip_if_downloaded_already,
         max_connection_retries=3,
         max_download_retries=3,
+        workers: int = 1,
+        segments: int = 1,
+        verifier: ChecksumVerifier = None,
     ):
         """
         Download files using a single FTP connection with a retry mechanism and a progress bar for each file.
+        When workers is greater than one, a pool of FTP connections is used instead, each pulling the next
+        file from a shared queue, and progress is reported for the whole batch.
         :param file_list_json: file list in JSON format
         :param output_folder: folder to download the files
         :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
         :param max_connection_retries: Number of attempts to reconnect to the FTP server if the connection is lost.
         :param max_download_retries: Number of attempts to retry the download of a file in case of failure.
+        :param workers: Number of parallel FTP connections used to download the files.
+        :param segments: Number of FTP connections (byte ranges) used for each large file.
+        :param verifier: checksums the files are verified against while they are downloaded.
         """
 
         if not os.path.isdir(output_folder):
             os.makedirs(output_folder)
 
-        def connect_ftp():
-            """Helper function to establish FTP connection."""
-            ftp = FTP(Files.PRIDE_ARCHIVE_FTP, timeout=30)
-            ftp.login()  # Anonymous login
-            ftp.set_pasv(True)  # Enable passive mode
-            logging.info(f"Connected to FTP host: {Files.PRIDE_ARCHIVE_FTP}")
-            return ftp
+        if workers > 1 and len(file_list_json) > 1:
+            Files._download_files_from_ftp_pool(
+                file_list_json,
+                output_folder,
+                skip_if_downloaded_already,
+                workers,
+                max_connection_retries,
+                max_download_retries,
+                segments=segments,
+                verifier=verifier,
+            )
+            return
 
         connection_attempt = 0
         while connection_attempt < max_connection_retries:
             try:
-                ftp = connect_ftp()
+                ftp = Files._connect_ftp()
                 for file in file_list_json:
-                    try:
-                        # Get FTP download URL
-                        if file["publicFileLocations"][0]["name"] == "FTP Protocol":
-                            download_url = file["publicFileLocations"][0]["value"]
-                        else:
-                            download_url = file["publicFileLocations"][1]["value"]
-
-                        logging.debug("ftp_filepath:" + download_url)
-
-                        # Get output file path
-                        new_file_path = Files.get_output_file_name(
-                            download_url, file, output_folder
-                        )
-
-                        if skip_if_downloaded_already and os.path.exists(new_file_path):
-                            logging.info("Skipping download as file already exists")
-                            continue
-
-                        # Extract file path from the download URL
-                        ftp_file_path = download_url.replace(
-                            f"ftp://{Files.PRIDE_ARCHIVE_FTP}/", ""
-                        )
-
-                        logging.info(f"Starting FTP download: {ftp_file_path}")
-
-                        # Retry download in case of failure
-                        download_attempt = 0
-                        while download_attempt < max_download_retries:
-                            try:
-                                # Get file size for progress tracking
-                                total_size = ftp.size(ftp_file_path)
-                                logging.info(f"File size: {total_size} bytes")
-
-                                # Initialize progress bar
-                                with open(new_file_path, "wb") as f:
-                                    with tqdm(
-                                        total=total_size,
-                                        unit="B",
-                                        unit_scale=True,
-                                        desc=new_file_path,
-                                    ) as pbar:
-
-                                        def callback(data):
-                                            f.write(data)
-                                            pbar.update(len(data))
-
-                                        # Retrieve the file with progress callback
-                                        ftp.retrbinary(f"RETR {ftp_file_path}", callback)
-
-                                logging.info(f"Successfully downloaded {new_file_path}")
-                                break  # Exit download retry loop if successful
-                            except (
-                                socket.timeout,
-                                ftplib.error_temp,
-                                ftplib.error_perm,
-                            ) as e:
-                                download_attempt += 1
-                                logging.error(
-                                    f"Download failed for {new_file_path} (attempt {download_attempt}): {str(e)}"
-                                )
-                                if download_attempt >= max_download_retries:
-                                    logging.error(
-                                        f"Giving up on {new_file_path} after {max_download_retries} attempts."
-                                    )
-                                    break  # Give up on this file after max retries
-                    except (KeyError, IndexError) as e:
-                        logging.error(f"Failed to process file due to missing data: {str(e)}")
-                    except Exception as e:
-                        logging.error(f"Unexpected error while processing file: {str(e)}")
-                ftp.quit()  # Close FTP connection after all files are downloaded
+                    ftp = Files._download_file_from_ftp(
+                        ftp,
+                        file,
+                        output_folder,
+                        skip_if_downloaded_already,
+                        max_download_retries,
+                        segments=segments,
+                        verifier=verifier,
+                    )
+                if ftp is not None:
+                    ftp.quit()  # Close FTP connection after all files are downloaded
                 logging.info(f"Disconnected from FTP host: {Files.PRIDE_ARCHIVE_FTP}")
                 break  # Exit connection retry loop if everything was successful
             except (
@@ -261,6 +307,453 @@ class Files:
                     )
                     break
 
+    @staticmethod
+    def _download_files_from_ftp_pool(
+        file_list_json: List[Dict],
+        output_folder: str,
+        skip_if_downloaded_already: bool,
+        workers: int,
+        max_connection_retries: int = 3,
+        max_download_retries: int = 3,
+        segments: int = 1,
+        verifier: ChecksumVerifier = None,
+    ):
+        """
+        Download files using a pool of FTP connections. Every worker owns one connection and pulls
+        the next file from a shared queue until the queue is empty.
+        :param file_list_json: file list in JSON format
+        :param output_folder: folder to download the files
+        :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param workers: Number of FTP connections in the pool.
+        :param max_connection_retries: Number of attempts to connect each worker to the FTP server.
+        :param max_download_retries: Number of attempts to retry the download of a file in case of failure.
+        :param segments: Number of FTP connections (byte ranges) used for each large file.
+        :param verifier: checksums the files are verified against while they are downloaded.
+        """
+        file_queue: "queue.Queue[Dict]" = queue.Queue()
+        for file in file_list_json:
+            file_queue.put(file)
+
+        workers = min(workers, len(file_list_json))
+        total_size = sum(file.get("fileSizeBytes", 0) or 0 for file in file_list_json)
+        logging.info(f"Downloading {len(file_list_json)} files using {workers} FTP connections")
+
+        def ftp_worker():
+            ftp = None
+            while True:
+                try:
+                    file = file_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                connection_attempt = 0
+                while ftp is None and connection_attempt < max_connection_retries:
+                    try:
+                        ftp = Files._connect_ftp()
+                    except (
+                        socket.timeout,
+                        ftplib.error_temp,
+                        ftplib.error_perm,
+                        socket.error,
+                    ) as e:
+                        connection_attempt += 1
+                        logging.error(
+                            f"FTP connection failed (attempt {connection_attempt}): {str(e)}"
+                        )
+                        if connection_attempt < max_connection_retries:
+                            time.sleep(5)
+                if ftp is None:
+                    # Leave the file to the remaining workers
+                    file_queue.put(file)
+                    logging.error(
+                        f"Giving up after {max_connection_retries} failed connection attempts."
+                    )
+                    return
+
+                ftp = Files._download_file_from_ftp(
+                    ftp,
+                    file,
+                    output_folder,
+                    skip_if_downloaded_already,
+                    max_download_retries,
+                    pbar=pbar,
+                    segments=segments,
+                    verifier=verifier,
+                )
+            if ftp is not None:
+                try:
+                    ftp.quit()
+                except (socket.error, ftplib.Error):
+                    ftp.close()
+                logging.debug(f"Disconnected from FTP host: {Files.PRIDE_ARCHIVE_FTP}")
+
+        with tqdm(
+            total=total_size,
+            unit="B",
+            unit_scale=True,
+            desc=f"Downloading {len(file_list_json)} files",
+        ) as pbar:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(ftp_worker) for _ in range(workers)]:
+                    future.result()
+
+        if not file_queue.empty():
+            logging.error(
+                f"{file_queue.qsize()} files were not downloaded, no FTP connection left"
+            )
+
+    @staticmethod
+    def _connect_ftp(host: str = None):
+        """Helper function to establish FTP connection."""
+        host = host or Files.PRIDE_ARCHIVE_FTP
+        ftp = FTP(host, timeout=30)
+        ftp.login()  # Anonymous login
+        ftp.set_pasv(True)  # Enable passive mode
+        logging.info(f"Connected to FTP host: {host}")
+        return ftp
+
+    @staticmethod
+    def _get_ftp_download_url(file: Dict) -> str:
+        """Return the FTP location of a file record from the PRIDE API."""
+        if file["publicFileLocations"][0]["name"] == "FTP Protocol":
+            return file["publicFileLocations"][0]["value"]
+        return file["publicFileLocations"][1]["value"]
+
+    @staticmethod
+    def _get_globus_download_url(file: Dict) -> str:
+        """Return the Globus HTTPS location of a file record from the PRIDE API."""
+        return Files._get_ftp_download_url(file).replace(
+            f"ftp://{Files.PRIDE_ARCHIVE_FTP}/", Files.GLOBUS_URL
+        )
+
+    @staticmethod
+    def _get_s3_path(file: Dict) -> str:
+        """Return the key of a file record from the PRIDE API in the S3 bucket."""
+        return Files._get_ftp_download_url(file).replace(
+            f"ftp://{Files.PRIDE_ARCHIVE_FTP}/pride/data/archive/", ""
+        )
+
+    @staticmethod
+    def _get_aspera_download_url(file: Dict) -> str:
+        """Return the Aspera location of a file record from the PRIDE API."""
+        if file["publicFileLocations"][0]["name"] == "Aspera Protocol":
+            return file["publicFileLocations"][0]["value"]
+        return file["publicFileLocations"][1]["value"]
+
+    @staticmethod
+    def _download_ftp_segmented(
+        host: str,
+        ftp_path: str,
+        local_path: str,
+        total_size: int,
+        segments: int,
+        pbar: tqdm = None,
+    ) -> bool:
+        """
+        Download a file as several byte ranges over parallel FTP connections. Every connection
+        starts its transfer with REST at the offset of its range and stops after the size of the
+        range, writing in place into the preallocated output file.
+        :param host: FTP host
+        :param ftp_path: path of the file on the FTP server
+        :param local_path: output file path
+        :param total_size: size of the file in bytes
+        :param segments: Number of FTP connections (byte ranges) downloaded in parallel.
+        :param pbar: shared progress bar of a batch; a progress bar for the file is used if None.
+        :return: False if the file is too small to be split and nothing was downloaded.
+        """
+        if not SegmentState.exists(local_path) and total_size < 2 * SegmentState.MIN_SEGMENT_SIZE:
+            return False
+
+        state = SegmentState.load_or_create(local_path, total_size, segments)
+        Files._download_segments(
+            state,
+            lambda index, offset, end, segments_pbar: Files._download_ftp_range(
+                host, ftp_path, state, index, offset, end, segments_pbar
+            ),
+            pbar=pbar,
+        )
+        return True
+
+    @staticmethod
+    def _download_ftp_range(
+        host: str,
+        ftp_path: str,
+        state: SegmentState,
+        index: int,
+        offset: int,
+        end: int,
+        pbar: tqdm,
+        max_download_retries: int = 3,
+    ) -> None:
+        """
+        Download the byte range [offset, end] of an FTP file into the segment index of a segmented
+        download, using its own control connection.
+        """
+        block_size = 1024 * 1024
+        for attempt in range(1, max_download_retries + 1):
+            # Resume after the bytes on disk, the segment is only advanced by the writer thread
+            segment_start, _, done = state.ranges[index]
+            offset = segment_start + done
+            ftp = None
+            try:
+                ftp = Files._connect_ftp(host)
+                ftp.voidcmd("TYPE I")
+                conn = ftp.transfercmd(f"RETR {ftp_path}", rest=offset)
+                try:
+                    with BufferedFileWriter(
+                        state.file_path,
+                        "r+b",
+                        offset=offset,
+                        on_write=lambda written: state.advance(index, written),
+                    ) as f:
+                        while offset <= end:
+                            data = conn.recv(min(block_size, end - offset + 1))
+                            if not data:
+                                break
+                            f.write(data)
+                            offset += len(data)
+                            pbar.update(len(data))
+                finally:
+                    conn.close()
+                if offset > end:
+                    return
+                logging.warning(
+                    f"Segment {index} of {state.file_path} ended early (attempt {attempt})"
+                )
+            except (socket.timeout, socket.error, ftplib.Error, EOFError) as e:
+                logging.warning(
+                    f"Segment {index} of {state.file_path} failed (attempt {attempt}): {str(e)}"
+                )
+            finally:
+                if ftp is not None:
+                    # The transfer is stopped before the end of the file, so the server reply
+                    # is not awaited and the control connection is simply closed.
+                    ftp.close()
+            time.sleep(2**attempt)
+        raise IncompleteDownloadError(
+            f"Giving up on segment {index} of {state.file_path} after {max_download_retries} attempts"
+        )
+
+    @staticmethod
+    def _download_file_from_ftp(
+        ftp: FTP,
+        file: Dict,
+        output_folder: str,
+        skip_if_downloaded_already: bool,
+        max_download_retries: int = 3,
+        pbar: tqdm = None,
+        segments: int = 1,
+        verifier: ChecksumVerifier = None,
+    ):
+        """
+        Download a single file over an open FTP connection, retrying on transient errors. A partial
+        local file, e.g. from an interrupted run, is resumed from its last byte with REST.
+        Large files are split in byte ranges downloaded over parallel connections if segments > 1.
+        :param ftp: connected FTP client
+        :param file: file record in JSON format
+        :param output_folder: folder to download the file
+        :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param max_download_retries: Number of attempts to retry the download of the file in case of failure.
+        :param pbar: shared progress bar of the batch; a progress bar per file is used if None.
+        :param segments: Number of FTP connections (byte ranges) used for a large file.
+        :param verifier: checksums the file is verified against; it is hashed as it is received.
+        :return: the FTP connection, reconnected if the original one failed (None if reconnecting failed)
+        """
+        try:
+            # Get FTP download URL
+            download_url = Files._get_ftp_download_url(file)
+            logging.debug("ftp_filepath:" + download_url)
+
+            # Get output file path
+            new_file_path = Files.get_output_file_name(download_url, file, output_folder)
+
+            if skip_if_downloaded_already and Files._is_downloaded(file, new_file_path):
+                logging.info("Skipping download as file already exists")
+                if pbar is not None:
+                    pbar.update(file.get("fileSizeBytes", 0) or 0)
+                return ftp  # The connection is kept for the next file
+
+            # Extract file path from the download URL
+            ftp_file_path = download_url.replace(f"ftp://{Files.PRIDE_ARCHIVE_FTP}/", "")
+
+            logging.info(f"Starting FTP download: {ftp_file_path}")
+            checksum = verifier.new_checksum(file["fileName"]) if verifier is not None else None
+
+            # Retry download in case of failure, every attempt resumes from the last byte on disk
+            download_attempt = 0
+            while download_attempt < max_download_retries:
+                try:
+                    if ftp is None:
+                        ftp = Files._connect_ftp()
+
+                    # Get file size for progress tracking and resume
+                    total_size = Files._get_ftp_file_size(
+                        ftp, ftp_file_path, file.get("fileSizeBytes")
+                    )
+                    logging.info(f"File size: {total_size} bytes")
+
+                    if (segments > 1 or SegmentState.exists(new_file_path)) and (
+                        Files._download_ftp_segmented(
+                            Files.PRIDE_ARCHIVE_FTP,
+                            ftp_file_path,
+                            new_file_path,
+                            total_size,
+                            segments,
+                            pbar=pbar,
+                        )
+                    ):
+                        logging.info(f"Successfully downloaded {new_file_path}")
+                        if checksum is not None:
+                            # Segments are written out of order, the file is hashed once complete
+                            checksum.update_from_file(new_file_path)
+                            verifier.check(file["fileName"], new_file_path, checksum)
+                        break
+
+                    Files._retrieve_ftp_file(
+                        ftp, ftp_file_path, new_file_path, total_size, pbar, checksum=checksum
+                    )
+
+                    logging.info(f"Successfully downloaded {new_file_path}")
+                    if checksum is not None:
+                        verifier.check(file["fileName"], new_file_path, checksum)
+                    break  # Exit download retry loop if successful
+                except Files.FTP_TRANSFER_ERRORS as e:
+                    download_attempt += 1
+                    logging.error(
+                        f"Download failed for {new_file_path} (attempt {download_attempt}): {str(e)}"
+                    )
+                    # The control connection is in an unknown state after a failed transfer
+                    if ftp is not None:
+                        ftp.close()
+                        ftp = None
+                    if download_attempt >= max_download_retries:
+                        logging.error(
+                            f"Giving up on {new_file_path} after {max_download_retries} attempts."
+                        )
+                        break  # Give up on this file after max retries
+        except (KeyError, IndexError) as e:
+            logging.error(f"Failed to process file due to missing data: {str(e)}")
+        except Exception as e:
+            logging.error(f"Unexpected error while processing file: {str(e)}")
+        return ftp
+
+    @staticmethod
+    def _get_ftp_file_size(ftp: FTP, ftp_path: str, default_size: int = None) -> Optional[int]:
+        """
+        Get the size of a file on the FTP server, or default_size (e.g. fileSizeBytes from the API)
+        if the server does not answer the SIZE command.
+        """
+        try:
+            ftp.voidcmd("TYPE I")  # SIZE is only reliable in binary mode
+            return ftp.size(ftp_path)
+        except ftplib.error_perm as e:
+            if default_size is None:
+                raise
+            logging.debug(f"SIZE failed for {ftp_path} ({str(e)}), using the API file size")
+            return default_size
+
+    @staticmethod
+    def _retrieve_ftp_file(
+        ftp: FTP,
+        ftp_path: str,
+        local_path: str,
+        total_size: int = None,
+        pbar: tqdm = None,
+        checksum: StreamingChecksum = None,
+    ) -> None:
+        """
+        Retrieve an FTP file into local_path. A partial local file is resumed from its last byte with
+        REST, a complete one is left untouched, and one larger than the remote file is downloaded
+        again.
+        :param ftp: connected FTP client
+        :param ftp_path: path of the file on the FTP server
+        :param local_path: output file path
+        :param total_size: size of the remote file, if known
+        :param pbar: shared progress bar of a batch; a progress bar for the file is used if None.
+        :param checksum: hash updated with the bytes of the file, including the part already on disk.
+        """
+        current_size = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+        if total_size is not None and current_size > total_size:
+            logging.info(f"{local_path} is larger than the remote file, downloading it again")
+            current_size = 0
+        if total_size is not None and 0 < current_size == total_size:
+            logging.info(f"{local_path} is already complete")
+            if checksum is not None:
+                checksum.update_from_file(local_path)
+            if pbar is not None:
+                pbar.update(current_size)
+            return
+
+        if current_size:
+            logging.info(f"Resuming {local_path} from byte {current_size}")
+        if checksum is not None:
+            # Only the part received by an earlier attempt is read from disk
+            checksum.update_from_file(local_path, current_size)
+
+        # Initialize progress bar, or report to the progress bar of the batch
+        if pbar is None:
+            progress = tqdm(
+                total=total_size,
+                unit="B",
+                unit_scale=True,
+                desc=local_path,
+                initial=current_size,
+            )
+        else:
+            pbar.update(current_size)
+            progress = nullcontext(pbar)
+
+        received = 0
+        try:
+            # The bytes are written and hashed by a writer thread, not in the receive loop
+            writer = BufferedFileWriter(
+                local_path, "ab" if current_size else "wb", checksum=checksum
+            )
+            with writer as f, progress as file_pbar:
+
+                def callback(data):
+                    nonlocal received
+                    f.write(data)
+                    received += len(data)
+                    file_pbar.update(len(data))
+
+                # REST is sent by retrbinary right before RETR, after TYPE and PASV, so that the
+                # restart marker is not cleared by the commands in between
+                ftp.retrbinary(f"RETR {ftp_path}", callback, rest=current_size or None)
+        except BaseException as e:
+            if pbar is not None:
+                # The next attempt counts the bytes on disk again
+                pbar.update(-(current_size + received))
+            if (
+                isinstance(e, ftplib.error_perm)
+                and current_size
+                and not received
+                and str(e)[:3] in Files.FTP_REST_UNSUPPORTED
+            ):
+                logging.info(f"REST is not supported ({str(e)}), downloading {local_path} again")
+                os.remove(local_path)
+                Files._retrieve_ftp_file(ftp, ftp_path, local_path, total_size, pbar, checksum)
+                return
+            raise
+
+    @staticmethod
+    def _is_downloaded(file: Dict, file_path: str) -> bool:
+        """
+        Check if a file was completely downloaded: it exists, it is not an unfinished segmented
+        download and its size is the fileSizeBytes of the API, when known.
+        :param file: file record in JSON format
+        :param file_path: output file path
+        """
+        if not os.path.exists(file_path) or SegmentState.exists(file_path):
+            return False
+        file_size = file.get("fileSizeBytes")
+        return file_size is None or os.path.getsize(file_path) == file_size
+
+    @staticmethod
+    def _get_local_path(file: Dict, output_folder: str) -> str:
+        """Return the path every protocol downloads a file record from the PRIDE API to."""
+        return Files.get_output_file_name(Files._get_ftp_download_url(file), file, output_folder)
+
     @staticmethod
     def get_output_file_name(download_url, file, output_folder):
         public_filepath_part = download_url.rsplit("/", 1)
@@ -274,182 +767,392 @@ class Files:
         output_folder: str,
         skip_if_downloaded_already,
         maximum_bandwidth: str = "100M",
+        verifier: ChecksumVerifier = None,
+        workers: int = 1,
     ):
         """
-        Download files using aspera transfer url
+        Download files using aspera transfer url. When workers is greater than one, several ascp
+        sessions run at the same time, maximum_bandwidth is split among them and their progress is
+        reported in one progress bar for the whole batch.
         :param file_list_json: file list in json format
         :param output_folder: folder to download the files
         :param maximum_bandwidth: parameter in Aspera sets the maximum bandwidth for the transfer.
         :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param verifier: checksums the files are verified against; ascp writes the files itself, so
+        they are hashed from disk once downloaded.
+        :param workers: Number of ascp sessions running at the same time.
         """
         ascp_path = Files.get_ascp_binary()
         key_full_path = importlib.resources.files("pridepy").joinpath(
             "aspera/key/asperaweb_id_dsa.openssh"
         )
         key_path = os.path.abspath(key_full_path)
+
+        downloads = []
         for file in file_list_json:
-            if file["publicFileLocations"][0]["name"] == "Aspera Protocol":
-                download_url = file["publicFileLocations"][0]["value"]
-            else:
-                download_url = file["publicFileLocations"][1]["value"]
+            download_url = Files._get_aspera_download_url(file)
 
             # Create a clean filename to save the downloaded file
             logging.debug(f"Downloading via Aspera: {download_url}")
             new_file_path = Files.get_output_file_name(download_url, file, output_folder)
 
-            if skip_if_downloaded_already == True and os.path.exists(new_file_path):
+            if skip_if_downloaded_already == True and Files._is_downloaded(file, new_file_path):
                 logging.info("Skipping download as file already exists")
                 continue
+            downloads.append((file, download_url, new_file_path))
+
+        sessions = max(1, min(workers, len(downloads)))
+        if sessions > 1:
+            # Every session gets an equal share of the bandwidth budget
+            session_bandwidth = Files._parse_aspera_bandwidth(maximum_bandwidth) // sessions
+            maximum_bandwidth = f"{max(1, session_bandwidth)}K"
+            logging.info(
+                f"Downloading {len(downloads)} files using {sessions} Aspera sessions "
+                f"of {maximum_bandwidth}bps"
+            )
 
+        def ascp_command(download_url, new_file_path):
+            return [
+                ascp_path,
+                "-QT",
+                "-P",
+                "33001",
+                "-l",
+                maximum_bandwidth,  # Options for Aspera: adjust as necessary
+                "-i",
+                key_path,
+                download_url,
+                new_file_path,  # Source and destination
+            ]
+
+        def download(file, download_url, new_file_path, pbar=None):
             try:
-                # Execute the ascp command using subprocess
-                subprocess.run(
-                    [
-                        ascp_path,
-                        "-QT",
-                        "-P",
-                        "33001",
-                        "-l",
-                        maximum_bandwidth,  # Options for Aspera: adjust as necessary
-                        "-i",
-                        key_path,
-                        download_url,
-                        new_file_path,  # Source and destination
-                    ],
-                    check=True,
-                )
+                if pbar is None:
+                    # Execute the ascp command using subprocess
+                    subprocess.run(ascp_command(download_url, new_file_path), check=True)
+                else:
+                    Files._run_aspera_session(
+                        ascp_command(download_url, new_file_path), file.get("fileSizeBytes"), pbar
+                    )
                 logging.info(f"Successfully downloaded {new_file_path} via Aspera")
-            except subprocess.CalledProcessError as e:
-                logging.error(f"Aspera download failed for {new_file_path}: {str(e)}")
+                if verifier is not None:
+                    verifier.check(file["fileName"], new_file_path)
+            except (subprocess.CalledProcessError, OSError) as e:
+                # A failed session reports the last message of ascp in its output
+                detail = f" {e.output}" if getattr(e, "output", None) else ""
+                logging.error(f"Aspera download failed for {new_file_path}: {str(e)}{detail}")
+
+        if sessions <= 1:
+            for file, download_url, new_file_path in downloads:
+                download(file, download_url, new_file_path)
+            return
+
+        total_size = sum(file.get("fileSizeBytes", 0) or 0 for file, _, _ in downloads)
+        with tqdm(
+            total=total_size,
+            unit="B",
+            unit_scale=True,
+            desc=f"Downloading {len(downloads)} files",
+        ) as pbar:
+            with ThreadPoolExecutor(max_workers=sessions) as executor:
+                futures = [
+                    executor.submit(download, file, download_url, new_file_path, pbar)
+                    for file, download_url, new_file_path in downloads
+                ]
+                for future in futures:
+                    future.result()
+
+    @staticmethod
+    def _parse_aspera_bandwidth(maximum_bandwidth: str) -> int:
+        """
+        Convert an ascp rate, e.g. 100M, 500K, 1G or a number of Kbps, to Kbps.
+        """
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KkMmGg]?)\s*", str(maximum_bandwidth))
+        if match is None:
+            raise ValueError(f"Invalid Aspera maximum bandwidth: {maximum_bandwidth}")
+        factor = {"": 1, "k": 1, "m": 1000, "g": 1000000}[match.group(2).lower()]
+        return int(float(match.group(1)) * factor)
+
+    @staticmethod
+    def _parse_aspera_progress(line: str) -> Optional[int]:
+        """
+        Get the percentage of a progress line of ascp, e.g. "file.raw   45%  12MB  9.9Mb/s  00:12 ETA"
+        :return: percentage, or None if the line is not a progress line
+        """
+        match = re.search(r"\s(\d{1,3})%\s", f" {line} ")
+        return min(int(match.group(1)), 100) if match else None
+
+    @staticmethod
+    def _run_aspera_session(command: List[str], file_size: Optional[int], pbar: tqdm) -> None:
+        """
+        Run one ascp session and report its progress to the progress bar of the batch. The progress
+        lines of ascp are separated by carriage returns and give the percentage of the file.
+        :param command: ascp command
+        :param file_size: size of the file in bytes, used to convert the percentage to bytes
+        :param pbar: shared progress bar of the batch
+        """
+        reported = 0
+        last_line = ""
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        try:
+            buffer = b""
+            while True:
+                data = process.stdout.read1(4096)
+                if not data:
+                    break
+                *lines, buffer = re.split(rb"[\r\n]", buffer + data)
+                for line in lines:
+                    line = line.decode("utf-8", errors="replace").strip()
+                    percent = Files._parse_aspera_progress(line)
+                    if percent is None:
+                        last_line = line or last_line
+                    elif file_size:
+                        done = file_size * percent // 100
+                        if done > reported:
+                            pbar.update(done - reported)
+                            reported = done
+            returncode = process.wait()
+        except BaseException:
+            process.kill()
+            process.wait()
+            pbar.update(-reported)
+            raise
+        if returncode != 0:
+            pbar.update(-reported)  # The batch bar must not count a failed session
+            raise subprocess.CalledProcessError(returncode, command, output=last_line)
+        if file_size and reported < file_size:
+            pbar.update(file_size - reported)
 
     @staticmethod
     def download_files_from_globus(
-        file_list_json: List[Dict], output_folder, skip_if_downloaded_already
+        file_list_json: List[Dict],
+        output_folder,
+        skip_if_downloaded_already,
+        segments: int = 1,
+        verifier: ChecksumVerifier = None,
+        workers: int = 1,
     ):
         """
-        Download files using globus transfer url with progress bar for each file
+        Download files using globus transfer url with the HTTP download engine, with a progress bar
+        for each file or for the whole batch when several files are downloaded at the same time.
         :param file_list_json: file list in json format
         :param output_folder: folder to download the files
         :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param segments: Number of byte ranges of a large file downloaded in parallel.
+        :param verifier: checksums the files are verified against while they are downloaded.
+        :param workers: Number of files downloaded at the same time.
         """
 
         if not (os.path.isdir(output_folder)):
-            os.mkdir(output_folder, exist_ok=True)
+            os.makedirs(output_folder, exist_ok=True)
 
+        transfers = []
         for file in file_list_json:
             try:
-                if file["publicFileLocations"][0]["name"] == "FTP Protocol":
-                    download_url = file["publicFileLocations"][0]["value"]
-                else:
-                    download_url = file["publicFileLocations"][1]["value"]
-
+                download_url = Files._get_globus_download_url(file)
                 logging.debug(f"Downloading from Globus: {download_url}")
-                ftp_base_url = "ftp://ftp.pride.ebi.ac.uk/"
-                globus_base_url = "https://g-a8b222.dd271.03c0.data.globus.org/"
-                download_url = download_url.replace(ftp_base_url, globus_base_url)
 
                 # Create a clean filename to save the downloaded file
                 new_file_path = Files.get_output_file_name(download_url, file, output_folder)
 
-                if skip_if_downloaded_already == True and os.path.exists(new_file_path):
+                if skip_if_downloaded_already == True and Files._is_downloaded(file, new_file_path):
                     logging.info("Skipping download as file already exists")
                     continue
 
-                # Get total file size for progress tracking
-                with urllib.request.urlopen(download_url) as response:
-                    total_size = int(response.headers.get("Content-Length", 0))
-
-                # Initialize progress bar
-                progress = Progress(total_size, new_file_path)
-
-                # Download the file with progress bar
-                urllib.request.urlretrieve(
+                checksum = verifier.new_checksum(file["fileName"]) if verifier is not None else None
+                transfer = HttpTransfer(
                     download_url,
                     new_file_path,
-                    reporthook=lambda blocks, block_size, total_size: progress(block_size),
+                    total_size=file.get("fileSizeBytes"),
+                    checksum=checksum,
                 )
-
-                progress.close()
-                logging.info(f"Successfully downloaded {new_file_path}")
-
-            except Exception as e:
-                logging.error(f"Download from Globus failed for {new_file_path}: {str(e)}")
+                transfers.append((file, transfer))
+            except (KeyError, IndexError) as e:
+                logging.error(f"Failed to process file due to missing data: {str(e)}")
+
+        engine = HttpDownloadEngine(max_concurrency=workers, segments=segments)
+        engine.run([transfer for _, transfer in transfers])
+        for file, transfer in transfers:
+            if transfer.error is not None:
+                logging.error(
+                    f"Download from Globus failed for {transfer.local_path}: {str(transfer.error)}"
+                )
+                continue
+            logging.info(f"Successfully downloaded {transfer.local_path}")
+            if transfer.checksum is not None:
+                verifier.check(file["fileName"], transfer.local_path, transfer.checksum)
 
     @staticmethod
     def download_files_from_s3(
-        file_list_json: List[Dict], output_folder: str, skip_if_downloaded_already
+        file_list_json: List[Dict],
+        output_folder: str,
+        skip_if_downloaded_already,
+        workers: int = 1,
+        max_concurrency: int = 10,
+        multipart_chunksize_mb: int = 8,
+        verifier: ChecksumVerifier = None,
     ):
         """
         Download files using S3 transfer URL with a progress bar and retry logic.
         :param file_list_json: file list in JSON format
         :param output_folder: folder to download the files
         :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param workers: Number of files downloaded at the same time.
+        :param max_concurrency: Number of parts of each file downloaded at the same time.
+        :param multipart_chunksize_mb: Size of every part of a multipart download in MB.
+        :param verifier: checksums the files are verified against while they are downloaded.
         """
 
         if not os.path.isdir(output_folder):
             os.makedirs(output_folder, exist_ok=True)
 
-        # Retry and timeout config
+        # Retry and timeout config, the connection pool is shared by every part of every file in flight
         retry_config = Config(
             retries={"max_attempts": 5, "mode": "standard"},
             connect_timeout=120,  # Increase timeout to 120 seconds
             read_timeout=120,  # Timeout for reading data
             signature_version=botocore.UNSIGNED,  # Unsigned requests for public data
+            max_pool_connections=max(10, workers * max_concurrency),
         )
 
-        s3_resource = boto3.resource(
+        # boto3 clients, unlike resources, are thread safe and can be shared by all workers
+        s3_client = boto3.client(
             "s3",
             config=retry_config,
             endpoint_url=Files.S3_URL,
         )
-        bucket = s3_resource.Bucket(Files.S3_BUCKET)
+        chunk_size = multipart_chunksize_mb * 1024 * 1024
+        transfer_config = TransferConfig(
+            multipart_threshold=chunk_size,
+            multipart_chunksize=chunk_size,
+            max_concurrency=max_concurrency * workers,  # Requests of every file in flight
+            use_threads=True,
+        )
 
-        for file in file_list_json:
-            try:
-                # Determine S3 or FTP path
-                download_url = (
-                    file["publicFileLocations"][0]["value"]
-                    if file["publicFileLocations"][0]["name"] == "FTP Protocol"
-                    else file["publicFileLocations"][1]["value"]
-                )
+        with create_transfer_manager(s3_client, transfer_config) as transfer_manager:
+            if workers <= 1 or len(file_list_json) <= 1:
+                for file in file_list_json:
+                    Files._download_file_from_s3(
+                        transfer_manager,
+                        file,
+                        output_folder,
+                        skip_if_downloaded_already,
+                        verifier=verifier,
+                    )
+                return
+
+            total_size = sum(file.get("fileSizeBytes", 0) or 0 for file in file_list_json)
+            with tqdm(
+                total=total_size,
+                unit="B",
+                unit_scale=True,
+                desc=f"Downloading {len(file_list_json)} files",
+            ) as pbar:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(
+                            Files._download_file_from_s3,
+                            transfer_manager,
+                            file,
+                            output_folder,
+                            skip_if_downloaded_already,
+                            pbar,
+                            verifier=verifier,
+                        )
+                        for file in file_list_json
+                    ]
+                    for future in futures:
+                        future.result()
 
-                ftp_base_url = "ftp://ftp.pride.ebi.ac.uk/pride/data/archive/"
-                s3_path = download_url.replace(ftp_base_url, "")
-                new_file_path = Files.get_output_file_name(download_url, file, output_folder)
+    @staticmethod
+    def _download_file_from_s3(
+        transfer_manager,
+        file: Dict,
+        output_folder: str,
+        skip_if_downloaded_already: bool,
+        pbar: tqdm = None,
+        max_download_retries: int = 5,
+        verifier: ChecksumVerifier = None,
+    ):
+        """
+        Download a single file from the PRIDE S3 bucket with retry logic.
+        :param transfer_manager: s3transfer TransferManager shared by the files of the batch
+        :param file: file record in JSON format
+        :param output_folder: folder to download the file
+        :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param pbar: shared progress bar of the batch; a progress bar per file is used if None.
+        :param max_download_retries: Number of attempts to download the file.
+        :param verifier: checksums the file is verified against. The parts are then written in
+        order to a non-seekable target, so they are hashed as they arrive.
+        """
+        try:
+            # Determine S3 or FTP path
+            download_url = Files._get_ftp_download_url(file)
+            s3_path = Files._get_s3_path(file)
+            new_file_path = Files.get_output_file_name(download_url, file, output_folder)
 
-                if skip_if_downloaded_already == True and os.path.exists(new_file_path):
-                    logging.info("Skipping download as file already exists")
-                    continue
+            if skip_if_downloaded_already == True and Files._is_downloaded(file, new_file_path):
+                logging.info("Skipping download as file already exists")
+                if pbar is not None:
+                    pbar.update(file.get("fileSizeBytes", 0) or 0)
+                return
 
-                logging.debug(f"Downloading From S3: {s3_path}")
+            logging.debug(f"Downloading From S3: {s3_path}")
 
-                # Get file size for progress tracking
-                obj = bucket.Object(s3_path)
-                total_size = obj.content_length
+            # File size for progress tracking, s3transfer only asks the server if the API has none
+            total_size = file.get("fileSizeBytes")
 
+            # Download with progress bar and retry handling
+            for attempt in range(max_download_retries):
                 # Initialize progress bar
-                progress = Progress(total_size, new_file_path)
+                progress = Progress(total_size, new_file_path) if pbar is None else None
+                received = 0
+
+                def callback(bytes_amount):
+                    nonlocal received
+                    received += bytes_amount
+                    if progress is not None:
+                        progress(bytes_amount)
+                    else:
+                        pbar.update(bytes_amount)
 
-                # Download with progress bar and retry handling
-                for attempt in range(5):
-                    try:
-                        bucket.download_file(s3_path, new_file_path, Callback=progress)
-                        progress.close()
-                        logging.info(f"Successfully downloaded {new_file_path}")
+                checksum = (
+                    verifier.new_checksum(file["fileName"]) if verifier is not None else None
+                )
+                try:
+                    output, target = nullcontext(), new_file_path
+                    if checksum is not None:
+                        output = open(new_file_path, "wb")
+                        target = ChecksumWriter(output, checksum)
+                    with output:
+                        transfer_manager.download(
+                            Files.S3_BUCKET,
+                            s3_path,
+                            target,
+                            subscribers=[S3TransferSubscriber(total_size, callback)],
+                        ).result()
+                    logging.info(f"Successfully downloaded {new_file_path}")
+                    if checksum is not None:
+                        verifier.check(file["fileName"], new_file_path, checksum)
+                    break
+                except botocore.exceptions.ClientError as e:
+                    if pbar is not None:
+                        pbar.update(-received)  # The batch bar must not count discarded bytes
+                    if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                        logging.error(f"{s3_path} does not exist in {Files.S3_BUCKET}")
                         break
-                    except botocore.exceptions.ClientError as e:
-                        if e.response["Error"]["Code"] == "404":
-                            logging.error("The object does not exist.")
-                            break
+                    else:
+                        logging.error(f"Download failed: {e}")
+                        if attempt < max_download_retries - 1:
+                            time.sleep(2**attempt)  # Exponential backoff
+                            logging.info(f"Retrying... ({attempt + 1}/{max_download_retries})")
                         else:
-                            logging.error(f"Download failed: {e}")
-                            if attempt < 4:
-                                time.sleep(2**attempt)  # Exponential backoff
-                                logging.info(f"Retrying... ({attempt + 1}/5)")
-                            else:
-                                raise
-            except Exception as e:
-                logging.error(f"Failed to download {file['fileName']}: {e}")
+                            raise
+                finally:
+                    if progress is not None:
+                        progress.close()
+        except Exception as e:
+            logging.error(f"Failed to download {file['fileName']}: {e}")
 
     def get_submitted_file_path_prefix(self, accession):
         """
@@ -461,8 +1164,13 @@ class Files:
         :param accession: PRIDE accession
         :return: path fragment (eg: 2018/10/PXD008644)
         """
-        results = self.get_all_raw_file_list(accession)
-        first_file = results[0]["publicFileLocations"][0]["value"]
+        # The first raw file is enough, the rest of the stream is not read
+        first_raw_file = next(
+            file
+            for file in self.iter_all_files_by_project(accession)
+            if file["fileCategory"]["value"] == "RAW"
+        )
+        first_file = first_raw_file["publicFileLocations"][0]["value"]
         path_fragment = re.search(r"\d{4}/\d{2}/PXD\d*", first_file).group()
         return path_fragment
 
@@ -477,6 +1185,11 @@ class Files:
         password,
         aspera_maximum_bandwidth,
         checksum_check,
+        workers: int = 1,
+        segments: int = 1,
+        s3_max_concurrency: int = 10,
+        s3_chunk_size: int = 8,
+        journal: bool = False,
     ):
         """
         Download files from url
@@ -489,6 +1202,11 @@ class Files:
         :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
         :param aspera_maximum_bandwidth: Aspera maximum bandwidth
         :param checksum_check: Download checksum for a given project.
+        :param workers: Number of files downloaded in parallel.
+        :param segments: Number of byte ranges of a large file downloaded in parallel.
+        :param s3_max_concurrency: Number of parts of a file downloaded at the same time from S3.
+        :param s3_chunk_size: Size of every part of a multipart S3 download in MB.
+        :param journal: Keep a transfer journal in the output folder to resume interrupted batches.
         """
 
         if not (os.path.isdir(output_folder)):
@@ -517,6 +1235,11 @@ class Files:
                 protocol,
                 aspera_maximum_bandwidth=aspera_maximum_bandwidth,
                 checksum_check=checksum_check,
+                workers=workers,
+                segments=segments,
+                s3_max_concurrency=s3_max_concurrency,
+                s3_chunk_size=s3_chunk_size,
+                journal=journal,
             )
         elif not public_project and (username is not None and password is not None):
             logging.info("Downloading file from private dataset {}".format(accession))
@@ -526,6 +1249,7 @@ class Files:
                 output_folder=output_folder,
                 username=username,
                 password=password,
+                segments=segments,
             )
         else:
             logging.error(
@@ -548,28 +1272,38 @@ class Files:
         """
 
         try:
-            files = self.stream_all_files_by_project(accession)
+            files = self.iter_all_files_by_project(accession)
             file = [f for f in files if f["fileName"] == file_name]
             return file
         except Exception as e:
             raise Exception("File not found " + str(e))
 
-    def download_private_file_name(self, accession, file_name, output_folder, username, password):
+    def download_private_file_name(
+        self, accession, file_name, output_folder, username, password, segments: int = 1
+    ):
         """
         Get the information for a given private file to be downloaded from the api.
         :param accession: Project accession
         :param file_name: The file name to be downloaded
         :param username: Username with access to the dataset
         :param password: Password for user with access to the dataset
+        :param segments: Number of byte ranges of a large file downloaded in parallel.
         """
 
         auth = Authentication()
-        auth_token = auth.get_token(username, password)
-        validate_token = auth.validate_token(auth_token)
-        logging.info("Valid token after login: {}".format(validate_token))
+        auth_token = auth.get_cached_token(username, password)
 
         url = self.API_PRIVATE_URL + "/projects/{}/files?search={}".format(accession, file_name)
-        content = requests.get(url, headers={"Authorization": "Bearer {}".format(auth_token)})
+        content = Util.http_request(
+            "GET", url, headers={"Authorization": "Bearer {}".format(auth_token)}
+        )
+        if content.status_code == 401:
+            # The cached token was revoked or expired early: log in again once
+            auth.invalidate_token(username, auth_token)
+            auth_token = auth.get_cached_token(username, password)
+            content = Util.http_request(
+                "GET", url, headers={"Authorization": "Bearer {}".format(auth_token)}
+            )
         if content.ok and content.status_code == 200:
             json_file = content.json()
             if (
@@ -583,36 +1317,7 @@ class Files:
                 # Create a clean filename to save the downloaded file
                 new_file_path = os.path.join(output_folder, f"{file_name}")
 
-                session = Util.create_session_with_retries()  # Create session with retries
-                # Check if the file already exists
-                if os.path.exists(new_file_path):
-                    resume_header = {"Range": f"bytes={os.path.getsize(new_file_path)}-"}
-                    mode = "ab"  # Append to file
-                    resume_size = os.path.getsize(new_file_path)
-                else:
-                    resume_header = {}
-                    mode = "wb"  # Write new file
-                    resume_size = 0
-
-                with session.get(
-                    download_url, stream=True, headers=resume_header, timeout=(10, 60)
-                ) as r:
-                    r.raise_for_status()
-                    total_size = int(r.headers.get("content-length", 0)) + resume_size
-                    block_size = 1024 * 1024  # 1 MB chunks
-
-                    with tqdm(
-                        total=total_size,
-                        unit="B",
-                        unit_scale=True,
-                        desc=new_file_path,
-                        initial=resume_size,
-                    ) as pbar:
-                        with open(new_file_path, mode) as f:
-                            for chunk in r.iter_content(chunk_size=block_size):
-                                if chunk:
-                                    f.write(chunk)
-                                    pbar.update(len(chunk))
+                Files._download_http_file(download_url, new_file_path, segments=segments)
 
                 logging.info(f"Successfully downloaded {new_file_path}")
 
@@ -630,6 +1335,90 @@ class Files:
                 f"File name {file_name} now found in the project {accession}, or user don't have access"
             )
 
+    def download_private_files(
+        self,
+        accession: str,
+        output_folder: str,
+        username: str,
+        password: str,
+        skip_if_downloaded_already: bool = False,
+        categories: List[str] = None,
+        file_patterns: List[str] = None,
+        workers: int = 4,
+        segments: int = 1,
+    ) -> Dict[str, str]:
+        """
+        Download several files of a private project. The project is listed once with the private
+        API, the files are selected by category and name, and the matches are downloaded
+        concurrently over one HTTP connection pool. Partial files are resumed.
+        :param accession: Project accession
+        :param output_folder: folder to download the files
+        :param username: Username with access to the dataset
+        :param password: Password for user with access to the dataset
+        :param skip_if_downloaded_already: Skip the files that have already been downloaded.
+        :param categories: File categories to download, all of them if None
+        :param file_patterns: Shell-style patterns of the file names (e.g. *.raw), all if None
+        :param workers: Number of files downloaded in parallel.
+        :param segments: Number of byte ranges of a large file downloaded in parallel.
+        :return: error of every file that could not be downloaded, by file name
+        """
+        os.makedirs(output_folder, exist_ok=True)
+        file_list = self.filter_private_files(
+            Project().iter_private_files_by_accession(accession, username, password, workers),
+            categories,
+            file_patterns,
+        )
+        logging.info(f"{len(file_list)} private files of {accession} selected for download")
+
+        transfers = []
+        for file in file_list:
+            local_path = os.path.join(output_folder, file["fileName"])
+            if skip_if_downloaded_already and self._is_downloaded(file, local_path):
+                logging.info(f"Skipping {file['fileName']} as it has already been downloaded")
+                continue
+            transfers.append(
+                HttpTransfer(
+                    file["_links"]["download"]["href"],
+                    local_path,
+                    total_size=file.get("fileSizeBytes"),
+                )
+            )
+
+        HttpDownloadEngine(max_concurrency=workers, segments=segments).run(transfers)
+        errors = {}
+        for transfer in transfers:
+            if transfer.error is not None:
+                file_name = os.path.basename(transfer.local_path)
+                logging.error(f"Download of {file_name} failed: {str(transfer.error)}")
+                errors[file_name] = str(transfer.error)
+            else:
+                logging.info(f"Successfully downloaded {transfer.local_path}")
+        return errors
+
+    @staticmethod
+    def filter_private_files(
+        files: Iterator[Dict], categories: List[str] = None, file_patterns: List[str] = None
+    ) -> List[Dict]:
+        """
+        Select the files of a project listing by category and file name.
+        :param files: file records in JSON format
+        :param categories: File categories to keep, all of them if None
+        :param file_patterns: Shell-style patterns of the file names to keep, all if None
+        :return: selected files
+        """
+        category_set = set(categories) if categories else None
+        selected = []
+        for file in files:
+            if category_set is not None:
+                if file.get("fileCategory", {}).get("value") not in category_set:
+                    continue
+            if file_patterns and not any(
+                fnmatch.fnmatchcase(file["fileName"], pattern) for pattern in file_patterns
+            ):
+                continue
+            selected.append(file)
+        return selected
+
     @staticmethod
     def get_ascp_binary():
         """
@@ -658,17 +1447,23 @@ class Files:
             raise OSError(f"Unsupported OS or architecture: {os_type}, {arch}")
 
     @staticmethod
-    def save_checksum_file(accession, output_folder):
+    def save_checksum_file(accession, output_folder) -> str:
+        """
+        Save the checksums of the files of a project to <accession>-checksum.tsv
+        :param accession: Project accession
+        :param output_folder: Folder of the checksum file
+        :return: path of the checksum file
+        """
         url = f"https://wwwdev.ebi.ac.uk/pride/ws/archive/v3/files/checksum/{accession}"
         headers = {"accept": "text/plain"}
-        request = urllib.request.Request(url, headers=headers, method="GET")
         logging.info(f"Fetching checksum file from {url}")
-        with urllib.request.urlopen(request) as response:
-            data = response.read().decode("utf-8")
-            # Save the data to a .tsv file
-            output_path = os.path.join(output_folder, f"{accession}-checksum.tsv")
-            with open(output_path, "w") as file:
-                file.write(data)
+        response = Util.http_request("GET", url, headers=headers)
+        response.raise_for_status()
+        # Save the data to a .tsv file
+        output_path = os.path.join(output_folder, f"{accession}-checksum.tsv")
+        with open(output_path, "w") as file:
+            file.write(response.content.decode("utf-8"))
+        return output_path
 
     @staticmethod
     def download_files(
@@ -679,27 +1474,139 @@ class Files:
         protocol: str = "ftp",
         aspera_maximum_bandwidth: str = "100M",  # Aspera maximum bandwidth
         checksum_check=False,
+        workers: int = 1,
+        segments: int = 1,
+        s3_max_concurrency: int = 10,
+        s3_chunk_size: int = 8,
+        journal: bool = False,
+        max_checksum_retries: int = 2,
     ):
         """
         Download files using either FTP or Aspera transfer protocol.
         :param file_list_json: File list in JSON format
         :param accession:  Project accession
         :param output_folder: Folder to download the files
-        :param protocol: ftp, aspera, globus
+        :param protocol: ftp, aspera, globus, s3, or auto to select the fastest protocol from a probe
         :param aspera_maximum_bandwidth: parameter in Aspera sets the maximum bandwidth for the transfer.
         :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param workers: Number of files downloaded in parallel (ftp, aspera, globus, s3).
+        :param segments: Number of byte ranges of a large file downloaded in parallel (ftp, globus).
+        :param s3_max_concurrency: Number of parts of a file downloaded at the same time from S3.
+        :param s3_chunk_size: Size of every part of a multipart S3 download in MB.
+        :param journal: Keep a transfer journal in the output folder to resume interrupted batches.
+        :param max_checksum_retries: Number of times a file that does not match its checksum is
+        downloaded again (when checksum_check is True).
         """
-        protocols_supported = ["ftp", "aspera", "globus", "s3"]
+        protocols_supported = ["ftp", "aspera", "globus", "s3", "auto"]
         if protocol not in protocols_supported:
-            logging.error("Protocol should be either ftp, aspera, globus")
+            logging.error("Protocol should be either ftp, aspera, globus, s3 or auto")
             return
 
+        verifier = None
         if checksum_check:
-            Files.save_checksum_file(accession, output_folder)
+            if not os.path.isdir(output_folder):
+                os.makedirs(output_folder, exist_ok=True)
+            checksum_file = Files.save_checksum_file(accession, output_folder)
+            verifier = ChecksumVerifier.from_checksum_file(checksum_file)
+
+        transfer_journal = None
+        if journal:
+            transfer_journal = TransferJournal(output_folder)
+            transfer_journal.add_files(accession, file_list_json)
+            transfer_journal.refresh(accession, file_list_json)
+            all_files = file_list_json
+            file_list_json = transfer_journal.pending_files(accession, file_list_json)
+            logging.info(
+                f"{len(all_files) - len(file_list_json)} files already downloaded according to "
+                f"{transfer_journal.path}, {len(file_list_json)} left"
+            )
+            transfer_journal.record_attempt(accession, file_list_json, protocol)
+
+        try:
+            remaining_files = file_list_json
+            for checksum_attempt in range(max_checksum_retries + 1):
+                Files._download_files_with_protocol(
+                    remaining_files,
+                    output_folder,
+                    skip_if_downloaded_already,
+                    protocol,
+                    aspera_maximum_bandwidth=aspera_maximum_bandwidth,
+                    workers=workers,
+                    segments=segments,
+                    s3_max_concurrency=s3_max_concurrency,
+                    s3_chunk_size=s3_chunk_size,
+                    verifier=verifier,
+                )
+                if verifier is None:
+                    break
+                if transfer_journal is not None:
+                    for file_name, checksum_state in verifier.results.items():
+                        transfer_journal.set_checksum_state(
+                            accession, file_name, checksum_state, verifier.checksums.get(file_name)
+                        )
+
+                # Files that do not match their checksum were removed and are downloaded again
+                mismatches = set(verifier.pop_mismatches())
+                remaining_files = [f for f in remaining_files if f["fileName"] in mismatches]
+                if not remaining_files:
+                    break
+                if checksum_attempt < max_checksum_retries:
+                    logging.warning(
+                        f"Downloading {len(remaining_files)} files again after a checksum mismatch"
+                    )
+                    if transfer_journal is not None:
+                        transfer_journal.record_attempt(accession, remaining_files, protocol)
+                else:
+                    logging.error(
+                        f"{len(remaining_files)} files do not match their checksum after "
+                        f"{max_checksum_retries + 1} attempts"
+                    )
+        finally:
+            if transfer_journal is not None:
+                transfer_journal.refresh(accession, file_list_json)
+                transfer_journal.log_summary(accession, all_files)
+                transfer_journal.close()
 
-        if protocol == "ftp":
+    @staticmethod
+    def _download_files_with_protocol(
+        file_list_json: List[Dict],
+        output_folder: str,
+        skip_if_downloaded_already,
+        protocol: str = "ftp",
+        aspera_maximum_bandwidth: str = "100M",
+        workers: int = 1,
+        segments: int = 1,
+        s3_max_concurrency: int = 10,
+        s3_chunk_size: int = 8,
+        verifier: ChecksumVerifier = None,
+    ):
+        """
+        Dispatch the download of a file list to the backend of a protocol.
+        """
+        if not file_list_json:
+            return
+
+        if protocol == "auto":
+            Files._download_files_auto(
+                file_list_json,
+                output_folder,
+                skip_if_downloaded_already,
+                aspera_maximum_bandwidth=aspera_maximum_bandwidth,
+                workers=workers,
+                segments=segments,
+                s3_max_concurrency=s3_max_concurrency,
+                s3_chunk_size=s3_chunk_size,
+                verifier=verifier,
+            )
+
+        elif protocol == "ftp":
             Files.download_files_from_ftp(
-                file_list_json, output_folder, skip_if_downloaded_already
+                file_list_json,
+                output_folder,
+                skip_if_downloaded_already,
+                workers=workers,
+                segments=segments,
+                verifier=verifier,
             )
 
         elif protocol == "aspera":
@@ -708,14 +1615,257 @@ class Files:
                 output_folder,
                 skip_if_downloaded_already,
                 maximum_bandwidth=aspera_maximum_bandwidth,
+                verifier=verifier,
+                workers=workers,
             )
 
         elif protocol == "globus":
             Files.download_files_from_globus(
-                file_list_json, output_folder, skip_if_downloaded_already
+                file_list_json,
+                output_folder,
+                skip_if_downloaded_already,
+                segments=segments,
+                verifier=verifier,
+                workers=workers,
             )
         elif protocol == "s3":
-            Files.download_files_from_s3(file_list_json, output_folder, skip_if_downloaded_already)
+            Files.download_files_from_s3(
+                file_list_json,
+                output_folder,
+                skip_if_downloaded_already,
+                workers=workers,
+                max_concurrency=s3_max_concurrency,
+                multipart_chunksize_mb=s3_chunk_size,
+                verifier=verifier,
+            )
+
+    @staticmethod
+    def _download_files_auto(
+        file_list_json: List[Dict],
+        output_folder: str,
+        skip_if_downloaded_already,
+        workers: int = 1,
+        **options,
+    ):
+        """
+        Download files with the fastest protocol. The protocols are ranked by a short probe on a
+        small file of the batch (or by the ranking cached for this network), and the files are then
+        downloaded in chunks. A protocol whose throughput drops below half of its probed speed, or
+        that fails to download files, is replaced by the next fastest one for the rest of the batch.
+        Files that still fail when no other protocol is left are reported with an exception once
+        the rest of the batch is downloaded.
+        :param file_list_json: file list in JSON format
+        :param output_folder: folder to download the files
+        :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param workers: Number of files downloaded in parallel.
+        :param options: options of the protocol backends, see _download_files_with_protocol
+        """
+        selector, ranking = Files._rank_protocols(file_list_json)
+        if not ranking:
+            raise Exception("No download protocol is available")
+        protocol = ranking[0]
+        logging.info(f"Selected protocol {protocol} (ranking: {', '.join(ranking)})")
+
+        chunks = deque(Files._split_batch(file_list_json, Files.AUTO_CHUNK_BYTES, 4 * workers))
+        not_downloaded = []
+        while chunks:
+            chunk = chunks.popleft()
+            pending = [
+                file
+                for file in chunk
+                if not Files._is_downloaded(file, Files._get_local_path(file, output_folder))
+            ]
+            if not pending:
+                continue
+            sizes_before = Files._get_local_sizes(pending, output_folder)
+            start = time.time()
+            Files._download_files_with_protocol(
+                pending,
+                output_folder,
+                skip_if_downloaded_already,
+                protocol,
+                workers=workers,
+                **options,
+            )
+            elapsed = max(time.time() - start, 1e-3)
+
+            failed = [
+                file
+                for file in pending
+                if not Files._is_downloaded(file, Files._get_local_path(file, output_folder))
+            ]
+            # Throughput over the bytes written by this run, resumed and failed files included
+            sizes_after = Files._get_local_sizes(pending, output_folder)
+            transferred = sum(
+                max(after - before, 0) for before, after in zip(sizes_before, sizes_after)
+            )
+            speed = transferred / elapsed
+            if not (failed or selector.is_degraded(protocol, speed)):
+                continue
+
+            next_protocol = selector.fallback(protocol, speed)
+            if next_protocol is None:
+                logging.warning(f"No other protocol left to replace {protocol}, keeping it")
+                not_downloaded.extend(failed)
+                continue
+            logging.warning(
+                f"Switching from {protocol} ({speed / 1e6:.2f} MB/s, {len(failed)} failed files) "
+                f"to {next_protocol}"
+            )
+            protocol = next_protocol
+            if failed:
+                chunks.appendleft(failed)
+
+        if not_downloaded:
+            names = ", ".join(file["fileName"] for file in not_downloaded)
+            raise Exception(f"{len(not_downloaded)} files could not be downloaded: {names}")
+
+    @staticmethod
+    def _get_local_sizes(file_list_json: List[Dict], output_folder: str) -> List[int]:
+        """
+        :return: size of the local file of each file, 0 if it does not exist yet
+        """
+        sizes = []
+        for file in file_list_json:
+            local_path = Files._get_local_path(file, output_folder)
+            sizes.append(os.path.getsize(local_path) if os.path.exists(local_path) else 0)
+        return sizes
+
+    @staticmethod
+    def _split_batch(
+        file_list_json: List[Dict], chunk_bytes: int, chunk_files: int
+    ) -> List[List[Dict]]:
+        """
+        Split a file list in consecutive chunks of at least chunk_bytes or chunk_files files.
+        """
+        chunks, chunk, size = [], [], 0
+        for file in file_list_json:
+            chunk.append(file)
+            size += file.get("fileSizeBytes", 0) or 0
+            if size >= chunk_bytes or len(chunk) >= chunk_files:
+                chunks.append(chunk)
+                chunk, size = [], 0
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _rank_protocols(file_list_json: List[Dict]) -> Tuple[ProtocolSelector, List[str]]:
+        """
+        Rank the protocols by a probe on a small file of a batch, or by the cached ranking.
+        :param file_list_json: file list in JSON format
+        :return: the protocol selector and the protocols from the fastest to the slowest
+        """
+        selector = ProtocolSelector(ProtocolSelector.network_key(Files.PRIDE_ARCHIVE_FTP))
+        probe_file = Files._get_probe_file(file_list_json)
+        return selector, selector.select(Files._get_protocol_probes(probe_file))
+
+    @staticmethod
+    def _get_probe_file(file_list_json: List[Dict]) -> Dict:
+        """
+        Return the smallest file of a batch that can fill the probe, or the largest one if all are
+        smaller.
+        """
+        sizes = [
+            (file.get("fileSizeBytes", 0) or 0, index) for index, file in enumerate(file_list_json)
+        ]
+        large_enough = [item for item in sizes if item[0] >= Files.PROBE_BYTES]
+        _, index = min(large_enough) if large_enough else max(sizes)
+        return file_list_json[index]
+
+    @staticmethod
+    def _get_protocol_probes(file: Dict) -> Dict[str, Callable[[], float]]:
+        """
+        Return a probe measuring the throughput in bytes/s of every protocol available for a file.
+        """
+        probes = {
+            "ftp": lambda: Files._probe_ftp(Files._get_ftp_download_url(file)),
+            "globus": lambda: Files._probe_http(Files._get_globus_download_url(file)),
+            "s3": lambda: Files._probe_s3(Files._get_s3_path(file)),
+        }
+        try:
+            ascp_path = Files.get_ascp_binary()
+        except OSError as e:
+            logging.info(f"Aspera is not probed: {str(e)}")
+            return probes
+        locations = [location["name"] for location in file.get("publicFileLocations", [])]
+        if "Aspera Protocol" in locations and os.access(ascp_path, os.X_OK):
+            probes["aspera"] = lambda: Files._probe_aspera(Files._get_aspera_download_url(file))
+        return probes
+
+    @staticmethod
+    def _probe_ftp(download_url: str) -> float:
+        parsed = urlparse(download_url)
+        start = time.time()
+        ftp = Files._connect_ftp(parsed.hostname)
+        received = 0
+        try:
+            ftp.voidcmd("TYPE I")
+            conn = ftp.transfercmd(f"RETR {parsed.path.lstrip('/')}")
+            try:
+                while received < Files.PROBE_BYTES and time.time() - start < Files.PROBE_SECONDS:
+                    data = conn.recv(1024 * 1024)
+                    if not data:
+                        break
+                    received += len(data)
+            finally:
+                conn.close()
+        finally:
+            ftp.close()  # The transfer is aborted, the server reply is not awaited
+        return received / max(time.time() - start, 1e-3)
+
+    @staticmethod
+    def _probe_http(download_url: str) -> float:
+        start = time.time()
+        received = 0
+        headers = {"Range": f"bytes=0-{Files.PROBE_BYTES - 1}"}
+        with Util.http_request(
+            "GET", download_url, stream=True, headers=headers, timeout=(10, 30)
+        ) as r:
+            r.raise_for_status()
+            for chunk in r.iter_content(chunk_size=1024 * 1024):
+                received += len(chunk)
+                if received >= Files.PROBE_BYTES or time.time() - start >= Files.PROBE_SECONDS:
+                    break
+        return received / max(time.time() - start, 1e-3)
+
+    @staticmethod
+    def _probe_s3(s3_path: str) -> float:
+        config = Config(connect_timeout=10, read_timeout=30, signature_version=botocore.UNSIGNED)
+        start = time.time()
+        s3_client = boto3.client("s3", config=config, endpoint_url=Files.S3_URL)
+        response = s3_client.get_object(
+            Bucket=Files.S3_BUCKET, Key=s3_path, Range=f"bytes=0-{Files.PROBE_BYTES - 1}"
+        )
+        received = 0
+        for chunk in response["Body"].iter_chunks(chunk_size=1024 * 1024):
+            received += len(chunk)
+            if time.time() - start >= Files.PROBE_SECONDS:
+                break
+        response["Body"].close()
+        return received / max(time.time() - start, 1e-3)
+
+    @staticmethod
+    def _probe_aspera(download_url: str) -> float:
+        key_path = os.path.abspath(
+            importlib.resources.files("pridepy").joinpath("aspera/key/asperaweb_id_dsa.openssh")
+        )
+        with tempfile.TemporaryDirectory() as probe_folder:
+            start = time.time()
+            command = [Files.get_ascp_binary(), "-QT", "-P", "33001", "-i", key_path]
+            try:
+                subprocess.run(
+                    command + [download_url, probe_folder],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=Files.PROBE_SECONDS,
+                    check=True,
+                )
+            except subprocess.TimeoutExpired:
+                pass  # The bytes received before the timeout are measured
+            # ascp writes a partial file under a temporary name until the transfer is complete
+            received = sum(entry.stat().st_size for entry in os.scandir(probe_folder))
+            return received / max(time.time() - start, 1e-3)
 
     def download_all_category_files(
         self,
@@ -727,6 +1877,11 @@ class Files:
         checksum_check: bool,
         categories: List[str] = None,
         category: str = None,
+        workers: int = 1,
+        segments: int = 1,
+        s3_max_concurrency: int = 10,
+        s3_chunk_size: int = 8,
+        journal: bool = False,
     ):
         """
         Download all files of specified categories from a PRIDE project.
@@ -739,10 +1894,24 @@ class Files:
         :param checksum_check: If True, downloads the checksum file for the project.
         :param categories: List of file categories to download.
         :param category: Single file category (deprecated, use categories instead).
+        :param workers: Number of files downloaded in parallel.
+        :param segments: Number of byte ranges of a large file downloaded in parallel.
+        :param s3_max_concurrency: Number of parts of a file downloaded at the same time from S3.
+        :param s3_chunk_size: Size of every part of a multipart S3 download in MB.
+        :param journal: Keep a transfer journal in the output folder to resume interrupted batches.
         """
         if categories is None:
             categories = [category] if category else ["RAW"]
-        raw_files = self.get_all_category_file_list(accession, categories)
+        if journal:
+            raw_files = self._get_planned_file_list(
+                accession,
+                output_folder,
+                categories,
+                lambda: self.get_all_category_file_list(accession, categories),
+                refresh=self.metadata_cache.refresh,
+            )
+        else:
+            raw_files = self.get_all_category_file_list(accession, categories)
         self.download_files(
             raw_files,
             accession,
@@ -751,7 +1920,186 @@ class Files:
             protocol,
             aspera_maximum_bandwidth=aspera_maximum_bandwidth,
             checksum_check=checksum_check,
+            workers=workers,
+            segments=segments,
+            s3_max_concurrency=s3_max_concurrency,
+            s3_chunk_size=s3_chunk_size,
+            journal=journal,
+        )
+
+    def download_projects(
+        self,
+        accessions: List[str],
+        output_folder: str,
+        skip_if_downloaded_already: bool,
+        protocol: str,
+        aspera_maximum_bandwidth: str = "100M",
+        checksum_check: bool = False,
+        categories: List[str] = None,
+        workers: int = 8,
+        parallel_projects: int = 4,
+        segments: int = 1,
+        s3_max_concurrency: int = 10,
+        s3_chunk_size: int = 8,
+        journal: bool = False,
+    ) -> Dict[str, str]:
+        """
+        Download the files of several PRIDE projects, each into a folder named after its accession.
+        The file lists are fetched concurrently and every project is downloaded as soon as its list
+        is received. The projects share a ConnectionLimiter, so that all of them together open at
+        most workers connections to the server of the protocol, counting every segment of a file, or
+        every part of an S3 file downloaded at the same time, as a connection. With auto, the protocol is selected once for the batch, from a probe on the
+        first project listed, so that the connections are counted against its real server. The
+        Aspera bandwidth is split between the projects downloaded at the same time.
+
+        :param accessions: PRIDE project accessions
+        :param output_folder: The directory where the project folders are created.
+        :param skip_if_downloaded_already: If True, skips downloading files that already exist.
+        :param protocol: The transfer protocol to use (e.g., ftp, aspera, globus, s3, auto).
+        :param aspera_maximum_bandwidth: Maximum bandwidth for Aspera transfers of the whole batch.
+        :param checksum_check: If True, verifies the files against the checksums of their project.
+        :param categories: List of file categories to download, RAW if None.
+        :param workers: Number of connections to the same server shared by all the projects.
+        :param parallel_projects: Number of projects downloaded at the same time.
+        :param segments: Number of byte ranges of a large file downloaded in parallel.
+        :param s3_max_concurrency: Number of parts of a file downloaded at the same time from S3.
+        :param s3_chunk_size: Size of every part of a multipart S3 download in MB.
+        :param journal: Keep a transfer journal in every project folder to resume interrupted batches.
+        :return: error of every project that could not be downloaded, by accession
+        """
+        categories = categories or ["RAW"]
+        accessions = list(dict.fromkeys(accessions))  # Without duplicates, in order
+        limiter = ConnectionLimiter(workers)
+        parallel_projects = max(1, min(parallel_projects, len(accessions)))
+        # A project asks for its share of the connections when it starts, and keeps the slots it
+        # was given until it is downloaded
+        wanted = max(1, -(-workers // parallel_projects))
+        project_bandwidth = aspera_maximum_bandwidth
+        if protocol in ("aspera", "auto"):
+            project_bandwidth = Files._parse_aspera_bandwidth(aspera_maximum_bandwidth)
+            project_bandwidth = f"{max(1, project_bandwidth // parallel_projects)}K"
+        selected_protocol = {}
+        selection_lock = threading.Lock()
+        errors = {}
+
+        def get_file_list(accession):
+            project_folder = os.path.join(output_folder, accession)
+            os.makedirs(project_folder, exist_ok=True)
+            if journal:
+                return self._get_planned_file_list(
+                    accession,
+                    project_folder,
+                    categories,
+                    lambda: self.get_all_category_file_list(accession, categories),
+                )
+            return self.get_all_category_file_list(accession, categories)
+
+        def select_protocol(file_list):
+            if protocol != "auto":
+                return protocol
+            with selection_lock:
+                if "protocol" not in selected_protocol:
+                    _, ranking = Files._rank_protocols(file_list)
+                    if not ranking:
+                        raise Exception("No download protocol is available")
+                    logging.info(f"Selected protocol {ranking[0]} for the batch")
+                    selected_protocol["protocol"] = ranking[0]
+                return selected_protocol["protocol"]
+
+        def download(accession, file_list):
+            if not file_list:
+                logging.info(f"No files to download for {accession}")
+                return
+            project_protocol = select_protocol(file_list)
+            host = self.PROTOCOL_HOSTS[project_protocol]
+            # Connections opened by every file: one per segment, or one per part of an S3 file
+            # downloaded at the same time
+            unit = 1
+            if project_protocol in self.SEGMENTED_PROTOCOLS:
+                unit = segments
+            elif project_protocol == "s3":
+                unit = s3_max_concurrency
+            with limiter.slots(project_protocol, host, max(wanted, unit), unit) as connections:
+                logging.info(
+                    f"Downloading {len(file_list)} files of {accession} with {connections} connections"
+                )
+                self.download_files(
+                    file_list,
+                    accession,
+                    os.path.join(output_folder, accession),
+                    skip_if_downloaded_already,
+                    project_protocol,
+                    aspera_maximum_bandwidth=project_bandwidth,
+                    checksum_check=checksum_check,
+                    workers=max(1, connections // unit),
+                    segments=min(segments, connections),
+                    s3_max_concurrency=min(s3_max_concurrency, connections),
+                    s3_chunk_size=s3_chunk_size,
+                    journal=journal,
+                )
+            project_folder = os.path.join(output_folder, accession)
+            missing = [
+                file
+                for file in file_list
+                if not Files._is_downloaded(file, Files._get_local_path(file, project_folder))
+            ]
+            if missing:
+                raise Exception(f"{len(missing)} of {len(file_list)} files were not downloaded")
+
+        with ThreadPoolExecutor(
+            max_workers=self.METADATA_WORKERS
+        ) as metadata_executor, ThreadPoolExecutor(max_workers=parallel_projects) as executor:
+            listings = {
+                metadata_executor.submit(get_file_list, accession): accession
+                for accession in accessions
+            }
+            downloads = {}
+            for future in as_completed(listings):
+                accession = listings[future]
+                try:
+                    file_list = future.result()
+                except Exception as e:
+                    logging.error(f"Could not get the file list of {accession}: {str(e)}")
+                    errors[accession] = str(e)
+                    continue
+                downloads[executor.submit(download, accession, file_list)] = accession
+            for future in as_completed(downloads):
+                accession = downloads[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Download of {accession} failed: {str(e)}")
+                    errors[accession] = str(e)
+
+        logging.info(
+            f"{len(accessions) - len(errors)} of {len(accessions)} projects downloaded to "
+            f"{output_folder}"
         )
+        return errors
+
+    @staticmethod
+    def _get_planned_file_list(
+        accession, output_folder, categories, get_file_list, refresh: bool = False
+    ) -> List[Dict]:
+        """
+        Get the file list of a batch from the transfer journal of the output folder, so a rerun of an
+        interrupted batch does not list the project again. The list is fetched and recorded otherwise.
+        :param accession: PRIDE project accession
+        :param output_folder: folder of the transfer journal
+        :param categories: file categories of the batch
+        :param get_file_list: function returning the file list from the PRIDE API
+        :param refresh: fetch the file list again instead of using the recorded one
+        :return: file list in JSON format
+        """
+        selection = ",".join(sorted(categories))
+        with TransferJournal(output_folder) as transfer_journal:
+            file_list = None if refresh else transfer_journal.load_plan(accession, selection)
+            if file_list is not None:
+                logging.info(f"Using the file list of {accession} from {transfer_journal.path}")
+                return file_list
+            file_list = get_file_list()
+            transfer_journal.save_plan(accession, selection, file_list)
+            return file_list
 
     def get_all_category_file_list(
         self, accession: str, categories: "str | List[str]"
@@ -763,7 +2111,7 @@ class Files:
         :param categories: A single category string or list of categories to filter by.
         :return: A list of files matching the specified categories.
         """
-        record_files = self.stream_all_files_by_project(accession)
+        record_files = self.iter_all_files_by_project(accession)
         if isinstance(categories, str):
             categories = [categories]
         category_set = set(categories)
@@ -831,10 +2179,12 @@ class Files:
         px_id_or_url: str,
         output_folder: str,
         skip_if_downloaded_already: bool = True,
+        segments: int = 1,
     ) -> None:
         """
         Download all raw files referenced by a ProteomeXchange dataset.
         Prefer FTP when the URL is ftp://, otherwise use HTTP(S). Supports resume and skip.
+        Large files can be split in several byte ranges downloaded in parallel (segments).
         """
         if not os.path.isdir(output_folder):
             os.makedirs(output_folder, exist_ok=True)
@@ -847,12 +2197,16 @@ class Files:
             return
 
         ftp_urls = [u for u in urls if u.lower().startswith("ftp://")]
-        http_urls = [u for u in urls if u.lower().startswith("http://") or u.lower().startswith("https://")]
+        http_urls = [u for u in urls if u.lower().startswith(("http://", "https://"))]
 
         if ftp_urls:
-            self.download_ftp_urls(ftp_urls, output_folder, skip_if_downloaded_already)
+            self.download_ftp_urls(
+                ftp_urls, output_folder, skip_if_downloaded_already, segments=segments
+            )
         if http_urls:
-            self.download_http_urls(http_urls, output_folder, skip_if_downloaded_already)
+            self.download_http_urls(
+                http_urls, output_folder, skip_if_downloaded_already, segments=segments
+            )
 
     @staticmethod
     def _local_path_for_url(download_url: str, output_folder: str) -> str:
@@ -866,20 +2220,15 @@ class Files:
         skip_if_downloaded_already: bool,
         max_connection_retries: int = 3,
         max_download_retries: int = 3,
+        segments: int = 1,
     ) -> None:
         """
         Download a list of FTP URLs using a single connection, with retries and progress bars.
+        Large files can be split in byte ranges downloaded over parallel connections (segments).
         """
         if not os.path.isdir(output_folder):
             os.makedirs(output_folder, exist_ok=True)
 
-        def connect_ftp(host: str):
-            ftp = FTP(host, timeout=30)
-            ftp.login()
-            ftp.set_pasv(True)
-            logging.info(f"Connected to FTP host: {host}")
-            return ftp
-
         # Group URLs by host to reuse connections efficiently
         host_to_paths: Dict[str, List[str]] = {}
         for url in ftp_urls:
@@ -890,120 +2239,197 @@ class Files:
             connection_attempt = 0
             while connection_attempt < max_connection_retries:
                 try:
-                    ftp = connect_ftp(host)
+                    ftp = Files._connect_ftp(host)
                     for ftp_path in paths:
-                        try:
-                            local_path = os.path.join(output_folder, os.path.basename(ftp_path))
-                            if skip_if_downloaded_already and os.path.exists(local_path):
-                                logging.info("Skipping download as file already exists")
-                                continue
-
-                            logging.info(f"Starting FTP download: {host}/{ftp_path}")
-                            download_attempt = 0
-                            while download_attempt < max_download_retries:
-                                try:
-                                    total_size = ftp.size(ftp_path)
-                                    # Try to resume using REST if partial file exists
-                                    if os.path.exists(local_path):
-                                        current_size = os.path.getsize(local_path)
-                                        mode = "ab"
-                                    else:
-                                        current_size = 0
-                                        mode = "wb"
-
-                                    with open(local_path, mode) as f, tqdm(
-                                        total=total_size,
-                                        unit="B",
-                                        unit_scale=True,
-                                        desc=local_path,
-                                        initial=current_size,
-                                    ) as pbar:
-                                        def callback(data):
-                                            f.write(data)
-                                            pbar.update(len(data))
-
-                                        if current_size:
-                                            try:
-                                                ftp.sendcmd(f"REST {current_size}")
-                                            except Exception:
-                                                # If REST not supported, fall back to full download
-                                                current_size = 0
-                                                f.seek(0)
-                                                f.truncate()
-                                        ftp.retrbinary(f"RETR {ftp_path}", callback)
-                                    logging.info(f"Successfully downloaded {local_path}")
-                                    break
-                                except (socket.timeout, ftplib.error_temp, ftplib.error_perm) as e:
-                                    download_attempt += 1
-                                    logging.error(
-                                        f"Download failed for {local_path} (attempt {download_attempt}): {str(e)}"
-                                    )
-                                    if download_attempt >= max_download_retries:
-                                        logging.error(
-                                            f"Giving up on {local_path} after {max_download_retries} attempts."
-                                        )
-                                        break
-                        except Exception as e:
-                            logging.error(f"Unexpected error while processing FTP path {ftp_path}: {str(e)}")
-                    ftp.quit()
+                        ftp = Files._download_ftp_url(
+                            ftp,
+                            host,
+                            ftp_path,
+                            output_folder,
+                            skip_if_downloaded_already,
+                            max_download_retries,
+                            segments=segments,
+                        )
+                    if ftp is not None:
+                        ftp.quit()
                     logging.info(f"Disconnected from FTP host: {host}")
                     break
                 except (socket.timeout, ftplib.error_temp, ftplib.error_perm, socket.error) as e:
                     connection_attempt += 1
-                    logging.error(f"FTP connection failed (attempt {connection_attempt}): {str(e)}")
+                    logging.error(
+                        f"FTP connection failed (attempt {connection_attempt}): {str(e)}"
+                    )
                     if connection_attempt < max_connection_retries:
                         logging.info("Retrying connection...")
                         time.sleep(5)
                     else:
                         logging.error(
-                            f"Giving up after {max_connection_retries} failed connection attempts to {host}."
+                            f"Giving up after {max_connection_retries} failed connection attempts "
+                            f"to {host}."
+                        )
+
+    @staticmethod
+    def _download_ftp_url(
+        ftp: Optional[FTP],
+        host: str,
+        ftp_path: str,
+        output_folder: str,
+        skip_if_downloaded_already: bool,
+        max_download_retries: int = 3,
+        segments: int = 1,
+    ) -> Optional[FTP]:
+        """
+        Download a single FTP path over an open connection, retrying on transient errors like the
+        downloads of PRIDE files: a partial local file is resumed with REST, and the connection is
+        replaced after a failed transfer.
+        :param ftp: connected FTP client, None to connect first
+        :param host: FTP host
+        :param ftp_path: path of the file on the FTP server
+        :param output_folder: folder to download the file
+        :param skip_if_downloaded_already: Boolean value to skip the download if the file has already been downloaded.
+        :param max_download_retries: Number of attempts to retry the download of the file in case of failure.
+        :param segments: Number of FTP connections (byte ranges) used for a large file.
+        :return: the FTP connection, reconnected if the original one failed (None if reconnecting failed)
+        """
+        local_path = os.path.join(output_folder, os.path.basename(ftp_path))
+        if skip_if_downloaded_already and os.path.exists(local_path):
+            logging.info("Skipping download as file already exists")
+            return ftp
+
+        try:
+            logging.info(f"Starting FTP download: {host}/{ftp_path}")
+            download_attempt = 0
+            while download_attempt < max_download_retries:
+                try:
+                    if ftp is None:
+                        ftp = Files._connect_ftp(host)
+                    total_size = Files._get_ftp_file_size(ftp, ftp_path)
+                    if (segments > 1 or SegmentState.exists(local_path)) and (
+                        Files._download_ftp_segmented(
+                            host, ftp_path, local_path, total_size, segments
+                        )
+                    ):
+                        logging.info(f"Successfully downloaded {local_path}")
+                        break
+                    # Resume using REST if a partial file exists
+                    Files._retrieve_ftp_file(ftp, ftp_path, local_path, total_size)
+                    logging.info(f"Successfully downloaded {local_path}")
+                    break
+                except Files.FTP_TRANSFER_ERRORS as e:
+                    download_attempt += 1
+                    logging.error(
+                        f"Download failed for {local_path} (attempt {download_attempt}): {str(e)}"
+                    )
+                    # The control connection is in an unknown state after a failed transfer
+                    if ftp is not None:
+                        ftp.close()
+                        ftp = None
+                    if download_attempt >= max_download_retries:
+                        logging.error(
+                            f"Giving up on {local_path} after {max_download_retries} attempts."
                         )
+        except Exception as e:
+            logging.error(f"Unexpected error while processing FTP path {ftp_path}: {str(e)}")
+        return ftp
 
     @staticmethod
     def download_http_urls(
         http_urls: List[str],
         output_folder: str,
         skip_if_downloaded_already: bool,
+        segments: int = 1,
+        workers: int = 1,
     ) -> None:
         """
-        Download a list of HTTP(S) URLs with resume support and progress bars.
+        Download a list of HTTP(S) URLs with the HTTP download engine, with resume support and progress bars.
+        Large files can be split in several byte ranges downloaded in parallel (segments).
+        :param workers: Number of URLs downloaded at the same time.
         """
         if not os.path.isdir(output_folder):
             os.makedirs(output_folder, exist_ok=True)
 
-        session = Util.create_session_with_retries()
+        transfers = []
         for url in http_urls:
-            try:
-                local_path = Files._local_path_for_url(url, output_folder)
-                if skip_if_downloaded_already and os.path.exists(local_path):
-                    logging.info("Skipping download as file already exists")
-                    continue
+            local_path = Files._local_path_for_url(url, output_folder)
+            if skip_if_downloaded_already and os.path.exists(local_path):
+                logging.info("Skipping download as file already exists")
+                continue
+            transfers.append(HttpTransfer(url, local_path))
 
-                if os.path.exists(local_path):
-                    resume_size = os.path.getsize(local_path)
-                    headers = {"Range": f"bytes={resume_size}-"}
-                    mode = "ab"
-                else:
-                    resume_size = 0
-                    headers = {}
-                    mode = "wb"
-
-                with session.get(url, stream=True, headers=headers, timeout=(10, 60)) as r:
-                    r.raise_for_status()
-                    total_size = int(r.headers.get("content-length", 0)) + resume_size
-                    block_size = 1024 * 1024
-                    with tqdm(
-                        total=total_size,
-                        unit="B",
-                        unit_scale=True,
-                        desc=local_path,
-                        initial=resume_size,
-                    ) as pbar:
-                        with open(local_path, mode) as f:
-                            for chunk in r.iter_content(chunk_size=block_size):
-                                if chunk:
-                                    f.write(chunk)
-                                    pbar.update(len(chunk))
-                logging.info(f"Successfully downloaded {local_path}")
-            except Exception as e:
-                logging.error(f"HTTP download failed for {url}: {str(e)}")
+        HttpDownloadEngine(max_concurrency=workers, segments=segments).run(transfers)
+        for transfer in transfers:
+            if transfer.error is not None:
+                logging.error(f"HTTP download failed for {transfer.url}: {str(transfer.error)}")
+            else:
+                logging.info(f"Successfully downloaded {transfer.local_path}")
+
+    @staticmethod
+    def _download_http_file(
+        url: str,
+        local_path: str,
+        headers: Dict[str, str] = None,
+        segments: int = 1,
+        total_size: int = None,
+        checksum: StreamingChecksum = None,
+    ) -> None:
+        """
+        Download a URL into local_path with the HTTP download engine, in parallel byte ranges when
+        segments is greater than one and the server supports range requests, otherwise over a single
+        resumable stream.
+        :param url: URL of the file
+        :param local_path: output file path
+        :param headers: HTTP headers
+        :param segments: Number of byte ranges downloaded in parallel.
+        :param total_size: size of the file if known (e.g. fileSizeBytes from the API)
+        :param checksum: hash updated with the bytes of the file
+        """
+        transfer = HttpTransfer(
+            url, local_path, total_size=total_size, headers=headers, checksum=checksum
+        )
+        HttpDownloadEngine(max_concurrency=1, segments=segments).run([transfer])
+        if transfer.error is not None:
+            raise transfer.error
+
+    @staticmethod
+    def _download_segments(state: SegmentState, download_range, pbar: tqdm = None) -> None:
+        """
+        Download the pending segments of a segmented download in parallel, one thread per segment.
+        :param state: SegmentState of the output file
+        :param download_range: function (index, offset, end, pbar) downloading one byte range
+        :param pbar: shared progress bar of a batch; a progress bar for the file is used if None.
+        """
+        pending = state.pending()
+        logging.info(f"Downloading {state.file_path} in {len(pending)} segments")
+
+        if pbar is None:
+            progress = tqdm(
+                total=state.total_size,
+                unit="B",
+                unit_scale=True,
+                desc=state.file_path,
+                initial=state.done_bytes(),
+            )
+        else:
+            pbar.update(state.done_bytes())
+            progress = nullcontext(pbar)
+
+        with progress as segments_pbar:
+            with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+                futures = [
+                    executor.submit(download_range, index, offset, end, segments_pbar)
+                    for index, offset, end in pending
+                ]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.error(f"Segment of {state.file_path} failed: {str(e)}")
+
+        state.save()
+        if not state.is_complete():
+            if pbar is not None:
+                pbar.update(-state.done_bytes())  # The next attempt counts the saved bytes again
+            raise IncompleteDownloadError(
+                f"Segmented download of {state.file_path} is incomplete, run it again to resume"
+            )
+        state.finish()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+import asyncio
+import logging
+import os
+import re
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+import httpx
+from tqdm import tqdm
+
+from pridepy.files.checksum import StreamingChecksum
+from pridepy.files.segments import IncompleteDownloadError, SegmentState
+from pridepy.files.writer import BufferedFileWriter
+
+
+class HttpTransfer:
+    """
+    A file downloaded by the HttpDownloadEngine. The error of a failed download is kept in error.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        local_path: str,
+        total_size: int = None,
+        headers: Dict[str, str] = None,
+        checksum: StreamingChecksum = None,
+    ):
+        """
+        :param url: URL of the file
+        :param local_path: output file path
+        :param total_size: size of the file if known (e.g. fileSizeBytes from the API)
+        :param headers: HTTP headers of the requests of this file
+        :param checksum: hash updated with the bytes of the file
+        """
+        self.url = url
+        self.local_path = local_path
+        self.total_size = total_size
+        self.headers = dict(headers or {})
+        self.checksum = checksum
+        self.error: Optional[BaseException] = None
+
+
+class HttpDownloadEngine:
+    """
+    Download HTTP(S) files from a single event loop. At most max_concurrency files are downloaded at
+    the same time over one shared httpx connection pool, large files can be split in byte ranges
+    downloaded in parallel, and the chunks are written from worker threads so disk I/O does not
+    block the event loop. Partial files are resumed with range requests.
+    """
+
+    BLOCK_SIZE = 1024 * 1024  # 1 MB chunks
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        segments: int = 1,
+        max_download_retries: int = 3,
+        timeout: float = 60.0,
+    ):
+        """
+        :param max_concurrency: Number of files downloaded at the same time.
+        :param segments: Number of byte ranges of a large file downloaded in parallel.
+        :param max_download_retries: Number of attempts to download a file or a byte range.
+        :param timeout: Read timeout of the requests in seconds.
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.segments = max(1, segments)
+        self.max_download_retries = max_download_retries
+        self.timeout = timeout
+
+    def run(self, transfers: List[HttpTransfer]) -> List[HttpTransfer]:
+        """
+        Download the transfers from a new event loop.
+        :return: the transfers, with the error of every failed download
+        """
+        return asyncio.run(self.download_all(transfers))
+
+    async def download_all(self, transfers: List[HttpTransfer]) -> List[HttpTransfer]:
+        """
+        Download the transfers concurrently, with one progress bar for the batch if there are several.
+        :return: the transfers, with the error of every failed download
+        """
+        if not transfers:
+            return transfers
+
+        connections = min(len(transfers), self.max_concurrency) * self.segments
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        timeout = httpx.Timeout(self.timeout, connect=10.0)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if len(transfers) > 1:
+            sizes = [transfer.total_size for transfer in transfers]
+            progress = tqdm(
+                total=sum(sizes) if all(sizes) else None,
+                unit="B",
+                unit_scale=True,
+                desc=f"Downloading {len(transfers)} files",
+            )
+        else:
+            progress = nullcontext()
+
+        async with httpx.AsyncClient(
+            limits=limits, timeout=timeout, follow_redirects=True
+        ) as client:
+            with progress as pbar:
+                await asyncio.gather(
+                    *(self._download(client, semaphore, transfer, pbar) for transfer in transfers)
+                )
+        return transfers
+
+    async def _download(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        transfer: HttpTransfer,
+        pbar: tqdm = None,
+    ) -> None:
+        async with semaphore:
+            try:
+                local_path = transfer.local_path
+                if self.segments > 1 or SegmentState.exists(local_path):
+                    if await self._download_segmented(client, transfer, pbar):
+                        if transfer.checksum is not None:
+                            # Segments are written out of order, the file is hashed once complete
+                            await asyncio.to_thread(transfer.checksum.update_from_file, local_path)
+                        return
+                    if SegmentState.exists(local_path):
+                        # The preallocated file can not be resumed as a single stream
+                        os.remove(local_path)
+                        SegmentState(local_path, 0, []).finish()
+                await self._download_stream(client, transfer, pbar)
+            except Exception as e:
+                transfer.error = e
+
+    def _is_retryable(self, error: httpx.HTTPError) -> bool:
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in self.RETRY_STATUS_CODES
+        return isinstance(error, httpx.TransportError)
+
+    async def _download_stream(
+        self, client: httpx.AsyncClient, transfer: HttpTransfer, pbar: tqdm = None
+    ) -> None:
+        """
+        Download a file over one connection, retrying on transient errors. Every attempt resumes
+        from the last byte on disk.
+        """
+        for attempt in range(1, self.max_download_retries + 1):
+            try:
+                await self._stream_to_file(client, transfer, pbar)
+                return
+            except httpx.HTTPError as e:
+                if not self._is_retryable(e) or attempt >= self.max_download_retries:
+                    raise
+                logging.warning(
+                    f"Download of {transfer.local_path} failed (attempt {attempt}): {str(e)}"
+                )
+                await asyncio.sleep(2**attempt)
+
+    async def _stream_to_file(
+        self, client: httpx.AsyncClient, transfer: HttpTransfer, pbar: tqdm = None
+    ) -> None:
+        local_path = transfer.local_path
+        checksum = transfer.checksum
+        headers = dict(transfer.headers)
+        resume_size = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+        if resume_size:
+            headers["Range"] = f"bytes={resume_size}-"
+
+        async with client.stream("GET", transfer.url, headers=headers) as r:
+            if resume_size and r.status_code == 416:
+                logging.info(f"{local_path} is already complete")
+                if checksum is not None:
+                    await asyncio.to_thread(checksum.update_from_file, local_path)
+                if pbar is not None:
+                    pbar.update(resume_size)
+                return
+            r.raise_for_status()
+            if resume_size and r.status_code != 206:
+                # The server ignored the Range header and sends the whole file
+                resume_size = 0
+            if checksum is not None:
+                # Only the part received by an earlier run is read from disk
+                await asyncio.to_thread(checksum.update_from_file, local_path, resume_size)
+            total_size = int(r.headers.get("content-length", 0)) + resume_size
+
+            if pbar is None:
+                progress = tqdm(
+                    total=total_size,
+                    unit="B",
+                    unit_scale=True,
+                    desc=local_path,
+                    initial=resume_size,
+                )
+            else:
+                pbar.update(resume_size)
+                progress = nullcontext(pbar)
+
+            received = 0
+            # Chunks are written and hashed by a writer thread while the next ones are received
+            f = await asyncio.to_thread(
+                BufferedFileWriter, local_path, "ab" if resume_size else "wb", checksum=checksum
+            )
+            try:
+                with progress as file_pbar:
+                    async for chunk in r.aiter_bytes(self.BLOCK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+                        received += len(chunk)
+                        file_pbar.update(len(chunk))
+            except BaseException:
+                if pbar is not None:
+                    # The next attempt counts the bytes on disk again
+                    pbar.update(-(resume_size + received))
+                raise
+            finally:
+                await asyncio.to_thread(f.close)
+
+    async def _get_range_size(
+        self, client: httpx.AsyncClient, transfer: HttpTransfer
+    ) -> Optional[int]:
+        """
+        Ask for the first byte of a file to check that the server supports range requests.
+        :return: size of the file, or None if range requests are not supported
+        """
+        headers = dict(transfer.headers, Range="bytes=0-0")
+        async with client.stream("GET", transfer.url, headers=headers) as r:
+            if r.status_code != 206:
+                return None
+            match = re.match(r"bytes\s+0-0/(\d+)", r.headers.get("Content-Range", ""))
+            return int(match.group(1)) if match else None
+
+    async def _download_segmented(
+        self, client: httpx.AsyncClient, transfer: HttpTransfer, pbar: tqdm = None
+    ) -> bool:
+        """
+        Download a file as several byte ranges fetched in parallel. Every range is written at its
+        offset of the preallocated output file, and the progress of each range is saved so that a
+        new attempt only fetches the unfinished ranges.
+        :return: False if the file was not downloaded because it is too small to be split or the
+        server does not support range requests.
+        """
+        local_path = transfer.local_path
+        resuming = SegmentState.exists(local_path)
+        min_size = 2 * SegmentState.MIN_SEGMENT_SIZE
+        if not resuming and transfer.total_size and transfer.total_size < min_size:
+            return False
+
+        total_size = await self._get_range_size(client, transfer)
+        if total_size is None:
+            logging.info(
+                f"Server does not support range requests, downloading {transfer.url} as a whole"
+            )
+            return False
+        if not resuming and total_size < min_size:
+            return False
+
+        state = await asyncio.to_thread(
+            SegmentState.load_or_create, local_path, total_size, self.segments
+        )
+        pending = state.pending()
+        logging.info(f"Downloading {local_path} in {len(pending)} segments")
+
+        if pbar is None:
+            progress = tqdm(
+                total=state.total_size,
+                unit="B",
+                unit_scale=True,
+                desc=local_path,
+                initial=state.done_bytes(),
+            )
+        else:
+            pbar.update(state.done_bytes())
+            progress = nullcontext(pbar)
+
+        with progress as segments_pbar:
+            results = await asyncio.gather(
+                *(
+                    self._download_range(
+                        client, transfer, state, index, offset, end, segments_pbar
+                    )
+                    for index, offset, end in pending
+                ),
+                return_exceptions=True,
+            )
+        for result in results:
+            if isinstance(result, Exception):
+                logging.error(f"Segment of {local_path} failed: {str(result)}")
+
+        state.save()
+        if not state.is_complete():
+            if pbar is not None:
+                pbar.update(-state.done_bytes())  # The next attempt counts the saved bytes again
+            raise IncompleteDownloadError(
+                f"Segmented download of {local_path} is incomplete, run it again to resume"
+            )
+        state.finish()
+        return True
+
+    async def _download_range(
+        self,
+        client: httpx.AsyncClient,
+        transfer: HttpTransfer,
+        state: SegmentState,
+        index: int,
+        offset: int,
+        end: int,
+        pbar: tqdm,
+    ) -> None:
+        """
+        Download the byte range [offset, end] of a file into the segment index of a segmented download.
+        """
+        for attempt in range(1, self.max_download_retries + 1):
+            try:
+                headers = dict(transfer.headers, Range=f"bytes={offset}-{end}")
+                async with client.stream("GET", transfer.url, headers=headers) as r:
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        raise Exception(
+                            f"Server did not honour the range request ({r.status_code})"
+                        )
+                    f = await asyncio.to_thread(
+                        BufferedFileWriter,
+                        state.file_path,
+                        "r+b",
+                        offset=offset,
+                        on_write=lambda written: state.advance(index, written),
+                    )
+                    try:
+                        async for chunk in r.aiter_bytes(self.BLOCK_SIZE):
+                            chunk = chunk[: end - offset + 1]
+                            if chunk:
+                                await asyncio.to_thread(f.write, chunk)
+                                offset += len(chunk)
+                                pbar.update(len(chunk))
+                            if offset > end:
+                                break
+                    finally:
+                        await asyncio.to_thread(f.close)
+                if offset > end:
+                    return
+                logging.warning(
+                    f"Segment {index} of {state.file_path} ended early (attempt {attempt})"
+                )
+            except httpx.HTTPError as e:
+                logging.warning(
+                    f"Segment {index} of {state.file_path} failed (attempt {attempt}): {str(e)}"
+                )
+            await asyncio.sleep(2**attempt)
+        raise Exception(
+            f"Giving up on segment {index} of {state.file_path} after {self.max_download_retries} attempts"
+        )
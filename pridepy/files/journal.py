@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from pridepy.files.segments import SegmentState
+
+
+class TransferJournal:
+    """
+    SQLite journal of the downloads of an output folder. For every file it records the planned size,
+    the bytes on disk, the protocol, the checksum state and the number of attempts, and it keeps the
+    file list of every planned batch. A rerun of an interrupted batch uses it to download only the
+    pending and partial files, without listing the project again.
+    """
+
+    JOURNAL_NAME = ".pridepy-journal.sqlite"
+    SCHEMA_VERSION = 2  # Files are keyed by project accession and file name since version 2
+
+    PENDING = "pending"
+    PARTIAL = "partial"
+    DONE = "done"
+
+    def __init__(self, output_folder: str):
+        if not os.path.isdir(output_folder):
+            os.makedirs(output_folder, exist_ok=True)
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, self.JOURNAL_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+                # The rows of an older journal are rebuilt from the files on disk
+                self._conn.execute("DROP TABLE IF EXISTS files")
+                self._conn.execute("DROP TABLE IF EXISTS plans")
+                self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    accession TEXT,
+                    file_name TEXT,
+                    planned_size INTEGER,
+                    bytes_done INTEGER DEFAULT 0,
+                    protocol TEXT,
+                    checksum TEXT,
+                    checksum_state TEXT DEFAULT 'unverified',
+                    attempts INTEGER DEFAULT 0,
+                    status TEXT DEFAULT 'pending',
+                    record TEXT,
+                    updated_at REAL,
+                    PRIMARY KEY (accession, file_name)
+                )
+                """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS plans (
+                    accession TEXT,
+                    selection TEXT,
+                    file_names TEXT,
+                    created_at REAL,
+                    PRIMARY KEY (accession, selection)
+                )
+                """)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def local_path(self, file_name: str) -> str:
+        return os.path.join(self.output_folder, file_name)
+
+    def save_plan(self, accession: str, selection: str, file_list: List[Dict]):
+        """
+        Record the file list of a batch, so a rerun with the same selection does not list the project.
+        :param accession: PRIDE project accession
+        :param selection: key of the files selected in the project (e.g. the categories)
+        :param file_list: file records in JSON format
+        """
+        self.add_files(accession, file_list)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?)",
+                (
+                    accession,
+                    selection,
+                    json.dumps([file["fileName"] for file in file_list]),
+                    time.time(),
+                ),
+            )
+
+    def load_plan(self, accession: str, selection: str) -> Optional[List[Dict]]:
+        """
+        :return: the file records of a recorded batch, or None if the batch was never planned
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_names FROM plans WHERE accession = ? AND selection = ?",
+                (accession, selection),
+            ).fetchone()
+            if row is None:
+                return None
+            records = dict(
+                self._conn.execute(
+                    "SELECT file_name, record FROM files WHERE accession = ?", (accession,)
+                )
+            )
+        file_names = json.loads(row[0])
+        if any(records.get(file_name) is None for file_name in file_names):
+            return None
+        return [json.loads(records[file_name]) for file_name in file_names]
+
+    def add_files(self, accession: str, file_list: List[Dict], protocol: str = None):
+        """
+        Add file records to the journal, keeping the progress already recorded for known files.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            for file in file_list:
+                self._conn.execute(
+                    """
+                    INSERT INTO files
+                        (accession, file_name, planned_size, protocol, checksum, record, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(accession, file_name) DO UPDATE SET
+                        planned_size = excluded.planned_size,
+                        protocol = COALESCE(excluded.protocol, files.protocol),
+                        checksum = COALESCE(excluded.checksum, files.checksum),
+                        record = excluded.record,
+                        updated_at = excluded.updated_at
+                    """,
+                    (
+                        accession,
+                        file["fileName"],
+                        file.get("fileSizeBytes"),
+                        protocol,
+                        file.get("checksum"),
+                        json.dumps(file),
+                        now,
+                    ),
+                )
+
+    def refresh(self, accession: str, file_list: List[Dict]):
+        """
+        Update bytes done and status of the given files of a project from the files on disk. A file
+        is done when its size is the planned size and it is not an unfinished segmented download.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            for file in file_list:
+                file_name = file["fileName"]
+                local_path = self.local_path(file_name)
+                planned_size = file.get("fileSizeBytes")
+                if os.path.exists(local_path):
+                    if SegmentState.exists(local_path):
+                        bytes_done, status = 0, self.PARTIAL
+                    else:
+                        bytes_done = os.path.getsize(local_path)
+                        if planned_size is None or bytes_done == planned_size:
+                            status = self.DONE
+                        else:
+                            status = self.PARTIAL
+                else:
+                    bytes_done, status = 0, self.PENDING
+                self._conn.execute(
+                    "UPDATE files SET bytes_done = ?, status = ?, updated_at = ? "
+                    "WHERE accession = ? AND file_name = ?",
+                    (bytes_done, status, now, accession, file_name),
+                )
+
+    def pending_files(self, accession: str, file_list: List[Dict]) -> List[Dict]:
+        """
+        :return: the files of file_list of a project that are not done according to the journal
+        """
+        with self._lock:
+            done = {
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT file_name FROM files WHERE accession = ? AND status = ?",
+                    (accession, self.DONE),
+                )
+            }
+        return [file for file in file_list if file["fileName"] not in done]
+
+    def record_attempt(self, accession: str, file_list: List[Dict], protocol: str):
+        """Count a new download attempt of the given files of a project with a protocol."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE files SET attempts = attempts + 1, protocol = ?, updated_at = ? "
+                "WHERE accession = ? AND file_name = ?",
+                [(protocol, now, accession, file["fileName"]) for file in file_list],
+            )
+
+    def set_checksum_state(
+        self, accession: str, file_name: str, checksum_state: str, checksum: str = None
+    ):
+        """Record the result of the checksum verification of a file of a project."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE files SET checksum_state = ?, checksum = COALESCE(?, checksum), "
+                "updated_at = ? WHERE accession = ? AND file_name = ?",
+                (checksum_state, checksum, time.time(), accession, file_name),
+            )
+
+    def summary(self, accession: str, file_list: List[Dict]) -> Dict[str, int]:
+        """
+        :return: number of files of file_list of a project per status
+        """
+        names = {file["fileName"] for file in file_list}
+        counts = {self.PENDING: 0, self.PARTIAL: 0, self.DONE: 0}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_name, status FROM files WHERE accession = ?", (accession,)
+            )
+            for file_name, status in rows:
+                if file_name in names:
+                    counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def log_summary(self, accession: str, file_list: List[Dict]):
+        counts = self.summary(accession, file_list)
+        logging.info(
+            "Journal {}: {} done, {} partial, {} pending".format(
+                self.path, counts[self.DONE], counts[self.PARTIAL], counts[self.PENDING]
+            )
+        )
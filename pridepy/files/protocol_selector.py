@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+import json
+import logging
+import os
+import socket
+import time
+from typing import Callable, Dict, List, Optional
+
+from pridepy.util.api_handling import Util
+
+
+class ProtocolSelector:
+    """
+    Rank the download protocols by the throughput measured on a short probe, and remember the
+    result per host and network in a cache file so that the next batches do not probe again.
+    The throughput of the chosen protocol is followed during a batch, and a protocol that degrades
+    is demoted in favour of the next fastest one.
+    """
+
+    CACHE_TTL = 7 * 24 * 3600  # Seconds a measured ranking is reused
+    DEGRADED_RATIO = 0.5  # A protocol below this fraction of its probed speed is degraded
+
+    def __init__(self, network: str, cache_path: str = None):
+        """
+        :param network: key of the host and network the throughput is measured from
+        :param cache_path: path of the cache file
+        """
+        self.network = network
+        self.cache_path = cache_path or self.default_cache_path()
+        self.speeds: Dict[str, float] = {}
+        self._demoted = set()
+
+    @staticmethod
+    def default_cache_path() -> str:
+        return os.path.join(Util.get_cache_dir(), "protocols.json")
+
+    @staticmethod
+    def network_key(host: str) -> str:
+        """
+        Identify the host and network a transfer runs from: the host name and the local address
+        used to reach host. No packet is sent.
+        """
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect((host, 21))
+                local_address = s.getsockname()[0]
+        except OSError:
+            local_address = "unknown"
+        return f"{socket.gethostname()}/{local_address}"
+
+    def _read_cache(self) -> Dict:
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self) -> Dict[str, float]:
+        """
+        :return: the throughput per protocol measured from this network and not expired
+        """
+        entry = self._read_cache().get(self.network)
+        if not isinstance(entry, dict):
+            return {}
+        now = time.time()
+        return {
+            protocol: measure["speed"]
+            for protocol, measure in entry.items()
+            if isinstance(measure, dict)
+            and now - measure.get("measured_at", 0) <= self.CACHE_TTL
+            and "speed" in measure
+        }
+
+    def save(self, speeds: Dict[str, float]):
+        """
+        Save the throughput just measured for some protocols, keeping the other protocols of the
+        network with the time they were measured at.
+        """
+        cache = self._read_cache()
+        entry = cache.get(self.network)
+        if not isinstance(entry, dict):
+            entry = {}
+        measured_at = time.time()
+        entry.update(
+            {
+                protocol: {"speed": speed, "measured_at": measured_at}
+                for protocol, speed in speeds.items()
+            }
+        )
+        cache[self.network] = entry
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logging.warning(f"Could not save the protocol cache {self.cache_path}: {str(e)}")
+
+    def select(self, probes: Dict[str, Callable[[], float]]) -> List[str]:
+        """
+        Rank the available protocols, from the cache or by running their probes. Only successful
+        probes are cached: a protocol whose probe failed is left out of this batch and probed
+        again by the next one.
+        :param probes: function returning the measured throughput in bytes/s, per available protocol
+        :return: protocols from the fastest to the slowest, without the failed ones
+        """
+        cached = self.load()
+        self.speeds = {protocol: cached[protocol] for protocol in probes if protocol in cached}
+        if self.speeds:
+            logging.info(
+                f"Using the throughput of {', '.join(self.speeds)} measured from {self.network}"
+            )
+
+        measured = {}
+        for protocol, probe in probes.items():
+            if protocol in self.speeds:
+                continue
+            try:
+                measured[protocol] = probe()
+                logging.info(f"Probe {protocol}: {measured[protocol] / 1e6:.2f} MB/s")
+            except Exception as e:
+                logging.info(f"Probe {protocol} failed: {str(e)}")
+                self.speeds[protocol] = 0.0
+        self.speeds.update(measured)
+        if measured:
+            self.save(measured)
+        return self.ranking()
+
+    def ranking(self) -> List[str]:
+        """
+        :return: protocols that are not demoted, from the fastest to the slowest
+        """
+        return [
+            protocol
+            for protocol, speed in sorted(self.speeds.items(), key=lambda item: -item[1])
+            if speed > 0 and protocol not in self._demoted
+        ]
+
+    def is_degraded(self, protocol: str, speed: float) -> bool:
+        return speed < self.DEGRADED_RATIO * self.speeds.get(protocol, 0.0)
+
+    def fallback(self, protocol: str, speed: float) -> Optional[str]:
+        """
+        Demote a protocol that failed or degraded for the rest of the batch, recording the
+        throughput it reached. The demotion is not saved, the next batches start from the cache.
+        :return: the fastest protocol left, or None if every protocol was demoted
+        """
+        # A protocol that failed keeps half its speed, so a transient failure does not exclude it
+        self.speeds[protocol] = speed if speed > 0 else self.speeds.get(protocol, 0.0) / 2
+        self._demoted.add(protocol)
+        ranking = self.ranking()
+        return ranking[0] if ranking else None
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+
+class ConnectionLimiter:
+    """
+    Connection budget shared by the batches of a multi-project download. Every (protocol, host)
+    has max_connections slots; a batch takes as many slots as are free, up to what it asks for,
+    and downloads with that many connections. Slots are taken in units, e.g. the number of segments
+    of a file when every file opens several connections. A batch waits while less than a unit is
+    free, so concurrent batches never open more than max_connections connections to the same server.
+    """
+
+    def __init__(self, max_connections: int):
+        """
+        :param max_connections: Number of connections to the same protocol and host
+        """
+        self.max_connections = max(1, max_connections)
+        self._in_use: Dict[Tuple[str, str], int] = {}
+        self._condition = threading.Condition()
+
+    def acquire(self, protocol: str, host: str, wanted: int, unit: int = 1) -> int:
+        """
+        Take slots of a host, waiting until at least one unit is free.
+        :param protocol: transfer protocol
+        :param host: server of the protocol
+        :param wanted: number of slots the batch can use
+        :param unit: number of connections of every transfer, up to max_connections
+        :return: number of slots taken, a multiple of unit between unit and max(unit, wanted)
+        """
+        key = (protocol, host)
+        unit = max(1, min(unit, self.max_connections))
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.max_connections - self._in_use.get(key, 0) >= unit
+            )
+            free = self.max_connections - self._in_use.get(key, 0)
+            granted = max(unit, min(wanted, free) // unit * unit)
+            self._in_use[key] = self._in_use.get(key, 0) + granted
+            return granted
+
+    def release(self, protocol: str, host: str, slots: int):
+        key = (protocol, host)
+        with self._condition:
+            self._in_use[key] -= slots
+            self._condition.notify_all()
+
+    @contextmanager
+    def slots(self, protocol: str, host: str, wanted: int, unit: int = 1) -> Iterator[int]:
+        """
+        Hold slots of a host while a batch is downloaded.
+        :return: number of slots taken
+        """
+        granted = self.acquire(protocol, host, wanted, unit)
+        try:
+            yield granted
+        finally:
+            self.release(protocol, host, granted)
+
+    def in_use(self, protocol: str, host: str) -> int:
+        with self._condition:
+            return self._in_use.get((protocol, host), 0)
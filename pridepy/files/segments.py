@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+import json
+import logging
+import os
+import threading
+from typing import List, Tuple
+
+from pridepy.files.writer import preallocate
+
+
+class IncompleteDownloadError(Exception):
+    """
+    Raised when a segmented download ends with unfinished segments. Its state is kept, so the next
+    attempt only downloads the missing byte ranges.
+    """
+
+
+class SegmentState:
+    """
+    Byte ranges of a file that is downloaded in several segments at once. The progress of every
+    segment is saved next to the output file (<file>.segments), so an interrupted download only
+    fetches the unfinished ranges again.
+    """
+
+    STATE_SUFFIX = ".segments"
+    MIN_SEGMENT_SIZE = 32 * 1024 * 1024  # Smaller segments are not worth a new connection
+    SAVE_INTERVAL = 16 * 1024 * 1024  # Bytes received by a segment between two state saves
+
+    def __init__(self, file_path: str, total_size: int, ranges: List[List[int]]):
+        """
+        :param file_path: path of the output file
+        :param total_size: size of the complete file in bytes
+        :param ranges: list of [start, end, done] per segment, end is inclusive
+        """
+        self.file_path = file_path
+        self.total_size = total_size
+        self.ranges = ranges
+        self._unsaved = [0] * len(ranges)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def state_path(file_path: str) -> str:
+        return file_path + SegmentState.STATE_SUFFIX
+
+    @staticmethod
+    def exists(file_path: str) -> bool:
+        """Return True if a segmented download of file_path was started and not finished."""
+        return os.path.exists(SegmentState.state_path(file_path))
+
+    @staticmethod
+    def split(
+        total_size: int, segments: int, min_segment_size: int = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Split a file into contiguous byte ranges.
+        :param total_size: size of the file in bytes
+        :param segments: maximum number of segments
+        :param min_segment_size: minimum size of a segment in bytes
+        :return: list of (start, end) tuples, end is inclusive
+        """
+        if min_segment_size is None:
+            min_segment_size = SegmentState.MIN_SEGMENT_SIZE
+        segments = max(1, min(segments, total_size // max(min_segment_size, 1)))
+        segment_size = total_size // segments
+        ranges = []
+        for index in range(segments):
+            start = index * segment_size
+            end = total_size - 1 if index == segments - 1 else start + segment_size - 1
+            ranges.append((start, end))
+        return ranges
+
+    @classmethod
+    def load_or_create(
+        cls, file_path: str, total_size: int, segments: int, min_segment_size: int = None
+    ) -> "SegmentState":
+        """
+        Load the saved state of a segmented download, or plan a new one and preallocate the output
+        file. A saved state is only reused if it was planned for the same file size.
+        :param file_path: path of the output file
+        :param total_size: size of the complete file in bytes
+        :param segments: number of segments of a new plan
+        :param min_segment_size: minimum size of a segment in bytes
+        :return: SegmentState
+        """
+        state_path = cls.state_path(file_path)
+        if os.path.exists(state_path) and os.path.exists(file_path):
+            try:
+                with open(state_path) as state_file:
+                    saved = json.load(state_file)
+                if saved["total_size"] == total_size:
+                    logging.info(f"Resuming segmented download of {file_path}")
+                    return cls(file_path, total_size, saved["ranges"])
+            except (ValueError, KeyError, OSError) as e:
+                logging.debug(f"Ignoring unreadable segment state {state_path}: {e}")
+
+        ranges = [
+            [start, end, 0] for start, end in cls.split(total_size, segments, min_segment_size)
+        ]
+        state = cls(file_path, total_size, ranges)
+        state.preallocate()
+        state.save()
+        return state
+
+    def preallocate(self):
+        """Create the output file with its final size, so every segment can write at its offset."""
+        preallocate(self.file_path, self.total_size)
+
+    def pending(self) -> List[Tuple[int, int, int]]:
+        """
+        :return: list of (index, next offset, end) for every unfinished segment
+        """
+        return [
+            (index, start + done, end)
+            for index, (start, end, done) in enumerate(self.ranges)
+            if start + done <= end
+        ]
+
+    def advance(self, index: int, received: int):
+        """
+        Record bytes written by a segment; the state is saved every SAVE_INTERVAL bytes.
+        :param index: segment index
+        :param received: number of bytes written at the current offset of the segment
+        """
+        with self._lock:
+            self.ranges[index][2] += received
+            self._unsaved[index] += received
+            if self._unsaved[index] >= self.SAVE_INTERVAL:
+                self._unsaved[index] = 0
+                self._save()
+
+    def done_bytes(self) -> int:
+        return sum(done for _, _, done in self.ranges)
+
+    def is_complete(self) -> bool:
+        return not self.pending()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        state_path = self.state_path(self.file_path)
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w") as state_file:
+            json.dump({"total_size": self.total_size, "ranges": self.ranges}, state_file)
+        os.replace(tmp_path, state_path)
+
+    def finish(self):
+        """Remove the saved state once every segment is complete."""
+        try:
+            os.remove(self.state_path(self.file_path))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+import logging
+import os
+import queue
+import threading
+from typing import Callable, Optional
+
+from pridepy.files.checksum import StreamingChecksum
+
+
+def preallocate(file_path: str, size: int):
+    """
+    Create a file with its final size. The blocks are reserved with posix_fallocate where the
+    platform and the file system support it, so the segments of a download written at their offsets
+    do not fragment the file; the file is left sparse otherwise.
+    :param file_path: path of the file
+    :param size: size of the file in bytes
+    """
+    with open(file_path, "wb") as f:
+        f.truncate(size)
+        if size > 0 and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+            except OSError as e:
+                logging.debug(f"Could not preallocate {file_path}: {e}")
+
+
+class BufferedFileWriter:
+    """
+    Write-behind writer of a downloaded file. The receive loop hands its chunks to write(), which
+    only copies them into a buffer; full buffers are written by a background thread in large
+    sequential writes. Disk writes therefore overlap with the network, and a slow file system only
+    slows down the download once max_buffers buffers are waiting to be written.
+
+    The checksum and the on_write callback are updated by the writer thread after every write, so
+    they only count bytes that are on disk. The fsync policy is one of none (default), close (once
+    the file is complete) or always (after every write), PRIDEPY_FSYNC if not given.
+    """
+
+    BUFFER_SIZE = 4 * 1024 * 1024  # Bytes coalesced into one write
+    MAX_BUFFERS = 4  # Full buffers waiting to be written before write() blocks
+    FSYNC_POLICIES = ("none", "close", "always")
+
+    def __init__(
+        self,
+        file_path: str,
+        mode: str = "wb",
+        offset: int = None,
+        checksum: StreamingChecksum = None,
+        on_write: Callable[[int], None] = None,
+        fsync: str = None,
+        buffer_size: int = None,
+        max_buffers: int = None,
+    ):
+        """
+        :param file_path: path of the output file
+        :param mode: wb for a new file, ab to resume one, r+b to write a segment of a preallocated one
+        :param offset: position of the first write, the current position of the file if None
+        :param checksum: hash updated with the bytes written
+        :param on_write: function called with the number of bytes of every write
+        :param fsync: fsync policy (none, close or always), PRIDEPY_FSYNC or none if None
+        :param buffer_size: Bytes coalesced into one write
+        :param max_buffers: Full buffers waiting to be written before write() blocks
+        """
+        fsync = fsync or os.environ.get("PRIDEPY_FSYNC", "none").lower()
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy {fsync}, valid values: {', '.join(self.FSYNC_POLICIES)}"
+            )
+        self.file_path = file_path
+        self.fsync = fsync
+        self.buffer_size = buffer_size or self.BUFFER_SIZE
+        self.checksum = checksum
+        self.on_write = on_write
+        self._file = open(file_path, mode)
+        if offset is not None:
+            self._file.seek(offset)
+        self._buffer = bytearray()
+        self._queue = queue.Queue(maxsize=max_buffers or self.MAX_BUFFERS)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"writer-{os.path.basename(file_path)}", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                return
+            if self._error is not None:
+                continue  # Drain the queue so that write() never blocks on a failed writer
+            try:
+                self._file.write(data)
+                if self.fsync == "always":
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                if self.checksum is not None:
+                    self.checksum.update(data)
+                if self.on_write is not None:
+                    self.on_write(len(data))
+            except BaseException as e:
+                self._error = e
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, data: bytes) -> int:
+        """
+        Buffer bytes to be written. Blocks only while max_buffers full buffers are waiting.
+        :param data: bytes received
+        :return: number of bytes buffered
+        """
+        self._raise_error()
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            self._queue.put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def close(self):
+        """
+        Write the buffered bytes, wait for the writer thread and close the file. Bytes received
+        before a failed download are written too, so the next attempt can resume after them.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._buffer:
+                self._queue.put(bytes(self._buffer))
+                self._buffer.clear()
+            self._queue.put(None)
+            self._thread.join()
+            if self._error is None and self.fsync == "close":
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 import asyncio
+import json
 import logging
 import click
 from pridepy.files.files import Files
 from pridepy.project.project import Project
+from pridepy.spectra.spectra import Spectra
 
 
 @click.group()
@@ -11,6 +13,81 @@ def main():
     pass
 
 
+def download_options(
+    workers: int = 1,
+    workers_help: str = "Number of files downloaded in parallel (e.g. FTP connections in the pool)",
+    public: bool = True,
+):
+    """
+    Add the transfer options shared by the download commands to a command.
+    :param workers: default number of workers
+    :param workers_help: help of the --workers option, without its default
+    :param public: also add the options of the public downloads (s3, journal and refresh)
+    :return: decorator of the command
+    """
+    options = [
+        click.option(
+            "-w",
+            "--workers",
+            required=False,
+            default=workers,
+            type=click.IntRange(min=1),
+            help=f"{workers_help}. Default is {workers}",
+        ),
+        click.option(
+            "--segments",
+            required=False,
+            default=1,
+            type=click.IntRange(min=1),
+            help="Number of byte ranges of a large file downloaded in parallel (ftp, globus and "
+            "private files). Default is 1",
+        ),
+    ]
+    if public:
+        options += [
+            click.option(
+                "--s3-max-concurrency",
+                required=False,
+                default=10,
+                type=click.IntRange(min=1),
+                help="Number of parts of a file downloaded at the same time with the s3 protocol. "
+                "Default is 10",
+            ),
+            click.option(
+                "--s3-chunk-size",
+                required=False,
+                default=8,
+                type=click.IntRange(min=5),
+                help="Size in MB of every part of a multipart download with the s3 protocol. "
+                "Default is 8",
+            ),
+            click.option(
+                "--journal",
+                is_flag=True,
+                default=False,
+                help="Keep a transfer journal in the folder of every project, so a rerun of an "
+                "interrupted download only fetches the pending and partial files without listing "
+                "the project again.",
+            ),
+            click.option(
+                "--refresh",
+                is_flag=True,
+                default=False,
+                help="Download the project file listings again instead of using the cached ones. "
+                "Listings are cached in the pridepy cache directory and revalidated with the PRIDE "
+                "API after PRIDEPY_CACHE_TTL seconds (default one day).",
+            ),
+        ]
+
+    def decorator(command):
+        # Applied in reverse so that the options are listed in the help in this order
+        for option in reversed(options):
+            command = option(command)
+        return command
+
+    return decorator
+
+
 @main.command(
     "download-all-public-raw-files",
     help="Download all public raw files from a given PRIDE public project",
@@ -20,7 +97,8 @@ def main():
     "-p",
     "--protocol",
     default="ftp",
-    help="Protocol to be used to download files either by ftp or aspera or from globus. Default is ftp",
+    help="Protocol to be used to download files either by ftp or aspera or from globus or s3, or "
+    "auto to select the fastest one. Default is ftp",
 )
 @click.option(
     "-o",
@@ -43,10 +121,11 @@ def main():
 @click.option(
     "--checksum-check",
     required=False,
-    help="Download checksum file for project",
+    help="Download checksum file for project and verify the downloaded files against it",
     is_flag=True,
     default=False,
 )
+@download_options()
 def download_all_public_raw_files(
     accession,
     protocol,
@@ -54,20 +133,32 @@ def download_all_public_raw_files(
     skip_if_downloaded_already,
     aspera_maximum_bandwidth: str = "50M",
     checksum_check: bool = False,
+    workers: int = 1,
+    segments: int = 1,
+    s3_max_concurrency: int = 10,
+    s3_chunk_size: int = 8,
+    journal: bool = False,
+    refresh: bool = False,
 ):
     """
     Command to download all public raw files from a specified PRIDE project.
 
     Parameters:
         accession (str): PRIDE project accession.
-        protocol (str): Protocol for downloading files (ftp, aspera, globus). Default is ftp.
+        protocol (str): Protocol for downloading files (ftp, aspera, globus, s3, auto). Default is ftp.
         output_folder (str): Directory to save downloaded raw files.
         skip_if_downloaded_already (bool): Skip download if files already exist. Default is False.
         aspera_maximum_bandwidth (str): Maximum bandwidth for Aspera protocol. Default is 100M.
         checksum_check (bool): Flag to download checksum file for the project. Default is False.
+        workers (int): Number of files downloaded in parallel. Default is 1.
+        segments (int): Number of byte ranges of a large file downloaded in parallel. Default is 1.
+        s3_max_concurrency (int): Number of parts of a file downloaded at the same time from S3.
+        s3_chunk_size (int): Size in MB of every part of a multipart S3 download.
+        journal (bool): Keep a transfer journal in the output folder to resume interrupted downloads.
+        refresh (bool): Download the project file listing again instead of using the cache.
     """
 
-    raw_files = Files()
+    raw_files = Files(refresh=refresh)
     logging.info("accession: " + accession)
     logging.info(f"Data will be downloaded from {protocol}")
 
@@ -81,6 +172,11 @@ def download_all_public_raw_files(
         protocol,
         aspera_maximum_bandwidth=aspera_maximum_bandwidth,
         checksum_check=checksum_check,
+        workers=workers,
+        segments=segments,
+        s3_max_concurrency=s3_max_concurrency,
+        s3_chunk_size=s3_chunk_size,
+        journal=journal,
     )
 
 
@@ -93,7 +189,8 @@ def download_all_public_raw_files(
     "-p",
     "--protocol",
     default="ftp",
-    help="Protocol to be used to download files either by ftp or aspera or from globus. Default is ftp",
+    help="Protocol to be used to download files either by ftp or aspera or from globus or s3, or "
+    "auto to select the fastest one. Default is ftp",
 )
 @click.option(
     "-o",
@@ -116,10 +213,11 @@ def download_all_public_raw_files(
 @click.option(
     "--checksum-check",
     required=False,
-    help="Download checksum file for project",
+    help="Download checksum file for project and verify the downloaded files against it",
     is_flag=True,
     default=False,
 )
+@download_options()
 @click.option(
     "-c",
     "--category",
@@ -135,20 +233,70 @@ def download_all_public_category_files(
     aspera_maximum_bandwidth: str = "50M",
     checksum_check: bool = False,
     category: str = "RAW",
+    workers: int = 1,
+    segments: int = 1,
+    s3_max_concurrency: int = 10,
+    s3_chunk_size: int = 8,
+    journal: bool = False,
+    refresh: bool = False,
 ):
     """
     Command to download all public files of a specified category from a given PRIDE public project.
 
     Parameters:
         accession (str): The PRIDE project accession identifier.
-        protocol (str): The protocol to use for downloading files (ftp, aspera, globus).
+        protocol (str): The protocol to use for downloading files (ftp, aspera, globus, s3, auto).
         output_folder (str): The directory where the files will be downloaded.
         skip_if_downloaded_already (bool): If True, skips downloading files that already exist. Default is False.
         aspera_maximum_bandwidth (str): Maximum bandwidth for Aspera transfers.
         checksum_check (bool): If True, downloads the checksum file for the project.
         category (str): Comma-separated categories of files to download (e.g. RAW or RAW,SEARCH).
+        workers (int): Number of files downloaded in parallel.
+        segments (int): Number of byte ranges of a large file downloaded in parallel.
+        s3_max_concurrency (int): Number of parts of a file downloaded at the same time from S3.
+        s3_chunk_size (int): Size in MB of every part of a multipart S3 download.
+        journal (bool): Keep a transfer journal in the output folder to resume interrupted downloads.
+        refresh (bool): Download the project file listing again instead of using the cache.
     """
 
+    categories = _parse_categories(category)
+
+    raw_files = Files(refresh=refresh)
+    logging.info("accession: " + accession)
+    logging.info(f"Data will be downloaded from {protocol}")
+
+    if protocol == "aspera":
+        logging.info(f"Aspera maximum bandwidth: {aspera_maximum_bandwidth}")
+
+    raw_files.download_all_category_files(
+        accession,
+        output_folder,
+        skip_if_downloaded_already,
+        protocol,
+        aspera_maximum_bandwidth=aspera_maximum_bandwidth,
+        checksum_check=checksum_check,
+        categories=categories,
+        workers=workers,
+        segments=segments,
+        s3_max_concurrency=s3_max_concurrency,
+        s3_chunk_size=s3_chunk_size,
+        journal=journal,
+    )
+
+
+def _read_accessions(accessions, accessions_file) -> list:
+    accession_list = [a.strip() for value in accessions for a in value.split(",") if a.strip()]
+    if accessions_file:
+        with open(accessions_file) as f:
+            accession_list.extend(
+                line.strip() for line in f if line.strip() and not line.startswith("#")
+            )
+    if not accession_list:
+        raise click.UsageError("Give the projects with --accessions or --accessions-file")
+    return list(dict.fromkeys(accession_list))
+
+
+def _parse_categories(category: str) -> list:
     valid_categories = {"RAW", "PEAK", "SEARCH", "RESULT", "SPECTRUM_LIBRARY", "OTHER", "FASTA"}
     categories = [c.strip().upper() for c in category.split(",")]
     invalid = set(categories) - valid_categories
@@ -157,23 +305,140 @@ def download_all_public_category_files(
             f"Invalid category: {', '.join(invalid)}. "
             f"Valid values: {', '.join(sorted(valid_categories))}"
         )
+    return categories
 
-    raw_files = Files()
-    logging.info("accession: " + accession)
-    logging.info(f"Data will be downloaded from {protocol}")
 
-    if protocol == "aspera":
-        logging.info(f"Aspera maximum bandwidth: {aspera_maximum_bandwidth}")
+@main.command(
+    "download-projects",
+    help="Download the files of several PRIDE public projects with shared connection limits",
+)
+@click.option(
+    "-a",
+    "--accessions",
+    required=False,
+    multiple=True,
+    help="PRIDE project accessions, comma-separated or repeated (e.g. -a PXD000001,PXD000002)",
+)
+@click.option(
+    "--accessions-file",
+    required=False,
+    type=click.Path(exists=True, dir_okay=False),
+    help="File with one PRIDE project accession per line",
+)
+@click.option(
+    "-p",
+    "--protocol",
+    default="ftp",
+    help="Protocol to be used to download files either by ftp or aspera or from globus or s3, or "
+    "auto to select the fastest one. Default is ftp",
+)
+@click.option(
+    "-o",
+    "--output-folder",
+    required=True,
+    help="output folder, the files of every project are saved in a folder named after its accession",
+)
+@click.option(
+    "-c",
+    "--category",
+    required=False,
+    default="RAW",
+    help="Comma-separated categories of files to download (e.g. RAW or RAW,SEARCH). "
+    "Valid values: RAW, PEAK, SEARCH, RESULT, SPECTRUM_LIBRARY, OTHER, FASTA. Default is RAW",
+)
+@click.option(
+    "--skip-if-downloaded-already",
+    is_flag=True,
+    default=False,
+    help="Skip the download if the file has already been downloaded.",
+)
+@click.option(
+    "--aspera-maximum-bandwidth",
+    required=False,
+    help="Aspera maximum bandwidth (e.g 50M, 100M, 200M) shared by the projects downloaded at the "
+    "same time, default is 100M",
+    default="100M",
+)
+@click.option(
+    "--checksum-check",
+    required=False,
+    help="Download checksum file for every project and verify the downloaded files against it",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--parallel-projects",
+    required=False,
+    default=4,
+    type=click.IntRange(min=1),
+    help="Number of projects downloaded at the same time. Default is 4",
+)
+@download_options(
+    workers=8,
+    workers_help="Number of connections to the server of the protocol, shared by all the projects",
+)
+def download_projects(
+    accessions,
+    accessions_file,
+    protocol,
+    output_folder,
+    category: str = "RAW",
+    skip_if_downloaded_already: bool = False,
+    aspera_maximum_bandwidth: str = "100M",
+    checksum_check: bool = False,
+    workers: int = 8,
+    parallel_projects: int = 4,
+    segments: int = 1,
+    s3_max_concurrency: int = 10,
+    s3_chunk_size: int = 8,
+    journal: bool = False,
+    refresh: bool = False,
+):
+    """
+    Command to download the files of several PRIDE public projects in one batch.
 
-    raw_files.download_all_category_files(
-        accession,
+    Parameters:
+        accessions (tuple): PRIDE project accessions, comma-separated or repeated.
+        accessions_file (str): File with one PRIDE project accession per line.
+        protocol (str): The protocol to use for downloading files (ftp, aspera, globus, s3, auto).
+        output_folder (str): The directory where the project folders are created.
+        category (str): Comma-separated categories of files to download. Default is RAW.
+        skip_if_downloaded_already (bool): If True, skips downloading files that already exist.
+        aspera_maximum_bandwidth (str): Maximum bandwidth for Aspera transfers of the whole batch.
+        checksum_check (bool): If True, verifies the files against the checksums of their project.
+        workers (int): Number of connections to the server of the protocol shared by all projects.
+        parallel_projects (int): Number of projects downloaded at the same time.
+        segments (int): Number of byte ranges of a large file downloaded in parallel.
+        s3_max_concurrency (int): Number of parts of a file downloaded at the same time from S3.
+        s3_chunk_size (int): Size in MB of every part of a multipart S3 download.
+        journal (bool): Keep a transfer journal in every project folder to resume interrupted downloads.
+        refresh (bool): Download the project file listings again instead of using the cache.
+    """
+    accession_list = _read_accessions(accessions, accessions_file)
+    categories = _parse_categories(category)
+
+    files = Files(refresh=refresh)
+    logging.info(f"Downloading {len(accession_list)} projects from {protocol}")
+
+    errors = files.download_projects(
+        accession_list,
         output_folder,
         skip_if_downloaded_already,
         protocol,
         aspera_maximum_bandwidth=aspera_maximum_bandwidth,
         checksum_check=checksum_check,
         categories=categories,
+        workers=workers,
+        parallel_projects=parallel_projects,
+        segments=segments,
+        s3_max_concurrency=s3_max_concurrency,
+        s3_chunk_size=s3_chunk_size,
+        journal=journal,
     )
+    for accession, error in errors.items():
+        logging.error(f"{accession}: {error}")
+    if errors:
+        raise click.ClickException(f"{len(errors)} of {len(accession_list)} projects failed")
 
 
 @main.command(
@@ -185,7 +450,8 @@ def download_all_public_category_files(
     "-p",
     "--protocol",
     default="ftp",
-    help="Protocol to be used to download files either by ftp or aspera or from globus. Default is ftp",
+    help="Protocol to be used to download files either by ftp or aspera or from globus or s3, or "
+    "auto to select the fastest one. Default is ftp",
 )
 @click.option("-f", "--file-name", required=True, help="fileName to be downloaded")
 @click.option(
@@ -211,10 +477,11 @@ def download_all_public_category_files(
 @click.option(
     "--checksum-check",
     required=False,
-    help="Download checksum file for project",
+    help="Download checksum file for project and verify the downloaded files against it",
     is_flag=True,
     default=False,
 )
+@download_options()
 def download_file_by_name(
     accession,
     protocol,
@@ -225,6 +492,12 @@ def download_file_by_name(
     password: str = None,
     aspera_maximum_bandwidth: str = "50M",
     checksum_check: bool = False,
+    workers: int = 1,
+    segments: int = 1,
+    s3_max_concurrency: int = 10,
+    s3_chunk_size: int = 8,
+    journal: bool = False,
+    refresh: bool = False,
 ):
     """
     This script download single file from servers or copy from the file system
@@ -237,9 +510,15 @@ def download_file_by_name(
     :param password: PRIDE login password for private files
     :param aspera_maximum_bandwidth: Aspera maximum bandwidth (e.g 50M, 100M, 200M), depending on the user's network bandwidth, default is 100M
     :param checksum_check: Download checksum file for project.
+    :param workers: Number of files downloaded in parallel.
+    :param segments: Number of byte ranges of a large file downloaded in parallel.
+    :param s3_max_concurrency: Number of parts of a file downloaded at the same time from S3.
+    :param s3_chunk_size: Size in MB of every part of a multipart S3 download.
+    :param journal: Keep a transfer journal in the output folder to resume interrupted downloads.
+    :param refresh: Download the project file listing again instead of using the cache.
     """
 
-    file_handler = Files()
+    file_handler = Files(refresh=refresh)
 
     logging.info("accession: " + accession)
     logging.info(f"Data will be downloaded from {protocol}")
@@ -256,6 +535,11 @@ def download_file_by_name(
         password=password,
         aspera_maximum_bandwidth=aspera_maximum_bandwidth,
         checksum_check=checksum_check,
+        workers=workers,
+        segments=segments,
+        s3_max_concurrency=s3_max_concurrency,
+        s3_chunk_size=s3_chunk_size,
+        journal=journal,
     )
 
 
@@ -283,11 +567,96 @@ def download_file_by_name(
     default=False,
     help="Skip the download if the file has already been downloaded.",
 )
-def download_px_raw_files(accession: str, output_folder: str, skip_if_downloaded_already: bool):
+@click.option(
+    "--segments",
+    required=False,
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of byte ranges of a large file downloaded in parallel. Default is 1",
+)
+def download_px_raw_files(
+    accession: str, output_folder: str, skip_if_downloaded_already: bool, segments: int = 1
+):
     """CLI wrapper to download raw files via ProteomeXchange XML."""
     files = Files()
     logging.info(f"PX accession/URL: {accession}")
-    files.download_px_raw_files(accession, output_folder, skip_if_downloaded_already)
+    files.download_px_raw_files(
+        accession, output_folder, skip_if_downloaded_already, segments=segments
+    )
+
+
+@main.command(
+    "download-private-files",
+    help="Download several files of a private PRIDE project, selected by category or file name",
+)
+@click.option("-a", "--accession", required=True, help="PRIDE project accession")
+@click.option("-u", "--user", required=True, help="PRIDE login username")
+@click.option("-p", "--password", required=True, help="PRIDE login password")
+@click.option("-o", "--output-folder", required=True, help="output folder to download the files")
+@click.option(
+    "-c",
+    "--category",
+    required=False,
+    help="Comma-separated categories of files to download (e.g. RAW or RAW,SEARCH). "
+    "Valid values: RAW, PEAK, SEARCH, RESULT, SPECTRUM_LIBRARY, OTHER, FASTA. Default is all",
+)
+@click.option(
+    "-f",
+    "--file-pattern",
+    required=False,
+    multiple=True,
+    help="Shell-style pattern of the file names to download (e.g. '*.raw'), can be repeated",
+)
+@click.option(
+    "--skip-if-downloaded-already",
+    is_flag=True,
+    default=False,
+    help="Skip the download if the file has already been downloaded.",
+)
+@download_options(workers=4, workers_help="Number of files downloaded in parallel", public=False)
+def download_private_files(
+    accession,
+    user,
+    password,
+    output_folder,
+    category: str = None,
+    file_pattern: tuple = (),
+    skip_if_downloaded_already: bool = False,
+    workers: int = 4,
+    segments: int = 1,
+):
+    """
+    Command to download several files of a private PRIDE project with a single listing.
+
+    Parameters:
+        accession (str): PRIDE project accession.
+        user (str): PRIDE login username.
+        password (str): PRIDE login password.
+        output_folder (str): The directory where the files will be downloaded.
+        category (str): Comma-separated categories of files to download, all of them if not set.
+        file_pattern (tuple): Shell-style patterns of the file names to download.
+        skip_if_downloaded_already (bool): If True, skips downloading files that already exist.
+        workers (int): Number of files downloaded in parallel.
+        segments (int): Number of byte ranges of a large file downloaded in parallel.
+    """
+    categories = _parse_categories(category) if category else None
+
+    files = Files()
+    errors = files.download_private_files(
+        accession,
+        output_folder,
+        user,
+        password,
+        skip_if_downloaded_already=skip_if_downloaded_already,
+        categories=categories,
+        file_patterns=list(file_pattern) or None,
+        workers=workers,
+        segments=segments,
+    )
+    for file_name, error in errors.items():
+        logging.error(f"{file_name}: {error}")
+    if errors:
+        raise click.ClickException(f"{len(errors)} file(s) could not be downloaded")
 
 
 @main.command("list-private-files", help="List private files by project accession")
@@ -300,14 +669,80 @@ def list_private_files(accession, user, password):
     :return:
     """
     project = Project()
-    list_files = project.get_private_files_by_accession(accession, user, password)
-    if list_files:
-        logging.info("File Name\tFile Size\tCategory")
-        for f in list_files:
-            # Get file size in MB from bytes
-            file_size = f["fileSizeBytes"] / (1024 * 1024)
-            file_category = f["fileCategory"]["value"]
-            logging.info(f["fileName"] + "\t" + str(file_size) + " MB\t" + file_category)
+    # Files are printed as soon as their page is received
+    list_files = project.iter_private_files_by_accession(accession, user, password)
+    for i, f in enumerate(list_files):
+        if i == 0:
+            logging.info("File Name\tFile Size\tCategory")
+        # Get file size in MB from bytes
+        file_size = f["fileSizeBytes"] / (1024 * 1024)
+        file_category = f["fileCategory"]["value"]
+        logging.info(f["fileName"] + "\t" + str(file_size) + " MB\t" + file_category)
+
+
+@main.command(
+    "get-projects-by-accessions",
+    help="Get the records of many PRIDE projects, fetched concurrently",
+)
+@click.option(
+    "-a",
+    "--accessions",
+    required=False,
+    multiple=True,
+    help="PRIDE project accessions, comma-separated or repeated (e.g. -a PXD000001,PXD000002)",
+)
+@click.option(
+    "--accessions-file",
+    required=False,
+    type=click.Path(exists=True, dir_okay=False),
+    help="File with one PRIDE project accession per line",
+)
+@click.option(
+    "-o",
+    "--output-file",
+    required=False,
+    help="output NDJSON file, one project per line. Default is the standard output",
+)
+@click.option(
+    "-w",
+    "--workers",
+    required=False,
+    default=8,
+    type=click.IntRange(min=1),
+    help="Number of projects fetched at the same time. Default is 8",
+)
+@click.option(
+    "--unordered",
+    is_flag=True,
+    default=False,
+    help="Write the projects as soon as they are received instead of in the order of the accessions",
+)
+def get_projects_by_accessions(accessions, accessions_file, output_file, workers, unordered):
+    """
+    Get the records of many PRIDE projects and write them as NDJSON. Accessions that can not be
+    fetched are reported at the end, without stopping the others, and make the command fail.
+    :param accessions: PRIDE project accessions, comma-separated or repeated
+    :param accessions_file: File with one PRIDE project accession per line
+    :param output_file: output NDJSON file, the standard output if None
+    :param workers: Number of projects fetched at the same time
+    :param unordered: Write the projects as soon as they are received
+    """
+    accession_list = _read_accessions(accessions, accessions_file)
+    project = Project()
+    errors = {}
+    with click.open_file(output_file or "-", "w") as f:
+        for accession, record, error in project.get_by_accessions(
+            accession_list, workers=workers, ordered=not unordered
+        ):
+            if error is not None:
+                errors[accession] = error
+                continue
+            f.write(json.dumps(record) + "\n")
+    for accession, error in errors.items():
+        logging.error(f"{accession}: {error}")
+    logging.info(f"{len(accession_list) - len(errors)} of {len(accession_list)} projects fetched")
+    if errors:
+        raise click.ClickException(f"{len(errors)} of {len(accession_list)} projects failed")
 
 
 @main.command()
@@ -317,13 +752,23 @@ def list_private_files(accession, user, password):
     required=True,
     help="output file to save all the projects metadata",
 )
-def stream_projects_metadata(output_file):
+@click.option(
+    "--format",
+    "output_format",
+    required=False,
+    default="json",
+    type=click.Choice(["json", "ndjson", "parquet"]),
+    help="json writes the API response as received, ndjson writes one record per line so the "
+    "file can be split and processed in parallel, parquet writes the records as typed columns "
+    "(needs pyarrow). Default is json",
+)
+def stream_projects_metadata(output_file, output_format):
     """
     Stream all projects metadata in JSON format to a file
     :return:
     """
     project = Project()
-    asyncio.run(project.stream_all_projects(output_file))
+    asyncio.run(project.stream_all_projects(output_file, output_format))
 
 
 @main.command()
@@ -339,13 +784,76 @@ def stream_projects_metadata(output_file):
     required=False,
     help="project accession",
 )
-def stream_files_metadata(accession, output_file):
+@click.option(
+    "--format",
+    "output_format",
+    required=False,
+    default="json",
+    type=click.Choice(["json", "ndjson", "parquet"]),
+    help="json writes the API response as received, ndjson writes one record per line so the "
+    "file can be split and processed in parallel, parquet writes the records as typed columns "
+    "(needs pyarrow). Default is json",
+)
+def stream_files_metadata(accession, output_file, output_format):
     """
     Stream all files metadata in JSON format and write it to a file
     :return:
     """
     files = Files()
-    asyncio.run(files.stream_all_files_metadata(output_file, accession))
+    asyncio.run(files.stream_all_files_metadata(output_file, accession, output_format))
+
+
+@main.command(
+    "stream-spectra-evidences",
+    help="Write the spectra evidences of a list of USIs to a NDJSON file",
+)
+@click.option(
+    "--usi-file",
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="File with one USI per line",
+)
+@click.option(
+    "-o",
+    "--output-file",
+    required=True,
+    help="output NDJSON file, one spectrum evidence per line",
+)
+@click.option("--result-type", required=False, help="result type of the spectra evidences")
+@click.option(
+    "-ps",
+    "--page-size",
+    required=False,
+    default=100,
+    type=click.IntRange(min=1, max=1000),
+    help="Number of results to fetch in a page",
+)
+@click.option(
+    "-w",
+    "--workers",
+    required=False,
+    default=4,
+    type=click.IntRange(min=1),
+    help="Number of groups of USIs fetched at the same time. Default is 4",
+)
+def stream_spectra_evidences(usi_file, output_file, result_type, page_size, workers):
+    """
+    Get the spectra evidences of many USIs, looked up in URL-safe groups fetched concurrently
+    :param usi_file: File with one USI per line
+    :param output_file: output NDJSON file
+    :param result_type: result type of the spectra evidences
+    :param page_size: Number of results to fetch in a page
+    :param workers: Number of groups of USIs fetched at the same time
+    """
+    spectra = Spectra()
+    failed_usis = []
+    with open(usi_file) as f:
+        count = spectra.write_spectra_evidences(
+            f, output_file, result_type, page_size, workers, failed_usis
+        )
+    logging.info(f"{count} spectra evidences written to {output_file}")
+    if failed_usis:
+        raise click.ClickException(f"The spectra evidences of {len(failed_usis)} USIs are missing")
 
 
 @main.command()
@@ -400,8 +908,41 @@ def stream_files_metadata(accession, output_file):
         "avgDownloadsPerFile,downloadCount,publicationDate".split(",")
     ),
 )
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    help="Search the local project catalog built with 'pridepy index build' instead of PRIDE API",
+)
+@click.option(
+    "--catalog",
+    required=False,
+    help="Path of the local project catalog. Default is projects.sqlite in the pridepy cache "
+    "directory",
+)
+@click.option(
+    "--all-pages",
+    is_flag=True,
+    default=False,
+    help="Fetch every page of results instead of --page, and print one project per line (NDJSON)",
+)
+@click.option(
+    "--limit",
+    required=False,
+    type=click.IntRange(min=1),
+    help="Maximum number of projects printed with --all-pages",
+)
 def search_projects_by_keywords_and_filters(
-    keyword, filters, page_size, page, sort_direction, sort_fields
+    keyword,
+    filters,
+    page_size,
+    page,
+    sort_direction,
+    sort_fields,
+    offline,
+    catalog,
+    all_pages,
+    limit,
 ):
     """
     Search all projects by keywords and filters
@@ -412,9 +953,34 @@ def search_projects_by_keywords_and_filters(
         page (int): Page number
         sort_direction (str): sort direction of the results based on sortfield
         sort_fields (str): field to sort the results by.
+        offline (bool): search the local project catalog instead of PRIDE API.
+        catalog (str): path of the local project catalog.
+        all_pages (bool): print the projects of every page as NDJSON.
+        limit (int): maximum number of projects printed with all_pages.
     """
     project = Project()
     sf = ", ".join(sort_fields)
+    if all_pages:
+        # The next pages are fetched while the current one is printed
+        for result in project.iter_search_by_keywords_and_filters(
+            keyword,
+            filters,
+            page_size,
+            sort_direction,
+            sf,
+            limit=limit,
+            offline=offline,
+            catalog_path=catalog,
+        ):
+            click.echo(json.dumps(result))
+        return
+    if offline:
+        logging.info(
+            project.search_offline(
+                keyword, filters, page_size, page, sort_direction, sf, catalog_path=catalog
+            )
+        )
+        return
     logging.info(
         project.search_by_keywords_and_filters(
             keyword, filters, page_size, page, sort_direction, sf
@@ -422,5 +988,27 @@ def search_projects_by_keywords_and_filters(
     )
 
 
+@main.group(help="Manage the local project catalog used by the offline search")
+def index():
+    pass
+
+
+@index.command("build", help="Build the local project catalog from all the PRIDE projects")
+@click.option(
+    "--catalog",
+    required=False,
+    help="Path of the local project catalog. Default is projects.sqlite in the pridepy cache "
+    "directory",
+)
+def build_index(catalog):
+    """
+    Stream all projects metadata from PRIDE API into the local catalog used by the offline search
+    :param catalog: path of the local project catalog
+    """
+    project = Project()
+    count = project.build_catalog(catalog)
+    logging.info(f"{count} projects in the catalog")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from pridepy.util.api_handling import Util
+
+
+class ProjectCatalog:
+    """
+    Local SQLite catalog of the PRIDE projects, built from the projects/all stream. Keywords are
+    searched with an FTS5 index over the text fields of the projects, and field==value filters with
+    an index over the values of every field, so a search takes milliseconds and needs no network.
+    """
+
+    CATALOG_NAME = "projects.sqlite"
+    BATCH_SIZE = 1000  # Projects inserted per statement while building
+
+    # Text of the projects searched by keyword
+    TEXT_FIELDS = {
+        "title": ["title"],
+        "description": ["projectDescription"],
+        "protocols": ["sampleProcessingProtocol", "dataProcessingProtocol"],
+        "keywords": ["keywords", "projectTags"],
+        "metadata": [
+            "organisms",
+            "organismsPart",
+            "diseases",
+            "instruments",
+            "softwares",
+            "experimentTypes",
+            "quantificationMethods",
+            "submitters",
+            "labPIs",
+            "affiliations",
+            "references",
+        ],
+    }
+
+    # Sort fields of the CLI and the columns they are sorted on
+    SORT_COLUMNS = {
+        "accession": "accession",
+        "submissionDate": "submission_date",
+        "submission_date": "submission_date",
+        "publicationDate": "publication_date",
+        "downloadCount": "download_count",
+        "avgDownloadsPerFile": "avg_downloads_per_file",
+        "diseases": "diseases",
+        "organismsPart": "organisms_part",
+        "organisms": "organisms",
+        "instruments": "instruments",
+        "softwares": "softwares",
+    }
+
+    def __init__(self, path: str = None):
+        """
+        :param path: path of the catalog, projects.sqlite in the pridepy cache directory if None
+        """
+        self.path = path or os.path.join(Util.get_cache_dir(), self.CATALOG_NAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS projects (
+                    accession TEXT PRIMARY KEY,
+                    record TEXT,
+                    submission_date TEXT,
+                    publication_date TEXT,
+                    download_count INTEGER,
+                    avg_downloads_per_file REAL,
+                    diseases TEXT,
+                    organisms_part TEXT,
+                    organisms TEXT,
+                    instruments TEXT,
+                    softwares TEXT
+                )
+                """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS project_fields (
+                    accession TEXT,
+                    field TEXT,
+                    value TEXT COLLATE NOCASE
+                )
+                """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS project_fields_value ON project_fields (field, value)"
+            )
+            columns = ", ".join(self.TEXT_FIELDS)
+            self._conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(accession UNINDEXED, "
+                f"{columns})"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS catalog_info (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _values(value: Any) -> List[str]:
+        """
+        Text values of a field: the name of a CV param, every element of a list, and the value of
+        a scalar.
+        """
+        if value is None:
+            return []
+        if isinstance(value, list):
+            return [text for element in value for text in ProjectCatalog._values(element)]
+        if isinstance(value, dict):
+            for key in ("name", "value", "title", "accession"):
+                if value.get(key):
+                    return [str(value[key])]
+            return []
+        return [str(value)]
+
+    @staticmethod
+    def _first(values: List[str]) -> Optional[str]:
+        return values[0] if values else None
+
+    def build(self, projects: Iterable[Dict]) -> int:
+        """
+        Replace the content of the catalog with the given projects.
+        :param projects: project records in JSON format, e.g. from Project.iter_all_projects
+        :return: number of projects in the catalog
+        """
+        count = 0
+        with self._conn:
+            for table in ("projects", "project_fields", "projects_fts"):
+                self._conn.execute(f"DELETE FROM {table}")
+            batch = []
+            for project in projects:
+                batch.append(project)
+                if len(batch) >= self.BATCH_SIZE:
+                    count += self._insert(batch)
+                    batch = []
+            count += self._insert(batch)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalog_info VALUES ('built_at', ?)", (str(time.time()),)
+            )
+        logging.info(f"{count} projects indexed in {self.path}")
+        return count
+
+    def _insert(self, projects: List[Dict]) -> int:
+        rows, fields, texts = [], [], []
+        for project in projects:
+            accession = project.get("accession")
+            if not accession:
+                continue
+            rows.append(
+                (
+                    accession,
+                    json.dumps(project),
+                    project.get("submissionDate"),
+                    project.get("publicationDate"),
+                    project.get("downloadCount"),
+                    project.get("avgDownloadsPerFile"),
+                    self._first(self._values(project.get("diseases"))),
+                    self._first(self._values(project.get("organismsPart"))),
+                    self._first(self._values(project.get("organisms"))),
+                    self._first(self._values(project.get("instruments"))),
+                    self._first(self._values(project.get("softwares"))),
+                )
+            )
+            for field, value in project.items():
+                fields.extend((accession, field, text) for text in self._values(value))
+            texts.append(
+                (accession,)
+                + tuple(
+                    " ".join(text for name in names for text in self._values(project.get(name)))
+                    for names in self.TEXT_FIELDS.values()
+                )
+            )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        self._conn.executemany("INSERT INTO project_fields VALUES (?, ?, ?)", fields)
+        placeholders = ", ".join("?" * (len(self.TEXT_FIELDS) + 1))
+        self._conn.executemany(f"INSERT INTO projects_fts VALUES ({placeholders})", texts)
+        return len(rows)
+
+    def built_at(self) -> Optional[float]:
+        """
+        :return: time the catalog was built, or None if it was never built
+        """
+        row = self._conn.execute(
+            "SELECT value FROM catalog_info WHERE key = 'built_at'"
+        ).fetchone()
+        return float(row[0]) if row else None
+
+    @staticmethod
+    def _parse_filters(query_filter: str) -> List[List[str]]:
+        filters = []
+        for condition in (query_filter or "").split(","):
+            if not condition.strip():
+                continue
+            if "==" not in condition:
+                raise ValueError(f"Filter {condition.strip()} is not in the form field==value")
+            field, value = condition.split("==", 1)
+            filters.append([field.strip(), value.strip()])
+        return filters
+
+    def search(
+        self,
+        keyword: str,
+        query_filter: str = None,
+        page_size: int = 100,
+        page: int = 0,
+        sort_direction: str = "DESC",
+        sort_fields: str = "submissionDate",
+    ) -> List[Dict]:
+        """
+        Search the projects of the catalog by keyword and filters, like the search/projects endpoint
+        :param keyword: keyword to search projects, every word must be found
+        :param query_filter: Parameters to filter the search results: field1==value1,field2==value2
+        :param page_size: Number of results to fetch in a page
+        :param page: Identifies which page of results to fetch
+        :param sort_direction: Sorting direction: ASC or DESC
+        :param sort_fields: Field(s) for sorting the results on, separated by commas
+        :return: PRIDE projects in json format
+        """
+        if self.built_at() is None:
+            raise Exception(
+                f"The catalog {self.path} is empty, build it with: pridepy index build"
+            )
+
+        conditions, parameters = [], []
+        words = [word for word in (keyword or "").split() if word != "*"]
+        if words:
+            # Every word is quoted, so the FTS5 query syntax does not apply to user input
+            match = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+            conditions.append(
+                "p.accession IN (SELECT accession FROM projects_fts WHERE projects_fts MATCH ?)"
+            )
+            parameters.append(match)
+        for field, value in self._parse_filters(query_filter):
+            conditions.append(
+                "p.accession IN (SELECT accession FROM project_fields WHERE field = ? AND value = ?)"
+            )
+            parameters.extend([field, value])
+
+        direction = "ASC" if str(sort_direction).upper() == "ASC" else "DESC"
+        order = []
+        for sort_field in (sort_fields or "").split(","):
+            column = self.SORT_COLUMNS.get(sort_field.strip())
+            if column is None:
+                if sort_field.strip():
+                    raise ValueError(f"Unknown sort field {sort_field.strip()}")
+                continue
+            order.append(f"p.{column} {direction}")
+        order.append("p.accession ASC")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._conn.execute(
+            f"SELECT p.record FROM projects p {where} ORDER BY {', '.join(order)} "
+            f"LIMIT ? OFFSET ?",
+            parameters + [page_size, page * page_size],
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
@@ -1,7 +1,16 @@
 #!/usr/bin/env python
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from pridepy.authentication.authentication import Authentication
+from pridepy.project.catalog import ProjectCatalog
 from pridepy.util.api_handling import Util
+from pridepy.util.metadata_cache import MetadataCache
+from pridepy.util.pagination import aiter_pages, get_page_results, iter_pages
 
 
 class Project:
@@ -12,9 +21,14 @@ class Project:
     API_BASE_URL = "https://www.ebi.ac.uk/pride/ws/archive/v3/"
     V3_API_BASE_URL = "https://www.ebi.ac.uk/pride/ws/archive/v3/"
     PRIVATE_API_BASE_URL = "https://www.ebi.ac.uk/pride/private/ws/archive/v2/"
+    PRIVATE_PAGE_WORKERS = 4  # Pages of a private file list fetched at the same time
+    ACCESSION_WORKERS = 8  # Projects fetched at the same time by get_by_accessions
 
-    def __init__(self):
-        pass
+    def __init__(self, refresh: bool = False):
+        """
+        :param refresh: download the project records again instead of using the metadata cache
+        """
+        self.metadata_cache = MetadataCache(refresh=refresh)
 
     def get_projects(self, page_size, page, sort_direction, sort_conditions):
         """
@@ -41,20 +55,111 @@ class Project:
         response = Util.get_api_call(request_url, headers)
         return response.json()
 
-    async def stream_all_projects(self, output_file):
+    def iter_projects(
+        self,
+        page_size=100,
+        sort_direction="DESC",
+        sort_conditions="submissionDate",
+        prefetch=2,
+        limit=None,
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all the pages of projects from PRIDE API, fetching the next pages while the
+        current one is consumed
+        :param page_size: Number of results to fetch in a page
+        :param sort_direction: Sorting direction: ASC or DESC
+        :param sort_conditions: Field(s) for sorting the results on
+        :param prefetch: Number of pages fetched ahead of the current one
+        :param limit: Maximum number of projects, all of them if None
+        :return: iterator over the projects in json format
+        """
+        return iter_pages(
+            lambda page: get_page_results(
+                self.get_projects(page_size, page, sort_direction, sort_conditions)
+            ),
+            page_size,
+            prefetch,
+            limit,
+        )
+
+    def aiter_projects(
+        self,
+        page_size=100,
+        sort_direction="DESC",
+        sort_conditions="submissionDate",
+        prefetch=2,
+        limit=None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Asynchronous version of iter_projects
+        """
+        return aiter_pages(
+            lambda page: get_page_results(
+                self.get_projects(page_size, page, sort_direction, sort_conditions)
+            ),
+            page_size,
+            prefetch,
+            limit,
+        )
+
+    async def stream_all_projects(self, output_file, output_format="json"):
         """
         get stream of all projects from PRIDE API in JSON format
+        :param output_file: output file
+        :param output_format: json, ndjson to write one project per line, or parquet
         """
         request_url = self.V3_API_BASE_URL + "projects/all"
         count_request_url = self.V3_API_BASE_URL + "projects/count"
         headers = {"Accept": "application/JSON"}
         response = Util.get_api_call(count_request_url, headers)
         total_records = response.json()
-        regex_search_pattern = '"projectDescription"'
         await Util.stream_response_to_file(
-            output_file, total_records, regex_search_pattern, request_url, headers
+            output_file, total_records, '"projectDescription"', request_url, headers, output_format
         )
 
+    def iter_all_projects(self) -> Iterator[Dict]:
+        """
+        Iterate over all projects from PRIDE API in JSON format, as they are received
+        """
+        request_url = self.V3_API_BASE_URL + "projects/all"
+        headers = {"Accept": "application/JSON"}
+        return Util.iter_json_stream(api_url=request_url, headers=headers)
+
+    def build_catalog(self, catalog_path: str = None) -> int:
+        """
+        Build the local catalog of all the PRIDE projects used by the offline search
+        :param catalog_path: path of the catalog, projects.sqlite in the pridepy cache directory if None
+        :return: number of projects in the catalog
+        """
+        with ProjectCatalog(catalog_path) as catalog:
+            return catalog.build(self.iter_all_projects())
+
+    def search_offline(
+        self,
+        keyword,
+        query_filter,
+        page_size,
+        page,
+        sort_direction,
+        sort_fields,
+        catalog_path: str = None,
+    ):
+        """
+        search the projects of the local catalog by keyword and filters, without calling PRIDE API
+        :param keyword: keyword to search projects
+        :param query_filter: Parameters to filter the search results
+        :param page_size: Number of results to fetch in a page
+        :param page: Identifies which page of results to fetch
+        :param sort_direction: Sorting direction: ASC or DESC
+        :param sort_fields: Field(s) for sorting the results on
+        :param catalog_path: path of the catalog, projects.sqlite in the pridepy cache directory if None
+        :return: PRIDE projects in json format
+        """
+        with ProjectCatalog(catalog_path) as catalog:
+            return catalog.search(
+                keyword, query_filter, page_size, page, sort_direction, sort_fields
+            )
+
     def get_by_accession(self, accession):
         """
         search PRIDE projects by accession
@@ -63,8 +168,48 @@ class Project:
         """
         request_url = self.API_BASE_URL + "projects/" + accession
         headers = {"Accept": "application/JSON"}
-        response = Util.get_api_call(request_url, headers)
-        return response.json()
+        return self.metadata_cache.get_json(request_url, headers, accession)
+
+    def get_by_accessions(
+        self, accessions: Iterable[str], workers=None, ordered=True
+    ) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+        """
+        Get the records of many PRIDE projects, fetched concurrently. Every request goes through
+        the rate limiter shared by the PRIDE API calls, and a failed accession does not stop the
+        others.
+        :param accessions: PRIDE accessions, duplicates are fetched once
+        :param workers: Number of projects fetched at the same time
+        :param ordered: return the projects in the order of the accessions, otherwise as soon as
+        they are received
+        :return: iterator over (accession, project in JSON format, None) or (accession, None, error)
+        """
+        workers = max(1, workers or self.ACCESSION_WORKERS)
+        accessions = iter(dict.fromkeys(a.strip() for a in accessions if a and a.strip()))
+
+        def get(accession):
+            try:
+                return accession, self.get_by_accession(accession), None
+            except Exception as e:
+                return accession, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # At most 2 * workers requests are submitted ahead of the consumer
+            pending = deque(
+                executor.submit(get, accession) for accession in islice(accessions, 2 * workers)
+            )
+            try:
+                while pending:
+                    if ordered:
+                        future = pending.popleft()
+                    else:
+                        future = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+                        pending.remove(future)
+                    for accession in islice(accessions, 1):
+                        pending.append(executor.submit(get, accession))
+                    yield future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
 
     def get_files_by_accession(self, accession):
         """
@@ -76,28 +221,112 @@ class Project:
         headers = {"Accept": "application/JSON"}
         return Util.read_json_stream(request_url, headers)
 
-    def get_private_files_by_accession(self, accession, user, passwd):
+    def get_private_files_by_accession(self, accession, user, passwd, workers=None):
+        """
+        search the files of a private PRIDE project
+        :param accession: PRIDE project accession
+        :param user: PRIDE login username
+        :param passwd: PRIDE login password
+        :param workers: Number of pages of the file list fetched at the same time
+        :return: PRIDE project files
+        """
+        return list(self.iter_private_files_by_accession(accession, user, passwd, workers))
 
+    def iter_private_files_by_accession(
+        self, accession, user, passwd, workers=None
+    ) -> Iterator[Dict]:
+        """
+        Iterate over the files of a private PRIDE project, in order, as soon as their page is
+        received. The page metadata of the first response is used to fetch the other pages
+        concurrently.
+        :param accession: PRIDE project accession
+        :param user: PRIDE login username
+        :param passwd: PRIDE login password
+        :param workers: Number of pages of the file list fetched at the same time
+        :return: iterator over the PRIDE project files
+        """
         auth = Authentication()
-        aap_token = auth.get_token(user, passwd)
+
+        def get_page(url) -> Dict:
+            return self._get_private_page(url, auth, user, passwd)
 
         request_url = self.PRIVATE_API_BASE_URL + "projects/" + accession + "/files"
-        headers = {"Authorization": "Bearer " + aap_token}
+        response_json = get_page(request_url)
+        yield from self._get_page_files(response_json)
+        page_urls = self._get_page_urls(response_json)
 
-        all_files = []
+        if page_urls is None:
+            # No page metadata: follow the next links one page at a time, up to an empty page
+            while self._get_page_files(response_json):
+                next_url = self._get_next_page_url(response_json)
+                if not next_url:
+                    break
+                response_json = get_page(next_url)
+                yield from self._get_page_files(response_json)
+            return
 
-        while True:
-            response = Util.get_api_call(request_url, headers)
-            response_json = response.json()
-            if "_embedded" in response_json:
-                files = response_json["_embedded"]["files"]
-                if len(files) > 0:
-                    all_files.extend(files)
-                    request_url = response_json["_links"]["next"]["href"]
-            else:
-                break
+        workers = max(1, workers or self.PRIVATE_PAGE_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            try:
+                for page_url in page_urls:
+                    pending.append(executor.submit(get_page, page_url))
+                    # Pages are fetched ahead of the consumer, but yielded in order
+                    if len(pending) >= 2 * workers:
+                        yield from self._get_page_files(pending.popleft().result())
+                while pending:
+                    yield from self._get_page_files(pending.popleft().result())
+            finally:
+                for future in pending:
+                    future.cancel()
 
-        return all_files
+    @staticmethod
+    def _get_private_page(url, auth: Authentication, user, passwd) -> Dict:
+        """
+        Get a page of the private API with the cached token of the user. A token rejected with a
+        401, e.g. one that expired while the pages were fetched, is replaced by a new login and the
+        page is requested again once.
+        :return: page in JSON format
+        """
+        token = auth.get_cached_token(user, passwd)
+        response = Util.http_request("GET", url, headers={"Authorization": "Bearer " + token})
+        if response.status_code == 401:
+            auth.invalidate_token(user, token)
+            token = auth.get_cached_token(user, passwd)
+            response = Util.http_request("GET", url, headers={"Authorization": "Bearer " + token})
+        if (not response.ok) or response.status_code != 200:
+            raise Exception("PRIDE API call {} response: {}".format(url, response.status_code))
+        return response.json()
+
+    @staticmethod
+    def _get_page_files(response_json) -> List[Dict]:
+        return response_json.get("_embedded", {}).get("files", [])
+
+    @staticmethod
+    def _get_next_page_url(response_json) -> Optional[str]:
+        href = response_json.get("_links", {}).get("next", {}).get("href")
+        # Remove the optional parameters of a templated link, e.g. {&sort}
+        return re.sub(r"\{[^}]*\}$", "", href) if href else None
+
+    @staticmethod
+    def _get_page_urls(response_json) -> Optional[List[str]]:
+        """
+        Build the URLs of the pages after the first one from its page metadata.
+        :return: URLs of the remaining pages, or None if the response has no page metadata
+        """
+        next_url = Project._get_next_page_url(response_json)
+        if not next_url:
+            return []
+        page = response_json.get("page", {})
+        if "totalPages" not in page or "number" not in page:
+            return None
+        url = urlparse(next_url)
+        query = parse_qs(url.query)
+        urls = []
+        for number in range(page["number"] + 1, page["totalPages"]):
+            query["page"] = [str(number)]
+            urls.append(urlunparse(url._replace(query=urlencode(query, doseq=True))))
+        return urls
 
     def get_similar_projects_by_accession(self, accession):
         """
@@ -149,6 +378,90 @@ class Project:
         response = Util.get_api_call(request_url, headers)
         return response.json()
 
+    def iter_search_by_keywords_and_filters(
+        self,
+        keyword,
+        query_filter,
+        page_size,
+        sort_direction,
+        sort_fields,
+        prefetch=2,
+        limit=None,
+        offline=False,
+        catalog_path=None,
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all the pages of a project search, fetching the next pages while the current
+        one is consumed
+        :param keyword: keyword to search projects
+        :param query_filter: Parameters to filter the search results
+        :param page_size: Number of results to fetch in a page
+        :param sort_direction: Sorting direction: ASC or DESC
+        :param sort_fields: Field(s) for sorting the results on
+        :param prefetch: Number of pages fetched ahead of the current one
+        :param limit: Maximum number of projects, all of them if None
+        :param offline: search the local project catalog instead of PRIDE API
+        :param catalog_path: path of the local project catalog
+        :return: iterator over the projects in json format
+        """
+        return iter_pages(
+            self._get_search_page(
+                keyword,
+                query_filter,
+                page_size,
+                sort_direction,
+                sort_fields,
+                offline,
+                catalog_path,
+            ),
+            page_size,
+            prefetch,
+            limit,
+        )
+
+    def aiter_search_by_keywords_and_filters(
+        self,
+        keyword,
+        query_filter,
+        page_size,
+        sort_direction,
+        sort_fields,
+        prefetch=2,
+        limit=None,
+        offline=False,
+        catalog_path=None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Asynchronous version of iter_search_by_keywords_and_filters
+        """
+        return aiter_pages(
+            self._get_search_page(
+                keyword,
+                query_filter,
+                page_size,
+                sort_direction,
+                sort_fields,
+                offline,
+                catalog_path,
+            ),
+            page_size,
+            prefetch,
+            limit,
+        )
+
+    def _get_search_page(
+        self, keyword, query_filter, page_size, sort_direction, sort_fields, offline, catalog_path
+    ) -> Callable[[int], List[Dict]]:
+        if offline:
+            return lambda page: self.search_offline(
+                keyword, query_filter, page_size, page, sort_direction, sort_fields, catalog_path
+            )
+        return lambda page: get_page_results(
+            self.search_by_keywords_and_filters(
+                keyword, query_filter, page_size, page, sort_direction, sort_fields
+            )
+        )
+
     def get_project_file_names(
         self, accession: str, user: str = None, password: str = None
     ) -> list:
@@ -1,6 +1,13 @@
 #!/usr/bin/env python
+import json
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+from urllib.parse import urlencode
 
 from pridepy.util.api_handling import Util
+from pridepy.util.pagination import get_page_results, iter_pages
 
 
 class Spectra:
@@ -9,6 +16,10 @@ class Spectra:
     """
 
     api_base_url = "https://www.ebi.ac.uk/pride/ws/archive/v3/"
+    MAX_USI_QUERY_LENGTH = 6000  # Characters of the USIs in the URL of one request
+    MAX_USIS_PER_REQUEST = 100
+    SPECTRA_WORKERS = 4  # Groups of USIs fetched at the same time
+    PAGE_PREFETCH = 2  # Pages of a group fetched ahead of the current one
 
     def __init__(self):
         pass
@@ -78,3 +89,122 @@ class Spectra:
         headers = {"Accept": "application/JSON"}
         response = Util.get_api_call(request_url, headers)
         return response.json()
+
+    def iter_spectra_evidences(
+        self,
+        usis: Iterable[str],
+        result_type: str = None,
+        page_size: int = 100,
+        workers: int = None,
+        failed_usis: List[str] = None,
+    ) -> Iterator[Dict]:
+        """
+        Get the spectra evidences of many USIs. Duplicate USIs are looked up once, and the USIs are
+        split in groups that fit in the URL of a request. The groups are fetched concurrently, the
+        next pages of every group being fetched while its current one is received, and the
+        evidences are returned in the order of the groups. A group that can not be fetched is
+        logged and skipped.
+        :param usis: USIs
+        :param result_type: result type
+        :param page_size: Number of results to fetch in a page
+        :param workers: Number of groups of USIs fetched at the same time
+        :param failed_usis: list the USIs of the groups that could not be fetched are added to
+        :return: iterator over the spectra evidences in JSON format
+        """
+        groups = self._group_usis(usis)
+        workers = max(1, workers or self.SPECTRA_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            try:
+                for group in groups:
+                    future = executor.submit(
+                        self._get_group_evidences, group, result_type, page_size
+                    )
+                    pending.append((group, future))
+                    # Groups are fetched ahead of the consumer, but returned in order
+                    if len(pending) >= 2 * workers:
+                        yield from self._get_group_result(*pending.popleft(), failed_usis)
+                while pending:
+                    yield from self._get_group_result(*pending.popleft(), failed_usis)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def write_spectra_evidences(
+        self,
+        usis: Iterable[str],
+        output_file: str,
+        result_type: str = None,
+        page_size: int = 100,
+        workers: int = None,
+        failed_usis: List[str] = None,
+    ) -> int:
+        """
+        Write the spectra evidences of many USIs to a NDJSON file, one evidence per line.
+        :param usis: USIs
+        :param output_file: output NDJSON file
+        :param result_type: result type
+        :param page_size: Number of results to fetch in a page
+        :param workers: Number of groups of USIs fetched at the same time
+        :param failed_usis: list the USIs of the groups that could not be fetched are added to
+        :return: number of spectra evidences written
+        """
+        count = 0
+        evidences = self.iter_spectra_evidences(usis, result_type, page_size, workers, failed_usis)
+        with open(output_file, "w", encoding="utf-8") as f:
+            for evidence in evidences:
+                f.write(json.dumps(evidence, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    def _group_usis(self, usis: Iterable[str]) -> List[List[str]]:
+        groups, group, length = [], [], 0
+        for usi in dict.fromkeys(usi.strip() for usi in usis if usi and usi.strip()):
+            usi_length = len(urlencode({"usi": usi})) + 1
+            if group and (
+                length + usi_length > self.MAX_USI_QUERY_LENGTH
+                or len(group) >= self.MAX_USIS_PER_REQUEST
+            ):
+                groups.append(group)
+                group, length = [], 0
+            group.append(usi)
+            length += usi_length
+        if group:
+            groups.append(group)
+        return groups
+
+    @staticmethod
+    def _get_group_result(
+        usis: List[str], future: Future, failed_usis: List[str] = None
+    ) -> List[Dict]:
+        """
+        Get the spectra evidences of a group of USIs, or none if the group could not be fetched.
+        """
+        try:
+            return future.result()
+        except Exception as e:
+            logging.error(
+                f"Could not get the spectra evidences of {len(usis)} USIs from {usis[0]}: {str(e)}"
+            )
+            if failed_usis is not None:
+                failed_usis.extend(usis)
+            return []
+
+    def _get_group_evidences(
+        self, usis: List[str], result_type: str, page_size: int
+    ) -> List[Dict]:
+        """
+        Get all the pages of spectra evidences of a group of USIs, fetching the next pages while
+        the current one is received.
+        """
+        headers = {"Accept": "application/JSON"}
+        params = [("usi", usi) for usi in usis]
+        if result_type:
+            params.append(("resultType", result_type))
+
+        def get_page(page):
+            query = urlencode(params + [("pageSize", page_size), ("page", page)])
+            url = self.api_base_url + "spectra?" + query
+            return get_page_results(Util.get_api_call(url, headers).json())
+
+        return list(iter_pages(get_page, page_size, prefetch=self.PAGE_PREFETCH))
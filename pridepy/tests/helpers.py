@@ -0,0 +1,27 @@
+from typing import Dict
+
+
+def make_file(
+    index: int = 0, accession: str = "PXD000001", size: int = 10, url_name: str = None
+) -> Dict:
+    """
+    Build a file record of the PRIDE API with its FTP location.
+    :param index: index of the file in its project, its fileName is file<index>.raw
+    :param accession: project accession
+    :param size: fileSizeBytes of the file
+    :param url_name: name of the file in the FTP URL, which names the local file; fileName if None
+    :return: file record in JSON format
+    """
+    file_name = f"file{index}.raw"
+    return {
+        "accession": accession,
+        "fileName": file_name,
+        "fileSizeBytes": size,
+        "publicFileLocations": [
+            {
+                "name": "FTP Protocol",
+                "value": f"ftp://ftp.pride.ebi.ac.uk/pride/data/archive/2012/03/{accession}/"
+                f"{url_name or file_name}",
+            }
+        ],
+    }
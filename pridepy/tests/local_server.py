@@ -0,0 +1,55 @@
+import http.server
+import json
+import threading
+from typing import Dict, Type
+
+
+class LocalHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Request handler of the local test servers, without request logs.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body: bytes, status: int = 200, headers: Dict[str, str] = None):
+        """
+        Send a complete response.
+        :param body: response body
+        :param status: HTTP status code
+        :param headers: headers sent before Content-Length
+        """
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data, status: int = 200, headers: Dict[str, str] = None):
+        self.send_body(json.dumps(data).encode(), status, headers)
+
+
+class LocalServer:
+    """
+    HTTP server on a free local port, answering from a background thread. It is started when
+    created and stopped with stop() (e.g. in tearDown) or at the end of a with block.
+    """
+
+    def __init__(self, handler: Type[http.server.BaseHTTPRequestHandler]):
+        """
+        :param handler: request handler class
+        """
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
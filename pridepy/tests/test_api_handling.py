@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import httpx
+import pytest
+
+from pridepy.tests.local_server import LocalHandler, LocalServer
+from pridepy.util.api_handling import Util
+
+RECORDS = [{"fileName": f"file{i}.raw", "description": "µ" * (i % 7)} for i in range(20000)]
+
+
+class CountingHandler(LocalHandler):
+    protocol_version = "HTTP/1.1"  # Keep the connections alive
+    connections = set()
+
+    def do_GET(self):
+        CountingHandler.connections.add(self.client_address)
+        self.send_json({"status": "ok"})
+
+
+class TestApiHandling(TestCase):
+    """
+    A test class to test the shared HTTP session of the API calls against a local server.
+    """
+
+    def setUp(self):
+        CountingHandler.connections = set()
+        self.server = LocalServer(CountingHandler)
+        self.url = self.server.url + "status"
+
+    def tearDown(self):
+        Util.configure_http()  # Close the connections to the local server
+        self.server.stop()
+
+    def test_connection_reuse(self):
+        """
+        Successive API calls reuse the same kept-alive connection.
+        """
+        for _ in range(5):
+            assert Util.get_api_call(self.url).json() == {"status": "ok"}
+        assert len(CountingHandler.connections) == 1
+
+    def test_configure_http(self):
+        """
+        A new configuration replaces the shared session.
+        """
+        session = Util.get_http_session()
+        Util.configure_http(pool_maxsize=Util.HTTP_POOL_MAXSIZE)
+        assert Util.get_http_session() is not session
+
+
+class RecordsHandler(LocalHandler):
+    truncated = False
+
+    def do_GET(self):
+        body = json.dumps(RECORDS, indent=2, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # A truncated response ends with the connection before its Content-Length, after more
+        # than one stream chunk
+        self.wfile.write(body[:-100000] if RecordsHandler.truncated else body)
+
+
+class TestStreamResponseToFile(TestCase):
+    """
+    A test class to test the metadata stream writer against a local server.
+    """
+
+    def setUp(self):
+        self.server = LocalServer(RecordsHandler)
+        self.url = self.server.url + "files/all"
+
+    def tearDown(self):
+        RecordsHandler.truncated = False
+        self.server.stop()
+
+    def test_json_and_ndjson(self):
+        """
+        The json output is the response as received, the ndjson output has one record per line.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            json_file = os.path.join(folder, "files.json")
+            ndjson_file = os.path.join(folder, "files.ndjson")
+            asyncio.run(
+                Util.stream_response_to_file(json_file, len(RECORDS), '"fileName"', self.url)
+            )
+            asyncio.run(
+                Util.stream_response_to_file(
+                    ndjson_file, len(RECORDS), '"fileName"', self.url, output_format="ndjson"
+                )
+            )
+            with open(json_file, encoding="utf-8") as f:
+                assert json.load(f) == RECORDS
+            with open(ndjson_file, encoding="utf-8") as f:
+                assert [json.loads(line) for line in f] == RECORDS
+
+    def test_parquet_truncated(self):
+        """
+        The records received before a failed stream are kept in a readable Parquet file.
+        """
+        pq = pytest.importorskip("pyarrow.parquet")
+        RecordsHandler.truncated = True
+        with tempfile.TemporaryDirectory() as folder:
+            parquet_file = os.path.join(folder, "files.parquet")
+            with self.assertRaises(httpx.HTTPError):
+                asyncio.run(
+                    Util.stream_response_to_file(
+                        parquet_file, len(RECORDS), '"fileName"', self.url, output_format="parquet"
+                    )
+                )
+            file_names = pq.read_table(parquet_file).column("fileName").to_pylist()
+            assert 0 < len(file_names) < len(RECORDS)
+            assert file_names == [record["fileName"] for record in RECORDS[: len(file_names)]]
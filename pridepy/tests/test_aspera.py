@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from pridepy.files.files import Files
+
+
+class TestAspera(TestCase):
+    """
+    A test class to test the parallel Aspera sessions helpers.
+    """
+
+    def test_bandwidth(self):
+        assert Files._parse_aspera_bandwidth("100M") == 100000
+        assert Files._parse_aspera_bandwidth("500k") == 500
+        assert Files._parse_aspera_bandwidth("1G") == 1000000
+        assert Files._parse_aspera_bandwidth("2500") == 2500
+        with self.assertRaises(ValueError):
+            Files._parse_aspera_bandwidth("fast")
+
+    def test_progress(self):
+        line = "PXD000001.raw                                 45%  120MB  9.9Mb/s    00:12 ETA"
+        assert Files._parse_aspera_progress(line) == 45
+        assert Files._parse_aspera_progress("Completed: 1048576K bytes transferred") is None
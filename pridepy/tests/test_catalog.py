@@ -0,0 +1,70 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from pridepy.project.catalog import ProjectCatalog
+
+PROJECTS = [
+    {
+        "accession": "PXD000001",
+        "title": "Human pancreas proteome",
+        "projectDescription": "Deep proteome of the human pancreas",
+        "submissionDate": "2012-03-07",
+        "downloadCount": 10,
+        "organisms": [{"@type": "CvParam", "accession": "NEWT:9606", "name": "Homo sapiens"}],
+        "organismsPart": [{"@type": "CvParam", "name": "Pancreas"}],
+        "projectTags": ["ProteomeTools"],
+    },
+    {
+        "accession": "PXD000002",
+        "title": "Mouse liver phosphoproteome",
+        "projectDescription": "Phosphorylation sites in the liver of the mouse",
+        "submissionDate": "2013-05-01",
+        "downloadCount": 50,
+        "organisms": [{"@type": "CvParam", "name": "Mus musculus"}],
+        "organismsPart": [{"@type": "CvParam", "name": "Liver"}],
+    },
+    {
+        "accession": "PXD000003",
+        "title": "Human liver proteome",
+        "projectDescription": "Proteome of the human liver",
+        "submissionDate": "2014-01-10",
+        "downloadCount": 5,
+        "organisms": [{"@type": "CvParam", "name": "Homo sapiens"}],
+        "organismsPart": [{"@type": "CvParam", "name": "Liver"}],
+    },
+]
+
+
+class TestCatalog(TestCase):
+    """
+    A test class to test the offline project catalog.
+    """
+
+    def test_search(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with ProjectCatalog(os.path.join(folder, "projects.sqlite")) as catalog:
+                assert catalog.build(iter(PROJECTS)) == 3
+
+                def accessions(*args, **kwargs):
+                    return [project["accession"] for project in catalog.search(*args, **kwargs)]
+
+                assert accessions("human") == ["PXD000003", "PXD000001"]
+                assert accessions("human", "organismsPart==liver") == ["PXD000003"]
+                assert accessions("", "organisms==Homo sapiens,projectTags==proteometools") == [
+                    "PXD000001"
+                ]
+                assert accessions("proteome", sort_fields="downloadCount") == [
+                    "PXD000001",
+                    "PXD000003",
+                ]
+                assert accessions(
+                    "*", sort_direction="ASC", sort_fields="accession", page_size=2
+                ) == [
+                    "PXD000001",
+                    "PXD000002",
+                ]
+                assert accessions("*", page_size=2, page=1, sort_fields="accession") == [
+                    "PXD000001"
+                ]
+                assert accessions('"unbalanced') == []
@@ -0,0 +1,67 @@
+import hashlib
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+from pridepy.files.checksum import ChecksumVerifier, ChecksumWriter, StreamingChecksum
+
+
+class TestChecksum(TestCase):
+    """
+    A test class to test the verification of downloaded files against the project checksums.
+    """
+
+    def test_checksum_file(self):
+        """
+        The algorithm is inferred from the checksum length and invalid lines are ignored.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            checksum_file = os.path.join(folder, "PXD000001-checksum.tsv")
+            with open(checksum_file, "w") as f:
+                f.write("fileName\tchecksum\n")
+                f.write("file1.raw\t" + hashlib.sha1(b"a").hexdigest() + "\n")
+                f.write("file2.raw\t" + hashlib.md5(b"b").hexdigest().upper() + "\n")
+                f.write("file3.raw\tnot-a-checksum\n")
+
+            verifier = ChecksumVerifier.from_checksum_file(checksum_file)
+            assert sorted(verifier.checksums) == ["file1.raw", "file2.raw"]
+            assert verifier.new_checksum("file1.raw").algorithm == "sha1"
+            assert verifier.new_checksum("file2.raw").algorithm == "md5"
+            assert verifier.new_checksum("file3.raw") is None
+
+    def test_resumed_download(self):
+        """
+        The part of a resumed file already on disk is hashed with the bytes received afterwards.
+        """
+        data = os.urandom(100000)
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "file.raw")
+            with open(file_path, "wb") as f:
+                f.write(data[:40000])
+
+            checksum = StreamingChecksum(hashlib.sha256(data).hexdigest())
+            checksum.update_from_file(file_path, 40000)
+            checksum.update(data[40000:])
+            assert checksum.matches()
+
+    def test_mismatch(self):
+        """
+        A file that does not match its checksum is removed and reported once.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "file.raw")
+            verifier = ChecksumVerifier({"file.raw": hashlib.md5(b"expected").hexdigest()})
+
+            target = io.BytesIO()
+            checksum = verifier.new_checksum("file.raw")
+            writer = ChecksumWriter(target, checksum)
+            writer.write(b"corrupt")
+            assert not writer.seekable()
+            with open(file_path, "wb") as f:
+                f.write(target.getvalue())
+
+            assert not verifier.check("file.raw", file_path, checksum)
+            assert not os.path.exists(file_path)
+            assert verifier.pop_mismatches() == ["file.raw"]
+            assert verifier.pop_mismatches() == []
@@ -0,0 +1,281 @@
+import ftplib
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase, mock
+
+from pridepy.files.files import Files
+from pridepy.files.segments import SegmentState
+from pridepy.tests.helpers import make_file
+
+DATA = os.urandom(100000)
+
+
+class FakeDataConnection:
+    """
+    Data connection of a transfer started at offset rest. It is reset when it reaches one of the
+    break offsets, so the transfers started at a break always fail.
+    """
+
+    def __init__(self, rest: int, breaks=()):
+        self.position = rest or 0
+        self.breaks = breaks
+        self.close = mock.Mock()
+
+    def recv(self, size):
+        if self.position in self.breaks:
+            raise ConnectionResetError("Connection reset by peer")
+        ends = [self.position + size, len(DATA)] + [b for b in self.breaks if b > self.position]
+        data = DATA[self.position : min(ends)]
+        self.position += len(data)
+        return data
+
+
+class FakeFTP:
+    """
+    FTP client serving DATA for every path, recording the commands and the REST offsets of the
+    retrbinary and transfercmd transfers. The retrbinary transfer is aborted after fail_after bytes
+    if given, the transfercmd ones at the break offsets.
+    """
+
+    def __init__(self, rest_supported: bool = True, fail_after: int = None, breaks=()):
+        self.rest_supported = rest_supported
+        self.fail_after = fail_after
+        self.breaks = breaks
+        self.commands = []
+        self.transfers = []
+        self.quit = mock.Mock()
+        self.close = mock.Mock()
+
+    def voidcmd(self, cmd):
+        return "200 Type set to I"
+
+    def size(self, path):
+        return len(DATA)
+
+    def retrbinary(self, cmd, callback, blocksize=8192, rest=None):
+        self.commands.append((cmd, rest))
+        if rest is not None and not self.rest_supported:
+            raise ftplib.error_perm("502 Command not implemented")
+        for start in range(rest or 0, len(DATA), blocksize):
+            if self.fail_after is not None and start >= self.fail_after:
+                raise ftplib.error_temp("426 Connection closed; transfer aborted")
+            callback(DATA[start : start + blocksize])
+
+    def transfercmd(self, cmd, rest=None):
+        self.transfers.append((cmd, rest))
+        return FakeDataConnection(rest, self.breaks)
+
+
+class FakeProgress:
+    """
+    tqdm progress bar recording its total and the sum of its updates.
+    """
+
+    def __init__(self, total=None, **kwargs):
+        self.total = total
+        self.n = 0
+        self._lock = threading.Lock()
+
+    def update(self, n):
+        with self._lock:
+            self.n += n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class TestFtp(TestCase):
+    """
+    A test class to test the FTP downloads against a fake FTP client.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_skipped_files_reuse_connection(self):
+        """
+        Files already downloaded are skipped without losing the FTP connection.
+        """
+        files = [make_file(i, size=len(DATA)) for i in range(4)]
+        for file in files:
+            with open(os.path.join(self.folder.name, file["fileName"]), "wb") as f:
+                f.write(DATA)
+
+        ftp = FakeFTP()
+        with mock.patch.object(Files, "_connect_ftp", return_value=ftp) as connect:
+            Files.download_files_from_ftp(files, self.folder.name, skip_if_downloaded_already=True)
+        assert connect.call_count == 1
+        assert ftp.quit.call_count == 1
+        assert ftp.commands == []
+
+        with mock.patch.object(Files, "_connect_ftp", return_value=ftp) as connect:
+            Files.download_files_from_ftp(
+                files, self.folder.name, skip_if_downloaded_already=True, workers=2
+            )
+        assert connect.call_count <= 2  # At most one connection per worker of the pool
+
+    def test_resume_with_rest(self):
+        """
+        A partial file is resumed with the REST offset given to retrbinary, right before RETR.
+        """
+        local_path = os.path.join(self.folder.name, "file0.raw")
+        with open(local_path, "wb") as f:
+            f.write(DATA[:30000])
+        ftp = FakeFTP()
+        Files._retrieve_ftp_file(ftp, "file0.raw", local_path, len(DATA))
+        assert ftp.commands == [("RETR file0.raw", 30000)]
+        with open(local_path, "rb") as f:
+            assert f.read() == DATA
+
+    def test_resume_without_rest(self):
+        """
+        A server that does not support REST sends the whole file, which replaces the partial one.
+        """
+        local_path = os.path.join(self.folder.name, "file0.raw")
+        with open(local_path, "wb") as f:
+            f.write(DATA[:30000])
+        ftp = FakeFTP(rest_supported=False)
+        Files._retrieve_ftp_file(ftp, "file0.raw", local_path, len(DATA))
+        assert ftp.commands == [("RETR file0.raw", 30000), ("RETR file0.raw", None)]
+        with open(local_path, "rb") as f:
+            assert f.read() == DATA
+
+    def test_download_ftp_urls_reconnect(self):
+        """
+        A failed transfer of a PX FTP URL closes its connection, and the next attempt resumes the
+        file over a new one.
+        """
+        failing, working = FakeFTP(fail_after=40000), FakeFTP()
+        with mock.patch.object(Files, "_connect_ftp", side_effect=[failing, working]):
+            Files.download_ftp_urls(
+                ["ftp://ftp.example.org/data/file0.raw"], self.folder.name, False
+            )
+        assert failing.close.call_count == 1
+        assert working.commands == [("RETR data/file0.raw", 40960)]
+        assert working.quit.call_count == 1
+        with open(os.path.join(self.folder.name, "file0.raw"), "rb") as f:
+            assert f.read() == DATA
+
+    def _download_segmented(self, breaks=()):
+        """
+        Download a file in 4 segments, every connection being a new FakeFTP.
+        :return: the connections
+        """
+        connections = []
+
+        def connect(host=None):
+            connections.append(FakeFTP(breaks=breaks))
+            return connections[-1]
+
+        min_segment_size = mock.patch.object(SegmentState, "MIN_SEGMENT_SIZE", len(DATA) // 10)
+        sleep = mock.patch("pridepy.files.files.time.sleep")
+        with (
+            min_segment_size,
+            sleep,
+            mock.patch.object(Files, "_connect_ftp", side_effect=connect),
+        ):
+            Files._download_file_from_ftp(
+                None, make_file(0, size=len(DATA)), self.folder.name, False, segments=4
+            )
+        return connections
+
+    def test_segmented(self):
+        """
+        Every segment is downloaded with REST at its offset and written in place.
+        """
+        connections = self._download_segmented()
+        transfers = sorted(transfer for ftp in connections for transfer in ftp.transfers)
+        assert transfers == [
+            ("RETR pride/data/archive/2012/03/PXD000001/file0.raw", offset)
+            for offset in (0, 25000, 50000, 75000)
+        ]
+        local_path = os.path.join(self.folder.name, "file0.raw")
+        assert not SegmentState.exists(local_path)
+        with open(local_path, "rb") as f:
+            assert f.read() == DATA
+
+    def test_segmented_give_up_and_resume(self):
+        """
+        Segments that keep failing make the file fail after the download attempts, with its state
+        kept, and the next run only downloads the missing byte ranges.
+        """
+        breaks = (5000, 30000, 55000, 80000)
+        local_path = os.path.join(self.folder.name, "file0.raw")
+        with self.assertLogs(level="ERROR") as logs:
+            self._download_segmented(breaks=breaks)
+        assert any(f"Giving up on {local_path} after 3 attempts" in line for line in logs.output)
+        assert SegmentState.exists(local_path)
+        assert not Files._is_downloaded(make_file(0, size=len(DATA)), local_path)
+
+        connections = self._download_segmented()
+        assert sorted(rest for ftp in connections for _, rest in ftp.transfers) == list(breaks)
+        assert not SegmentState.exists(local_path)
+        with open(local_path, "rb") as f:
+            assert f.read() == DATA
+
+    def test_segmented_fallback(self):
+        """
+        A file too small to be split is downloaded in a single stream.
+        """
+        ftp = FakeFTP()
+        Files._download_file_from_ftp(
+            ftp, make_file(0, size=len(DATA)), self.folder.name, False, segments=4
+        )
+        assert ftp.commands == [("RETR pride/data/archive/2012/03/PXD000001/file0.raw", None)]
+        assert ftp.transfers == []
+        with open(os.path.join(self.folder.name, "file0.raw"), "rb") as f:
+            assert f.read() == DATA
+
+    def test_pool(self):
+        """
+        The workers of the pool share the queue of files, reuse their connection from one file to
+        the next and replace it after a failed transfer, which is then resumed. The progress bar
+        counts the bytes of the whole batch once.
+        """
+        files = [make_file(i, size=len(DATA)) for i in range(6)]
+        connections = []
+        lock = threading.Lock()
+
+        class SlowFTP(FakeFTP):
+            def retrbinary(self, cmd, callback, blocksize=8192, rest=None):
+                time.sleep(0.05)  # Long enough for every worker to take a file
+                super().retrbinary(cmd, callback, blocksize, rest)
+
+        def connect(host=None):
+            with lock:
+                # The first connection fails in the middle of its first file
+                connections.append(SlowFTP(fail_after=None if connections else 40000))
+                return connections[-1]
+
+        pbars = []
+
+        def progress(*args, **kwargs):
+            pbars.append(FakeProgress(*args, **kwargs))
+            return pbars[-1]
+
+        connect_ftp = mock.patch.object(Files, "_connect_ftp", side_effect=connect)
+        with connect_ftp, mock.patch("pridepy.files.files.tqdm", side_effect=progress):
+            Files.download_files_from_ftp(files, self.folder.name, False, workers=3)
+
+        assert len(connections) == 4  # One per worker, and one to replace the failed connection
+        assert connections[0].close.call_count == 1
+        assert all(ftp.quit.call_count == 1 for ftp in connections[1:])
+        retrieved = [cmd for ftp in connections for cmd, _ in ftp.commands]
+        assert len(retrieved) == 7  # Every file once, and the failed one again
+        assert len(set(retrieved)) == 6
+        assert all(ftp.commands for ftp in connections[:3])  # Every worker took files
+        resumed = [rest for ftp in connections[1:] for _, rest in ftp.commands if rest]
+        assert resumed == [40960]  # Resumed after the bytes received before the failure
+        for file in files:
+            with open(os.path.join(self.folder.name, file["fileName"]), "rb") as f:
+                assert f.read() == DATA
+        assert len(pbars) == 1
+        assert pbars[0].total == pbars[0].n == 6 * len(DATA)
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import re
+import tempfile
+from unittest import TestCase, mock
+
+from pridepy.files.checksum import StreamingChecksum
+from pridepy.files.files import Files
+from pridepy.files.http_engine import HttpDownloadEngine, HttpTransfer
+from pridepy.tests.local_server import LocalHandler, LocalServer
+
+DATA = os.urandom(300000)
+
+
+class RangeHandler(LocalHandler):
+    def do_GET(self):
+        if self.path.endswith("missing.raw"):
+            self.send_body(b"", 404)
+            return
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(DATA) - 1
+            content_range = {"Content-Range": f"bytes {start}-{end}/{len(DATA)}"}
+            self.send_body(DATA[start : end + 1], 206, content_range)
+        else:
+            self.send_body(DATA)
+
+
+class TestHttpEngine(TestCase):
+    """
+    A test class to test the HTTP download engine against a local server.
+    """
+
+    def setUp(self):
+        self.server = LocalServer(RangeHandler)
+        self.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_download_all(self):
+        """
+        Partial files are resumed, hashed with the part already on disk, and failures are reported
+        per transfer.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "file0.raw"), "wb") as f:
+                f.write(DATA[:100000])
+
+            expected = hashlib.sha1(DATA).hexdigest()
+            transfers = [
+                HttpTransfer(
+                    self.base_url + f"file{i}.raw",
+                    os.path.join(folder, f"file{i}.raw"),
+                    checksum=StreamingChecksum(expected),
+                )
+                for i in range(3)
+            ]
+            transfers.append(
+                HttpTransfer(self.base_url + "missing.raw", os.path.join(folder, "missing.raw"))
+            )
+            HttpDownloadEngine(max_concurrency=2).run(transfers)
+
+            for transfer in transfers[:3]:
+                assert transfer.error is None
+                assert transfer.checksum.matches()
+                with open(transfer.local_path, "rb") as f:
+                    assert f.read() == DATA
+            assert transfers[3].error is not None
+
+    def test_download_private_files(self):
+        """
+        Private files are selected from a single listing by category and name pattern, and a
+        failed file does not stop the others.
+        """
+        listing = [
+            {"fileName": name, "fileCategory": {"value": category}, "fileSizeBytes": len(DATA)}
+            for name, category in [
+                ("a.raw", "RAW"),
+                ("b.raw", "RAW"),
+                ("missing.raw", "RAW"),
+                ("c.mzid", "RESULT"),
+                ("d.txt", "RAW"),
+            ]
+        ]
+        for file in listing:
+            file["_links"] = {"download": {"href": self.base_url + file["fileName"]}}
+
+        list_files = mock.patch(
+            "pridepy.files.files.Project.iter_private_files_by_accession",
+            return_value=iter(listing),
+        )
+        with tempfile.TemporaryDirectory() as folder, list_files as iter_private_files:
+            errors = Files().download_private_files(
+                "PXD000001",
+                folder,
+                "user",
+                "pass",
+                categories=["RAW"],
+                file_patterns=["*.raw"],
+                workers=2,
+            )
+            assert iter_private_files.call_count == 1
+            assert sorted(os.listdir(folder)) == ["a.raw", "b.raw"]
+            with open(os.path.join(folder, "b.raw"), "rb") as f:
+                assert f.read() == DATA
+            assert list(errors) == ["missing.raw"]
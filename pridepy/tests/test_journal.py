@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import tempfile
+from unittest import TestCase
+
+from pridepy.files.files import Files
+from pridepy.files.journal import TransferJournal
+
+
+class TestJournal(TestCase):
+    """
+    A test class to test the transfer journal of batch downloads.
+    """
+
+    @staticmethod
+    def file_record(file_name, size, accession="PXD000001"):
+        return {"accession": accession, "fileName": file_name, "fileSizeBytes": size}
+
+    def test_pending_files(self):
+        """
+        Complete files are done, truncated and missing files are still pending.
+        """
+        files = [self.file_record(f"file{i}.raw", 100) for i in range(3)]
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "file0.raw"), "wb") as f:
+                f.write(b"0" * 100)
+            with open(os.path.join(folder, "file1.raw"), "wb") as f:
+                f.write(b"1" * 40)
+
+            with TransferJournal(folder) as journal:
+                journal.add_files("PXD000001", files)
+                journal.refresh("PXD000001", files)
+                pending = journal.pending_files("PXD000001", files)
+                assert [file["fileName"] for file in pending] == ["file1.raw", "file2.raw"]
+                assert journal.summary("PXD000001", files) == {
+                    "pending": 1,
+                    "partial": 1,
+                    "done": 1,
+                }
+
+    def test_plan(self):
+        """
+        The file list of a planned batch is reloaded from the journal by a new process.
+        """
+        files = [self.file_record(f"file{i}.raw", 100) for i in range(3)]
+        with tempfile.TemporaryDirectory() as folder:
+            with TransferJournal(folder) as journal:
+                assert journal.load_plan("PXD000001", "RAW") is None
+                journal.save_plan("PXD000001", "RAW", files)
+
+            with TransferJournal(folder) as journal:
+                assert journal.load_plan("PXD000001", "RAW") == files
+                assert journal.load_plan("PXD000001", "RAW,SEARCH") is None
+
+    def test_projects_with_same_file_names(self):
+        """
+        Files of two projects with the same name keep their own rows and plans.
+        """
+        files = [self.file_record("file0.raw", 100)]
+        other_files = [self.file_record("file0.raw", 200, "PXD000002")]
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "file0.raw"), "wb") as f:
+                f.write(b"0" * 100)
+
+            with TransferJournal(folder) as journal:
+                journal.save_plan("PXD000001", "RAW", files)
+                journal.save_plan("PXD000002", "RAW", other_files)
+                journal.refresh("PXD000001", files)
+                journal.refresh("PXD000002", other_files)
+                assert journal.pending_files("PXD000001", files) == []
+                assert journal.pending_files("PXD000002", other_files) == other_files
+                assert journal.load_plan("PXD000001", "RAW") == files
+                assert journal.load_plan("PXD000002", "RAW") == other_files
+
+    def test_old_schema(self):
+        """
+        A journal keyed by file name only is rebuilt.
+        """
+        files = [self.file_record("file0.raw", 100)]
+        with tempfile.TemporaryDirectory() as folder:
+            conn = sqlite3.connect(os.path.join(folder, TransferJournal.JOURNAL_NAME))
+            with conn:
+                conn.execute("CREATE TABLE files (file_name TEXT PRIMARY KEY, accession TEXT)")
+            conn.close()
+
+            with TransferJournal(folder) as journal:
+                journal.save_plan("PXD000001", "RAW", files)
+                assert journal.load_plan("PXD000001", "RAW") == files
+
+    def test_planned_file_list_refresh(self):
+        """
+        The recorded file list is used by a rerun, unless the listing is refreshed.
+        """
+        files = [self.file_record("file0.raw", 100)]
+        new_files = files + [self.file_record("file1.raw", 100)]
+        with tempfile.TemporaryDirectory() as folder:
+            file_list = Files._get_planned_file_list("PXD000001", folder, ["RAW"], lambda: files)
+            assert file_list == files
+            file_list = Files._get_planned_file_list(
+                "PXD000001", folder, ["RAW"], lambda: new_files
+            )
+            assert file_list == files
+            file_list = Files._get_planned_file_list(
+                "PXD000001", folder, ["RAW"], lambda: new_files, refresh=True
+            )
+            assert file_list == new_files
+            file_list = Files._get_planned_file_list("PXD000001", folder, ["RAW"], lambda: files)
+            assert file_list == new_files
@@ -0,0 +1,53 @@
+import json
+from unittest import TestCase
+
+from pridepy.util.json_stream import JsonStreamParser
+
+
+class TestJsonStream(TestCase):
+    """
+    A test class to test the incremental parser of streamed JSON responses.
+    """
+
+    def test_array_in_chunks(self):
+        """
+        The elements of an array are the same whatever the chunk boundaries are.
+        """
+        records = [
+            {"fileName": f"file{i}.raw", "fileSizeBytes": i * 1000, "checksum": None}
+            for i in range(20)
+        ]
+        document = json.dumps(records + [12345, "text, with ] and ,", True], indent=1)
+        for chunk_size in (1, 7, 64, len(document)):
+            parser = JsonStreamParser()
+            items = []
+            for start in range(0, len(document), chunk_size):
+                items.extend(parser.feed(document[start : start + chunk_size]))
+            items.extend(parser.close())
+            assert parser.is_array
+            assert items == records + [12345, "text, with ] and ,", True]
+
+    def test_elements_before_end(self):
+        """
+        An element is returned as soon as it is complete, before the end of the stream.
+        """
+        parser = JsonStreamParser()
+        assert parser.feed('[{"a": 1}, {"b"') == [{"a": 1}]
+        assert parser.feed(": 2}]") == [{"b": 2}]
+        assert parser.close() == []
+
+    def test_document(self):
+        """
+        A document that is not an array is returned when the stream is closed, and a truncated
+        array is an error.
+        """
+        parser = JsonStreamParser()
+        assert parser.feed('{"_embedded": {"files": [') == []
+        assert parser.feed("]}}") == []
+        assert parser.close() == [{"_embedded": {"files": []}}]
+        assert not parser.is_array
+
+        parser = JsonStreamParser()
+        parser.feed('[{"a": 1}, {"b": 2')
+        with self.assertRaises(ValueError):
+            parser.close()
@@ -0,0 +1,65 @@
+import tempfile
+from unittest import TestCase
+
+from pridepy.tests.local_server import LocalHandler, LocalServer
+from pridepy.util.metadata_cache import MetadataCache
+
+FILES = [{"fileName": f"file{i}.raw", "fileCategory": {"value": "RAW"}} for i in range(100)]
+ETAG = '"v1"'
+
+
+class ListingHandler(LocalHandler):
+    requests = []
+
+    def do_GET(self):
+        ListingHandler.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_json(FILES, headers={"ETag": ETAG})
+
+
+class TestMetadataCache(TestCase):
+    """
+    A test class to test the metadata cache against a local server.
+    """
+
+    def setUp(self):
+        ListingHandler.requests = []
+        self.server = LocalServer(ListingHandler)
+        self.url = self.server.url + "projects/PXD000001/files/all"
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_iter_json(self):
+        """
+        A fresh listing is served from disk, an expired one is revalidated with its ETag, and refresh
+        downloads it again.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            cache = MetadataCache(cache_dir=folder)
+            assert list(cache.iter_json(self.url, accession="PXD000001")) == FILES
+            assert list(cache.iter_json(self.url, accession="PXD000001")) == FILES
+            assert ListingHandler.requests == [None]
+
+            expired = MetadataCache(cache_dir=folder, ttl=0)
+            assert list(expired.iter_json(self.url, accession="PXD000001")) == FILES
+            assert ListingHandler.requests == [None, ETAG]
+
+            refresh = MetadataCache(cache_dir=folder, refresh=True)
+            assert list(refresh.iter_json(self.url, accession="PXD000001")) == FILES
+            assert ListingHandler.requests == [None, ETAG, None]
+
+    def test_partial_iteration(self):
+        """
+        A listing that is not read to the end is not kept in the cache.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            cache = MetadataCache(cache_dir=folder)
+            iterator = cache.iter_json(self.url, accession="PXD000001")
+            assert next(iterator) == FILES[0]
+            iterator.close()
+            assert cache.get_json(self.url, accession="PXD000001") == FILES
+            assert ListingHandler.requests == [None, None]
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from pridepy.util.pagination import aiter_pages, iter_pages
+
+RESULTS = list(range(95))
+
+
+class PagedResults:
+    def __init__(self, page_size=10):
+        self.page_size = page_size
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def __call__(self, page):
+        with self._lock:
+            self.pages.append(page)
+        time.sleep(0.02)
+        return RESULTS[page * self.page_size : (page + 1) * self.page_size]
+
+
+class TestPagination(TestCase):
+    """
+    A test class to test the prefetching iterators over paged results.
+    """
+
+    def test_iter_pages(self):
+        get_page = PagedResults()
+        start = time.monotonic()
+        assert list(iter_pages(get_page, 10, prefetch=4)) == RESULTS
+        # Pages are fetched in parallel, and not far beyond the last one
+        assert time.monotonic() - start < 10 * 0.02
+        assert max(get_page.pages) <= 9 + 4
+
+    def test_iter_pages_limit(self):
+        get_page = PagedResults()
+        assert list(iter_pages(get_page, 10, prefetch=2, limit=25)) == RESULTS[:25]
+        assert sorted(get_page.pages) == [0, 1, 2]
+
+    def test_aiter_pages(self):
+        async def collect():
+            return [result async for result in aiter_pages(PagedResults(), 10, limit=42)]
+
+        assert asyncio.run(collect()) == RESULTS[:42]
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import pytest
+
+from pridepy.util.parquet_writer import ParquetRecordWriter, flatten_record
+
+RECORD = {
+    "accession": "PXF00000001",
+    "fileName": "file1.raw",
+    "fileSizeBytes": 1024,
+    "fileCategory": {"@type": "CvParam", "accession": "PRIDE:0000404", "value": "RAW"},
+    "publicFileLocations": [
+        {"name": "FTP Protocol", "value": "ftp://ftp.pride.ebi.ac.uk/file1.raw"},
+        {"name": "Aspera Protocol", "value": "prd_ascp@fasp.ebi.ac.uk:file1.raw"},
+    ],
+    "projectAccessions": ["PXD000001"],
+}
+
+PROJECT = {
+    "accession": "PXD000001",
+    "title": "TMT spikes -  Using R and Bioconductor for proteomics data analysis",
+    "submissionDate": "2012-03-07",
+    "instruments": [
+        {
+            "@type": "CvParam",
+            "cvLabel": "MS",
+            "accession": "MS:1001742",
+            "name": "LTQ Orbitrap Velos",
+            "value": None,
+        }
+    ],
+    "organisms": [
+        {
+            "@type": "CvParam",
+            "cvLabel": "NEWT",
+            "accession": "NEWT:562",
+            "name": "Escherichia coli",
+            "value": None,
+        }
+    ],
+    "softwares": [
+        {"@type": "CvParam", "cvLabel": "MS", "name": "Proteome Discoverer", "value": "1.3"}
+    ],
+    "additionalAttributes": [
+        {"@type": "CvParam", "cvLabel": "PRIDE", "name": "Submitter keyword", "value": "TMT"},
+        {"@type": "CvParam", "cvLabel": "PRIDE", "name": "Submitter keyword", "value": "R"},
+    ],
+    "submitters": [{"title": "Dr", "firstName": "Laurent", "lastName": "Gatto"}],
+}
+
+
+class TestParquetWriter(TestCase):
+    """
+    A test class to test the Parquet export of the metadata records.
+    """
+
+    def test_flatten_record(self):
+        columns = flatten_record(RECORD)
+        assert columns["fileCategory.value"] == "RAW"
+        assert columns["publicFileLocations.FTP Protocol"].startswith("ftp://")
+        assert columns["projectAccessions"] == '["PXD000001"]'
+        assert columns["fileSizeBytes"] == 1024
+
+    def test_flatten_project(self):
+        """
+        CV param lists of a project record keep their values, including params with the same name.
+        """
+        columns = flatten_record(PROJECT)
+        assert not any(column.startswith("instruments.") for column in columns)
+        assert json.loads(columns["instruments"])[0]["name"] == "LTQ Orbitrap Velos"
+        keywords = json.loads(columns["additionalAttributes"])
+        assert [param["value"] for param in keywords] == ["TMT", "R"]
+
+    def test_write(self):
+        """
+        Values of a mismatched type and columns that only appear after the first batch are kept in
+        the extra column.
+        """
+        pq = pytest.importorskip("pyarrow.parquet")
+        with tempfile.TemporaryDirectory() as folder:
+            out_file = os.path.join(folder, "files.parquet")
+            writer = ParquetRecordWriter(out_file, batch_rows=3)
+            records = [dict(RECORD, fileName=f"file{i}.raw") for i in range(10)]
+            records[7]["fileSizeBytes"] = "unknown"
+            records[8]["checksum"] = "abc"
+            writer.write(records[:4])
+            writer.write(records[4:])
+            writer.close()
+
+            table = pq.read_table(out_file)
+            assert table.num_rows == 10
+            assert table.column("fileName").to_pylist()[9] == "file9.raw"
+            assert table.column("fileSizeBytes").to_pylist()[7] is None
+            extras = table.column(ParquetRecordWriter.EXTRA_COLUMN).to_pylist()
+            assert json.loads(extras[7]) == {"fileSizeBytes": "unknown"}
+            assert json.loads(extras[8]) == {"checksum": "abc"}
+            assert extras[0] is None
+
+    def test_write_project(self):
+        pq = pytest.importorskip("pyarrow.parquet")
+        with tempfile.TemporaryDirectory() as folder:
+            out_file = os.path.join(folder, "projects.parquet")
+            writer = ParquetRecordWriter(out_file)
+            writer.write([PROJECT])
+            writer.close()
+
+            row = pq.read_table(out_file).to_pylist()[0]
+            assert json.loads(row["organisms"])[0]["name"] == "Escherichia coli"
+            assert row["accession"] == "PXD000001"
@@ -0,0 +1,115 @@
+import tempfile
+from unittest import TestCase, mock
+from urllib.parse import parse_qs, urlparse
+
+from pridepy.authentication.authentication import Authentication
+from pridepy.authentication.token_cache import TokenCache
+from pridepy.project.project import Project
+from pridepy.tests.local_server import LocalHandler, LocalServer
+from pridepy.util.metadata_cache import MetadataCache
+
+PAGE_SIZE = 10
+TOTAL_FILES = 95
+
+
+class PagedFilesHandler(LocalHandler):
+    with_page_metadata = True
+    expired_token = None  # Token rejected from the third page on
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        number = int(query.get("page", ["0"])[0])
+        expired = f"Bearer {PagedFilesHandler.expired_token}"
+        if number >= 2 and self.headers.get("Authorization") == expired:
+            self.send_body(b"", 401)
+            return
+        self._send_page(number)
+
+    def _send_page(self, number):
+        total_pages = (TOTAL_FILES + PAGE_SIZE - 1) // PAGE_SIZE
+        files = [
+            {"fileName": f"file{i}.raw"}
+            for i in range(number * PAGE_SIZE, min((number + 1) * PAGE_SIZE, TOTAL_FILES))
+        ]
+        base = f"http://127.0.0.1:{self.server.server_address[1]}{urlparse(self.path).path}"
+        page = {"_embedded": {"files": files}, "_links": {}}
+        # Like the API, the last pages are empty but still have a next link
+        page["_links"]["next"] = {"href": f"{base}?page={number + 1}&size={PAGE_SIZE}{{&sort}}"}
+        if PagedFilesHandler.with_page_metadata:
+            page["page"] = {"size": PAGE_SIZE, "number": number, "totalPages": total_pages}
+            if number + 1 >= total_pages:
+                del page["_links"]["next"]
+        self.send_json(page)
+
+
+class ProjectHandler(LocalHandler):
+    def do_GET(self):
+        accession = self.path.rsplit("/", 1)[-1]
+        if accession == "PXD999999":
+            self.send_body(b"", 404)
+            return
+        self.send_json({"accession": accession})
+
+
+class TestProject(TestCase):
+    """
+    A test class to test the private file listing against a local server.
+    """
+
+    def setUp(self):
+        self.server = LocalServer(PagedFilesHandler)
+        self.project = Project()
+        self.project.PRIVATE_API_BASE_URL = self.server.url
+
+    def tearDown(self):
+        PagedFilesHandler.with_page_metadata = True
+        PagedFilesHandler.expired_token = None
+        self.server.stop()
+
+    def _list_files(self):
+        with mock.patch(
+            "pridepy.project.project.Authentication.get_cached_token", return_value="token"
+        ):
+            files = self.project.get_private_files_by_accession("PXD000001", "user", "pass", 3)
+        return [file["fileName"] for file in files]
+
+    def test_concurrent_pages(self):
+        """
+        Pages fetched concurrently are reassembled in order.
+        """
+        assert self._list_files() == [f"file{i}.raw" for i in range(TOTAL_FILES)]
+
+    def test_pages_without_metadata(self):
+        """
+        Without page metadata the next links are followed, up to the first empty page.
+        """
+        PagedFilesHandler.with_page_metadata = False
+        assert self._list_files() == [f"file{i}.raw" for i in range(TOTAL_FILES)]
+
+    def test_expired_token(self):
+        """
+        A token that expires while the pages are fetched is replaced by a single new login.
+        """
+        PagedFilesHandler.expired_token = "old"
+        token_cache = mock.patch.object(Authentication, "token_cache", TokenCache(persist=False))
+        login = mock.patch.object(Authentication, "get_token", side_effect=["old", "new"])
+        with token_cache, login as get_token:
+            files = self.project.get_private_files_by_accession("PXD000001", "user", "pass", 3)
+        assert [file["fileName"] for file in files] == [f"file{i}.raw" for i in range(TOTAL_FILES)]
+        assert get_token.call_count == 2
+
+    def test_get_by_accessions(self):
+        """
+        Projects are returned in order, and a failed accession does not stop the others.
+        """
+        accessions = [f"PXD{i:06d}" for i in range(1, 40)] + ["PXD999999", "PXD000001"]
+        with LocalServer(ProjectHandler) as server, tempfile.TemporaryDirectory() as folder:
+            self.project.API_BASE_URL = server.url
+            self.project.metadata_cache = MetadataCache(cache_dir=folder)
+            results = list(self.project.get_by_accessions(accessions, workers=4))
+            unordered = list(self.project.get_by_accessions(accessions, ordered=False))
+
+        assert [accession for accession, _, _ in results] == accessions[:-1]
+        assert all(record == {"accession": a} for a, record, error in results[:-1])
+        assert results[-1][1] is None and "404" in results[-1][2]
+        assert sorted(unordered, key=str) == sorted(results, key=str)
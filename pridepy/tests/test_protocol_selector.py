@@ -0,0 +1,131 @@
+import os
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from pridepy.files.files import Files
+from pridepy.files.protocol_selector import ProtocolSelector
+from pridepy.tests.helpers import make_file
+
+
+class TestProtocolSelector(TestCase):
+    """
+    A test class to test the selection of the fastest download protocol.
+    """
+
+    def test_select(self):
+        """
+        Protocols are ranked by their probe, failed probes are left out and the ranking is reused
+        from the cache of the same network. A failed probe is not cached and runs again.
+        """
+
+        def failed_probe():
+            raise Exception("Connection refused")
+
+        with tempfile.TemporaryDirectory() as folder:
+            cache_path = os.path.join(folder, "protocols.json")
+            probes = {"ftp": lambda: 2e6, "globus": lambda: 5e6, "s3": failed_probe}
+            selector = ProtocolSelector("host/10.0.0.1", cache_path)
+            assert selector.select(probes) == ["globus", "ftp"]
+
+            def unexpected_probe():
+                raise AssertionError("The cached ranking must be used")
+
+            s3_probe = mock.Mock(return_value=1e7)
+            cached_probes = {"ftp": unexpected_probe, "globus": unexpected_probe, "s3": s3_probe}
+            selector = ProtocolSelector("host/10.0.0.1", cache_path)
+            assert selector.select(cached_probes) == ["s3", "globus", "ftp"]
+            s3_probe.assert_called_once()
+
+            selector = ProtocolSelector("host/192.168.0.1", cache_path)
+            assert selector.select({"ftp": lambda: 1e6}) == ["ftp"]
+
+    def test_select_expired(self):
+        """
+        A throughput measured longer than the cache TTL ago is probed again.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            cache_path = os.path.join(folder, "protocols.json")
+            ProtocolSelector("host/10.0.0.1", cache_path).select({"ftp": lambda: 2e6})
+            later = time.time() + ProtocolSelector.CACHE_TTL + 1
+            with mock.patch("pridepy.files.protocol_selector.time.time", return_value=later):
+                selector = ProtocolSelector("host/10.0.0.1", cache_path)
+                selector.select({"ftp": lambda: 3e6})
+            assert selector.speeds == {"ftp": 3e6}
+
+    def test_fallback(self):
+        """
+        A degraded protocol is replaced by the next fastest one until none is left. The demotion
+        only lasts for the batch.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            cache_path = os.path.join(folder, "protocols.json")
+            probes = {"ftp": lambda: 2e6, "globus": lambda: 5e6}
+            selector = ProtocolSelector("host/10.0.0.1", cache_path)
+            selector.select(probes)
+            assert not selector.is_degraded("globus", 4e6)
+            assert selector.is_degraded("globus", 1e6)
+            assert selector.fallback("globus", 1e6) == "ftp"
+            assert selector.fallback("ftp", 0.0) is None
+
+            selector = ProtocolSelector("host/10.0.0.1", cache_path)
+            assert selector.select(probes) == ["globus", "ftp"]
+            assert selector.speeds == {"ftp": 2e6, "globus": 5e6}
+
+    def _download_auto(self, folder, working_protocols, sent=None):
+        used = []
+
+        def download(file_list, output_folder, skip, protocol, **options):
+            used.append(protocol)
+            if sent is not None:
+                sent.append([file["fileName"] for file in file_list])
+            if protocol in working_protocols:
+                for file in file_list:
+                    with open(Files._get_local_path(file, output_folder), "wb") as f:
+                        f.write(b"0" * 10)
+
+        selector = ProtocolSelector("host/10.0.0.1", os.path.join(folder, ".protocols.json"))
+        selector.select({"ftp": lambda: 2e6, "globus": lambda: 5e6})
+        rank_protocols = mock.patch.object(
+            Files, "_rank_protocols", return_value=(selector, selector.ranking())
+        )
+        backend = mock.patch.object(Files, "_download_files_with_protocol", side_effect=download)
+        with rank_protocols, backend:
+            # The local file is named after the download URL, which may differ from fileName
+            files = [make_file(i, url_name=f"FILE{i}.RAW") for i in range(3)]
+            Files._download_files_auto(files, folder, False)
+        return used
+
+    def test_download_auto_fallback(self):
+        """
+        Files that failed are downloaded again with the next protocol, checked at the path the
+        backends write to.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            assert self._download_auto(folder, {"ftp"}) == ["globus", "ftp"]
+            downloaded = sorted(name for name in os.listdir(folder) if name.endswith(".RAW"))
+            assert downloaded == ["FILE0.RAW", "FILE1.RAW", "FILE2.RAW"]
+
+    def test_download_auto_pending(self):
+        """
+        Only the files that are not downloaded yet are handed to the backend.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "FILE1.RAW"), "wb") as f:
+                f.write(b"0" * 10)
+            sent = []
+            assert self._download_auto(folder, {"globus"}, sent) == ["globus"]
+            assert sent == [["file0.raw", "file2.raw"]]
+
+    def test_download_auto_failed(self):
+        """
+        Files that fail with every protocol are reported.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            with self.assertRaisesRegex(Exception, "3 files could not be downloaded"):
+                self._download_auto(folder, set())
+
+    def test_probes_without_ascp(self):
+        with mock.patch.object(Files, "get_ascp_binary", side_effect=OSError("Unsupported OS")):
+            probes = Files._get_protocol_probes(make_file(0))
+        assert set(probes) == {"ftp", "globus", "s3"}
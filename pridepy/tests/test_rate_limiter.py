@@ -0,0 +1,78 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from pridepy.tests.local_server import LocalHandler, LocalServer
+from pridepy.util.api_handling import Util
+from pridepy.util.rate_limiter import TokenBucket
+
+
+class ThrottlingHandler(LocalHandler):
+    requests = 0
+
+    def do_GET(self):
+        ThrottlingHandler.requests += 1
+        if ThrottlingHandler.requests == 1:
+            self.send_body(b"", 429, {"Retry-After": "1"})
+            return
+        self.send_json([])
+
+
+class TestRateLimiter(TestCase):
+    """
+    A test class to test the token bucket shared by the requests to the PRIDE API.
+    """
+
+    def test_rate(self):
+        """
+        Threads and coroutines share the same bucket: after the initial burst, tokens are given at
+        the rate of the bucket.
+        """
+        bucket = TokenBucket(rate=100, capacity=10)
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: bucket.acquire(), range(30)))
+
+        async def acquire_all():
+            await asyncio.gather(*(bucket.acquire_async() for _ in range(20)))
+
+        asyncio.run(acquire_all())
+        elapsed = time.monotonic() - start
+        assert 0.35 <= elapsed < 1.0  # 40 tokens after a burst of 10, at 100 tokens per second
+
+    def test_throttled(self):
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.throttled(retry_after=0.3)
+        assert bucket.rate == 50
+        start = time.monotonic()
+        bucket.acquire()
+        assert time.monotonic() - start >= 0.3
+        for _ in range(200):
+            bucket.succeeded()
+        assert bucket.rate == 100
+
+    def test_parse_retry_after(self):
+        assert TokenBucket.parse_retry_after("2") == 2.0
+        assert TokenBucket.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert TokenBucket.parse_retry_after("soon") is None
+        assert TokenBucket.parse_retry_after(None) is None
+
+    def test_http_request_retry_after(self):
+        """
+        A throttled API call is sent again after the Retry-After of the response.
+        """
+        ThrottlingHandler.requests = 0
+        server = LocalServer(ThrottlingHandler)
+        limiter = Util.API_RATE_LIMITER
+        Util.API_RATE_LIMITER = TokenBucket(rate=20, capacity=20)
+        try:
+            start = time.monotonic()
+            response = Util.get_api_call(server.url)
+            assert response.json() == []
+            assert ThrottlingHandler.requests == 2
+            assert time.monotonic() - start >= 1
+            assert Util.API_RATE_LIMITER.rate < 20
+        finally:
+            Util.API_RATE_LIMITER = limiter
+            server.stop()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import botocore
+
+from pridepy.files.files import Files
+from pridepy.tests.helpers import make_file
+
+DATA = os.urandom(50000)
+
+
+class FakeFuture:
+    """
+    Future of a download of FakeTransferManager, run when its result is requested.
+    """
+
+    def __init__(self, manager, key, fileobj, subscribers, error_code=None):
+        self.manager = manager
+        self.key = key
+        self.fileobj = fileobj
+        self.subscribers = subscribers
+        self.error_code = error_code
+        self.meta = mock.Mock()
+
+    def result(self):
+        for subscriber in self.subscribers:
+            subscriber.on_queued(self)
+        if not self.meta.provide_transfer_size.called:
+            # s3transfer sends a HEAD request when the size of the object is not provided
+            self.manager.head_requests.append(self.key)
+        if self.error_code is not None:
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": self.error_code}}, "GetObject"
+            )
+        if isinstance(self.fileobj, str):
+            with open(self.fileobj, "wb") as f:
+                f.write(DATA)
+        else:
+            self.fileobj.write(DATA)
+        for subscriber in self.subscribers:
+            subscriber.on_progress(self, len(DATA))
+
+
+class FakeTransferManager:
+    """
+    s3transfer TransferManager serving DATA for every key. The first downloads fail with the
+    given error codes.
+    """
+
+    def __init__(self, error_codes=()):
+        self.error_codes = list(error_codes)
+        self.downloads = []
+        self.head_requests = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def download(self, bucket, key, fileobj, subscribers=None):
+        self.downloads.append(key)
+        error_code = self.error_codes.pop(0) if self.error_codes else None
+        return FakeFuture(self, key, fileobj, subscribers or [], error_code)
+
+
+class TestS3(TestCase):
+    """
+    A test class to test the S3 downloads against a stubbed transfer manager.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _download(self, manager, files, workers=1):
+        create_transfer_manager = mock.patch(
+            "pridepy.files.files.create_transfer_manager", return_value=manager
+        )
+        with create_transfer_manager, mock.patch("pridepy.files.files.time.sleep") as sleep:
+            Files.download_files_from_s3(files, self.folder.name, False, workers=workers)
+        return sleep
+
+    def _read(self, file):
+        with open(Files._get_local_path(file, self.folder.name), "rb") as f:
+            return f.read()
+
+    def test_download(self):
+        """
+        The size of the API is given to s3transfer, so a HEAD request is only sent for a file
+        without fileSizeBytes, and the files of the batch share the transfer manager.
+        """
+        files = [make_file(i, size=len(DATA)) for i in range(3)]
+        files[2]["fileSizeBytes"] = None
+        manager = FakeTransferManager()
+        self._download(manager, files, workers=2)
+        assert sorted(manager.downloads) == [Files._get_s3_path(file) for file in files]
+        assert manager.head_requests == [Files._get_s3_path(files[2])]
+        for file in files:
+            assert self._read(file) == DATA
+
+    def test_retry(self):
+        """
+        A failed download is retried after a backoff.
+        """
+        file = make_file(0, size=len(DATA))
+        manager = FakeTransferManager(error_codes=["500", "503"])
+        sleep = self._download(manager, [file])
+        assert len(manager.downloads) == 3
+        assert [call.args[0] for call in sleep.call_args_list] == [1, 2]
+        assert self._read(file) == DATA
+
+    def test_missing_key(self):
+        """
+        A missing object is not retried, and the other files of the batch are downloaded.
+        """
+        files = [make_file(i, size=len(DATA)) for i in range(2)]
+        manager = FakeTransferManager(error_codes=["NoSuchKey"])
+        with self.assertLogs(level="ERROR") as logs:
+            self._download(manager, files)
+        assert len(manager.downloads) == 2
+        assert any(Files._get_s3_path(files[0]) in line for line in logs.output)
+        assert not os.path.exists(Files._get_local_path(files[0], self.folder.name))
+        assert self._read(files[1]) == DATA
@@ -0,0 +1,146 @@
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+from pridepy.files.files import Files
+from pridepy.files.scheduler import ConnectionLimiter
+from pridepy.tests.helpers import make_file
+
+
+class TestScheduler(TestCase):
+    """
+    A test class to test the connection limits shared by the projects of a batch.
+    """
+
+    def test_connection_limiter(self):
+        limiter = ConnectionLimiter(4)
+        peak = {"ftp": 0, "s3": 0}
+        lock = threading.Lock()
+
+        def batch(protocol):
+            with limiter.slots(protocol, "host", 3) as connections:
+                assert 1 <= connections <= 3
+                with lock:
+                    peak[protocol] = max(peak[protocol], limiter.in_use(protocol, "host"))
+                time.sleep(0.01)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(batch, ["ftp", "s3"] * 10))
+
+        # Every protocol and host has its own budget, never exceeded
+        assert 3 <= peak["ftp"] <= 4
+        assert 3 <= peak["s3"] <= 4
+        assert limiter.in_use("ftp", "host") == 0
+
+    def test_connection_limiter_unit(self):
+        """
+        Slots are taken in units, e.g. the segments of a file, and never beyond the budget.
+        """
+        limiter = ConnectionLimiter(8)
+        assert limiter.acquire("ftp", "host", 7, unit=3) == 6
+        acquired = threading.Event()
+        thread = threading.Thread(
+            target=lambda: (limiter.acquire("ftp", "host", 1, unit=3), acquired.set())
+        )
+        thread.start()
+        assert not acquired.wait(0.1)  # 2 free slots are less than a unit
+        limiter.release("ftp", "host", 6)
+        assert acquired.wait(1)
+        thread.join()
+
+        limiter = ConnectionLimiter(4)
+        assert limiter.acquire("ftp", "host", 1, unit=8) == 4  # A unit is capped to the budget
+        assert limiter.acquire("s3", "host", 2, unit=1) == 2
+
+    def test_download_projects(self):
+        """
+        With auto, the connections of the batch are counted against the selected protocol, every
+        segment is a connection, the Aspera bandwidth is split and failed projects are reported.
+        """
+        calls = []
+        lock = threading.Lock()
+
+        def download_files(file_list, accession, folder, skip, protocol, **options):
+            with lock:
+                calls.append((accession, protocol, options))
+            if accession == "PXD000003":
+                return  # Nothing is downloaded
+            for file in file_list:
+                with open(Files._get_local_path(file, folder), "wb") as f:
+                    f.write(b"0" * 10)
+
+        list_files = mock.patch.object(
+            Files,
+            "get_all_category_file_list",
+            side_effect=lambda a, c: [make_file(i, a) for i in range(3)],
+        )
+        rank_protocols = mock.patch.object(
+            Files, "_rank_protocols", return_value=(None, ["globus", "ftp"])
+        )
+        with tempfile.TemporaryDirectory() as folder, list_files, rank_protocols as rank:
+            with mock.patch.object(Files, "download_files", side_effect=download_files):
+                errors = Files().download_projects(
+                    ["PXD000001", "PXD000002", "PXD000003"],
+                    folder,
+                    False,
+                    "auto",
+                    aspera_maximum_bandwidth="90M",
+                    workers=8,
+                    parallel_projects=2,
+                    segments=4,
+                )
+
+        assert rank.call_count == 1
+        assert len(calls) == 3
+        assert list(errors) == ["PXD000003"]
+        for _, protocol, options in calls:
+            assert protocol == "globus"
+            assert options["workers"] * options["segments"] <= 8
+            assert options["aspera_maximum_bandwidth"] == "45000K"
+
+    def test_download_projects_s3(self):
+        """
+        With s3, every part of a file downloaded at the same time is a connection, so the projects
+        together never open more than workers connections.
+        """
+        calls = []
+        in_flight = {"connections": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def download_files(file_list, accession, folder, skip, protocol, **options):
+            connections = options["workers"] * options["s3_max_concurrency"]
+            with lock:
+                calls.append(options)
+                in_flight["connections"] += connections
+                in_flight["peak"] = max(in_flight["peak"], in_flight["connections"])
+            time.sleep(0.05)
+            with lock:
+                in_flight["connections"] -= connections
+            for file in file_list:
+                with open(Files._get_local_path(file, folder), "wb") as f:
+                    f.write(b"0" * 10)
+
+        list_files = mock.patch.object(
+            Files,
+            "get_all_category_file_list",
+            side_effect=lambda a, c: [make_file(i, a) for i in range(3)],
+        )
+        with tempfile.TemporaryDirectory() as folder, list_files:
+            with mock.patch.object(Files, "download_files", side_effect=download_files):
+                errors = Files().download_projects(
+                    [f"PXD{i:06d}" for i in range(1, 7)],
+                    folder,
+                    False,
+                    "s3",
+                    workers=8,
+                    parallel_projects=3,
+                    s3_max_concurrency=4,
+                )
+
+        assert errors == {}
+        assert len(calls) == 6
+        for options in calls:
+            assert options["workers"] * options["s3_max_concurrency"] <= 8
+        assert in_flight["peak"] <= 8
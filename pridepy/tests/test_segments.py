@@ -0,0 +1,46 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from pridepy.files.segments import SegmentState
+
+
+class TestSegments(TestCase):
+    """
+    A test class to test the segment state of parallel range downloads.
+    """
+
+    def test_split(self):
+        """
+        Segments must be contiguous, cover the whole file and respect the minimum segment size.
+        """
+        ranges = SegmentState.split(1000, 4, min_segment_size=100)
+        assert ranges == [(0, 249), (250, 499), (500, 749), (750, 999)]
+
+        ranges = SegmentState.split(1000, 8, min_segment_size=400)
+        assert ranges == [(0, 499), (500, 999)]
+
+        assert SegmentState.split(10, 4, min_segment_size=100) == [(0, 9)]
+
+    def test_resume(self):
+        """
+        A saved state is reloaded with the progress of each segment, so only the unfinished
+        ranges are pending.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "file.raw")
+            state = SegmentState.load_or_create(file_path, 1000, 4, min_segment_size=100)
+            assert os.path.getsize(file_path) == 1000
+            state.advance(0, 250)
+            state.advance(1, 100)
+            state.save()
+
+            state = SegmentState.load_or_create(file_path, 1000, 2, min_segment_size=100)
+            assert state.pending() == [(1, 350, 499), (2, 500, 749), (3, 750, 999)]
+            assert state.done_bytes() == 350
+
+            for index, offset, end in state.pending():
+                state.advance(index, end - offset + 1)
+            assert state.is_complete()
+            state.finish()
+            assert not SegmentState.exists(file_path)
@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from urllib.parse import parse_qs, urlparse
+
+from pridepy.spectra.spectra import Spectra
+from pridepy.tests.local_server import LocalHandler, LocalServer
+
+USIS = [f"mzspec:PXD000001:run{i}:scan:{i}:PEPTIDE/2" for i in range(250)]
+
+
+class SpectraHandler(LocalHandler):
+    requests = []
+    failing_usi = None  # USI whose group is rejected
+    delay = 0  # Seconds taken by every request
+    in_flight = 0
+    peak = 0  # Maximum number of requests answered at the same time
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        SpectraHandler.requests.append(len(self.path))
+        if SpectraHandler.failing_usi in query["usi"]:
+            self.send_body(b"", 400)
+            return
+        with SpectraHandler.lock:
+            SpectraHandler.in_flight += 1
+            SpectraHandler.peak = max(SpectraHandler.peak, SpectraHandler.in_flight)
+        time.sleep(SpectraHandler.delay)
+        with SpectraHandler.lock:
+            SpectraHandler.in_flight -= 1
+        # Two evidences per USI, returned in pages
+        evidences = [{"usi": usi, "rank": rank} for usi in query["usi"] for rank in range(2)]
+        page_size, page = int(query["pageSize"][0]), int(query["page"][0])
+        self.send_json(evidences[page * page_size : (page + 1) * page_size])
+
+
+class TestSpectra(TestCase):
+    """
+    A test class to test the batched spectra evidences against a local server.
+    """
+
+    def setUp(self):
+        SpectraHandler.requests = []
+        SpectraHandler.failing_usi = None
+        SpectraHandler.delay = 0
+        SpectraHandler.peak = 0
+        self.server = LocalServer(SpectraHandler)
+        self.spectra = Spectra()
+        self.spectra.api_base_url = self.server.url
+        self.spectra.MAX_USI_QUERY_LENGTH = 2000
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_write_spectra_evidences(self):
+        """
+        Duplicate USIs are coalesced, groups fit in the URL length, and every page is fetched.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            output_file = os.path.join(folder, "evidences.ndjson")
+            count = self.spectra.write_spectra_evidences(
+                USIS + USIS[:10], output_file, page_size=30, workers=3
+            )
+            with open(output_file) as f:
+                evidences = [json.loads(line) for line in f]
+
+        assert count == len(evidences) == 2 * len(USIS)
+        assert [evidence["usi"] for evidence in evidences[::2]] == USIS
+        assert max(SpectraHandler.requests) < 2000 + 200
+
+    def test_pages_prefetched(self):
+        """
+        The next pages of a group are fetched while its current one is received.
+        """
+        SpectraHandler.delay = 0.05
+        evidences = list(self.spectra.iter_spectra_evidences(USIS[:20], page_size=4, workers=1))
+        assert [evidence["usi"] for evidence in evidences[::2]] == USIS[:20]
+        assert SpectraHandler.peak >= 2
+
+    def test_failed_group(self):
+        """
+        A group that can not be fetched is reported, and the other groups are still returned.
+        """
+        SpectraHandler.failing_usi = USIS[7]
+        failed_usis = []
+        with self.assertLogs(level="ERROR"):
+            evidences = list(
+                self.spectra.iter_spectra_evidences(USIS, page_size=30, failed_usis=failed_usis)
+            )
+        assert USIS[7] in failed_usis
+        assert 0 < len(failed_usis) < len(USIS)
+        expected = [usi for usi in USIS if usi not in failed_usis]
+        assert [evidence["usi"] for evidence in evidences[::2]] == expected
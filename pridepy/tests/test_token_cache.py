@@ -0,0 +1,103 @@
+import base64
+import json
+import os
+import stat
+import tempfile
+import time
+from unittest import TestCase
+
+from pridepy.authentication.token_cache import TokenCache
+
+
+def make_jwt(exp: float) -> str:
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    return ".".join([encode({"alg": "RS256"}), encode({"sub": "user", "exp": exp}), "signature"])
+
+
+class TestTokenCache(TestCase):
+    """
+    A test class to test the cache of the PRIDE API tokens.
+    """
+
+    def setUp(self):
+        self.logins = 0
+
+    def _login(self, exp):
+        def login():
+            self.logins += 1
+            return make_jwt(exp)
+
+        return login
+
+    def test_get_expiry(self):
+        assert TokenCache.get_expiry(make_jwt(1234)) == 1234
+        assert TokenCache.get_expiry("not-a-jwt") is None
+        assert TokenCache.get_expiry("a.b.c") is None
+
+    def test_memory(self):
+        cache = TokenCache(persist=False)
+        login = self._login(time.time() + 3600)
+        token = cache.get("user", "password", login)
+        assert cache.get("user", "password", login) == token
+        assert self.logins == 1
+        cache.invalidate("user")
+        cache.get("user", "password", login)
+        assert self.logins == 2
+
+    def test_password(self):
+        """
+        A cached token is only served to the password it was requested with, which is not kept.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "tokens.json")
+            cache = TokenCache(path=path, persist=True)
+            login = self._login(time.time() + 3600)
+            token = cache.get("user", "password", login)
+            other_token = cache.get("user", "other password", self._login(time.time() + 7200))
+            assert other_token != token
+            assert self.logins == 2
+            assert TokenCache(path=path, persist=True).get("user", "other password", login) == (
+                other_token
+            )
+            assert self.logins == 2
+            with open(path) as f:
+                assert "password" not in f.read()
+
+    def test_invalidate_rejected_token(self):
+        """
+        Only the rejected token is forgotten, not a newer one requested after the same rejection.
+        """
+        cache = TokenCache(persist=False)
+        rejected = cache.get("user", "password", self._login(time.time() + 3600))
+        cache.invalidate("user", rejected)
+        token = cache.get("user", "password", self._login(time.time() + 7200))
+        cache.invalidate("user", rejected)
+        assert cache.get("user", "password", self._login(time.time() + 3600)) == token
+        assert self.logins == 2
+
+    def test_expired(self):
+        """
+        A token about to expire is requested again.
+        """
+        cache = TokenCache(persist=False)
+        login = self._login(time.time() + TokenCache.EXPIRY_MARGIN / 2)
+        cache.get("user", "password", login)
+        cache.get("user", "password", login)
+        assert self.logins == 2
+
+    def test_disk(self):
+        """
+        Tokens kept on disk are reused by another cache, and only readable by their owner.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "pridepy", "tokens.json")
+            login = self._login(time.time() + 3600)
+            token = TokenCache(path=path, persist=True).get("user", "password", login)
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+            assert TokenCache(path=path, persist=True).get("user", "password", login) == token
+            assert self.logins == 1
+            TokenCache(path=path, persist=True).invalidate("user")
+            TokenCache(path=path, persist=True).get("user", "password", login)
+            assert self.logins == 2
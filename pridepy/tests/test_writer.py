@@ -0,0 +1,76 @@
+import hashlib
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from pridepy.files.checksum import StreamingChecksum
+from pridepy.files.writer import BufferedFileWriter, preallocate
+
+DATA = os.urandom(1000000)
+
+
+class TestBufferedFileWriter(TestCase):
+    """
+    A test class to test the write-behind writer of the downloaded files.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.folder.name, "file.raw")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_write(self):
+        """
+        Small chunks are coalesced into writes of buffer_size bytes, hashed in order and counted
+        once on disk.
+        """
+        checksum = StreamingChecksum(hashlib.md5(DATA).hexdigest())
+        writes = []
+        with BufferedFileWriter(
+            self.file_path,
+            checksum=checksum,
+            on_write=writes.append,
+            buffer_size=300000,
+            max_buffers=1,
+        ) as writer:
+            for start in range(0, len(DATA), 10000):
+                writer.write(DATA[start : start + 10000])
+        with open(self.file_path, "rb") as f:
+            assert f.read() == DATA
+        assert checksum.matches()
+        assert writes == [300000, 300000, 300000, 100000]
+
+    def test_segment(self):
+        """
+        A segment is written at its offset of a preallocated file.
+        """
+        preallocate(self.file_path, len(DATA))
+        assert os.path.getsize(self.file_path) == len(DATA)
+        for offset in (500000, 0):
+            with BufferedFileWriter(self.file_path, "r+b", offset=offset) as writer:
+                writer.write(DATA[offset : offset + 500000])
+        with open(self.file_path, "rb") as f:
+            assert f.read() == DATA
+
+    def test_error(self):
+        """
+        A failed disk write is raised by the next write or by close, and never blocks the receive
+        loop.
+        """
+        writer = BufferedFileWriter(self.file_path, buffer_size=1000, max_buffers=1)
+        with mock.patch.object(writer._file, "write", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                for start in range(0, len(DATA), 1000):
+                    writer.write(DATA[start : start + 1000])
+            with self.assertRaises(OSError):
+                writer.close()
+
+    def test_fsync_policy(self):
+        with mock.patch("os.fsync") as fsync:
+            with BufferedFileWriter(self.file_path, fsync="close") as writer:
+                writer.write(DATA)
+            assert fsync.call_count == 1
+        with self.assertRaises(ValueError):
+            BufferedFileWriter(self.file_path, fsync="sometimes")
@@ -1,28 +1,139 @@
 #!/usr/bin/env python
+import codecs
 import json
-import re
+import os
 import sys
+import threading
 from json import JSONDecodeError
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, Iterable, Iterator, List, Any
 
 import httpx
 import requests
 import logging
-from ratelimit import limits, sleep_and_retry
-from requests import get, RequestException
+from requests import RequestException
 from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 from urllib3.util.retry import Retry
 
+from pridepy.util.json_stream import JsonStreamParser
+from pridepy.util.parquet_writer import ParquetRecordWriter
+from pridepy.util.rate_limiter import TokenBucket
+
 
 class Util:
     """
     This class contains all the utility methods
     """
 
+    JSON_CHUNK_SIZE = 64 * 1024  # Bytes read at once from a streamed JSON response
+    STREAM_CHUNK_SIZE = 1024 * 1024  # Bytes read and written at once by stream_response_to_file
+
+    # Settings of the HTTP session shared by the API calls, see configure_http
+    HTTP_POOL_CONNECTIONS = 10
+    HTTP_POOL_MAXSIZE = 20
+    HTTP_RETRIES = 3
+    HTTP_BACKOFF_FACTOR = 1
+    HTTP_TIMEOUT = (10, 60)  # Connect and read timeouts in seconds
+    THROTTLE_STATUS_CODES = (429, 503)  # Responses that slow down the rate limiter
+
+    # Rate limit of all the requests to the PRIDE API (1000 requests per 50 seconds)
+    API_RATE_LIMITER = TokenBucket(rate=20, capacity=20)
+
+    _http_session: Optional[requests.Session] = None
+    _http_session_lock = threading.Lock()
+
+    @staticmethod
+    def configure_http(
+        pool_connections: int = None,
+        pool_maxsize: int = None,
+        retries: int = None,
+        backoff_factor: float = None,
+        timeout=None,
+        rate_limit: float = None,
+    ):
+        """
+        Change the settings of the HTTP session shared by the API calls. The session is created
+        again with the new settings on the next call.
+        :param pool_connections: Number of hosts a connection pool is kept for
+        :param pool_maxsize: Number of connections kept alive per host
+        :param retries: Number of retries of a failed connection or a 429/5xx response
+        :param backoff_factor: Exponential backoff between the retries, in seconds
+        :param timeout: Timeout of the requests in seconds, or a (connect, read) tuple
+        :param rate_limit: Maximum number of requests per second to the PRIDE API
+        """
+        with Util._http_session_lock:
+            if rate_limit is not None:
+                Util.API_RATE_LIMITER = TokenBucket(rate=rate_limit, capacity=rate_limit)
+            if pool_connections is not None:
+                Util.HTTP_POOL_CONNECTIONS = pool_connections
+            if pool_maxsize is not None:
+                Util.HTTP_POOL_MAXSIZE = pool_maxsize
+            if retries is not None:
+                Util.HTTP_RETRIES = retries
+            if backoff_factor is not None:
+                Util.HTTP_BACKOFF_FACTOR = backoff_factor
+            if timeout is not None:
+                Util.HTTP_TIMEOUT = timeout
+            if Util._http_session is not None:
+                Util._http_session.close()
+                Util._http_session = None
+
+    @staticmethod
+    def get_http_session() -> requests.Session:
+        """
+        HTTP session shared by the API calls of the process, so that the connections to the PRIDE
+        servers are kept alive and reused instead of opened for every call.
+        """
+        if Util._http_session is None:
+            with Util._http_session_lock:
+                if Util._http_session is None:
+                    session = requests.Session()
+                    retry_strategy = Retry(
+                        total=Util.HTTP_RETRIES,
+                        backoff_factor=Util.HTTP_BACKOFF_FACTOR,
+                        # 429 and 503 are retried by http_request, through the rate limiter
+                        status_forcelist=[500, 502, 504],
+                        respect_retry_after_header=False,
+                        raise_on_status=False,  # The last response is returned to the caller
+                    )
+                    adapter = HTTPAdapter(
+                        pool_connections=Util.HTTP_POOL_CONNECTIONS,
+                        pool_maxsize=Util.HTTP_POOL_MAXSIZE,
+                        max_retries=retry_strategy,
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    Util._http_session = session
+        return Util._http_session
+
+    @staticmethod
+    def http_request(method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request with the shared HTTP session and the configured timeout, at the rate of
+        API_RATE_LIMITER. A throttled request (429/503) slows the rate limiter down and is sent
+        again once the Retry-After of the response has passed.
+        :param method: HTTP method
+        :param url: URL
+        :param kwargs: arguments of requests.Session.request, e.g. headers or stream
+        :return: Response
+        """
+        kwargs.setdefault("timeout", Util.HTTP_TIMEOUT)
+        session = Util.get_http_session()
+        for attempt in range(Util.HTTP_RETRIES + 1):
+            Util.API_RATE_LIMITER.acquire()
+            response = session.request(method, url, **kwargs)
+            if response.status_code not in Util.THROTTLE_STATUS_CODES:
+                Util.API_RATE_LIMITER.succeeded()
+                return response
+            Util.API_RATE_LIMITER.throttled(
+                TokenBucket.parse_retry_after(response.headers.get("Retry-After"))
+            )
+            if attempt == Util.HTTP_RETRIES:
+                return response
+            logging.warning(f"{url} was throttled ({response.status_code}), retrying")
+            response.close()
+
     @staticmethod
-    @sleep_and_retry
-    @limits(calls=1000, period=50)
     def get_api_call(url, headers=None):
         """
         Given a url, this method will do a HTTP request and get the response
@@ -30,45 +141,109 @@ class Util:
         :param headers: HTTP headers
         :return: Response
         """
-        response = requests.get(url, headers=headers)
+        response = Util.http_request("GET", url, headers=headers)
 
         if (not response.ok) or response.status_code != 200:
             raise Exception("PRIDE API call {} response: {}".format(url, response.status_code))
         return response
 
     @staticmethod
-    @sleep_and_retry
-    @limits(calls=1000, period=50)
     async def stream_response_to_file(
-        out_file, total_records, regex_search_pattern, url, headers=None
+        out_file, total_records, record_marker, url, headers=None, output_format="json"
     ):
-        # Initialize the progress bar
+        """
+        Stream a JSON array from the API to a file, in large chunks.
+        :param out_file: output file
+        :param total_records: number of records expected, for the progress bar
+        :param record_marker: key found once per record (e.g. '"fileName"'), counted in the raw
+        bytes to follow the progress of a json output
+        :param url: URL of the API call
+        :param headers: HTTP headers
+        :param output_format: json to write the response as received, ndjson to write one
+        record per line, or parquet to write the flattened records as typed columns (needs pyarrow)
+        """
+        marker = record_marker.encode("utf-8")
+        # Fails before the download if pyarrow is not installed
+        writer = ParquetRecordWriter(out_file) if output_format == "parquet" else None
         with tqdm(total=total_records, unit_scale=True) as pbar:
-            async with httpx.AsyncClient() as client:
-                # Use a GET request with stream=True to handle streaming responses
-                async with client.stream("GET", url, headers=headers) as response:
-                    # Check if the response is successful
-                    response.raise_for_status()
-                    try:
-                        with open(out_file, "w") as cfile:
-                            # Iterate over the streaming content line by line
-                            async for line in response.aiter_lines():
-                                if (
-                                    line
-                                ):  # Avoid printing empty lines (common with text/event-stream)
-                                    cfile.write(line + "\n")
-                                    # Check if the pattern exists in the string
-                                    if re.search(regex_search_pattern, line):
-                                        pbar.update(
-                                            1
-                                        )  # Update progress bar by 1 for each detection
-                    except PermissionError as e:
-                        print("[ERROR] No permissions to write to:", out_file)
-                        sys.exit(1)
-
-    @staticmethod
-    @sleep_and_retry
-    @limits(calls=1000, period=50)
+            async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0)) as client:
+                for attempt in range(Util.HTTP_RETRIES + 1):
+                    await Util.API_RATE_LIMITER.acquire_async()
+                    async with client.stream("GET", url, headers=headers) as response:
+                        if (
+                            response.status_code in Util.THROTTLE_STATUS_CODES
+                            and attempt < Util.HTTP_RETRIES
+                        ):
+                            Util.API_RATE_LIMITER.throttled(
+                                TokenBucket.parse_retry_after(response.headers.get("Retry-After"))
+                            )
+                            logging.warning(
+                                f"{url} was throttled ({response.status_code}), retrying"
+                            )
+                            continue
+                        response.raise_for_status()
+                        Util.API_RATE_LIMITER.succeeded()
+                        chunks = response.aiter_bytes(Util.STREAM_CHUNK_SIZE)
+                        await Util._write_stream(
+                            chunks, out_file, output_format, writer, marker, pbar
+                        )
+                        return
+
+    @staticmethod
+    async def _write_stream(chunks, out_file, output_format, writer, marker: bytes, pbar: tqdm):
+        try:
+            if writer is not None:
+                try:
+                    await Util._write_records(chunks, writer.write, pbar)
+                finally:
+                    # The records received before an error are kept in a readable file
+                    writer.close()
+                return
+            with open(out_file, "wb", buffering=Util.STREAM_CHUNK_SIZE) as cfile:
+                if output_format == "ndjson":
+                    await Util._write_records(
+                        chunks, lambda items: Util._write_lines(cfile, items), pbar
+                    )
+                else:
+                    await Util._write_raw(chunks, cfile, marker, pbar)
+        except PermissionError as e:
+            print("[ERROR] No permissions to write to:", out_file)
+            sys.exit(1)
+
+    @staticmethod
+    async def _write_raw(chunks, cfile, marker: bytes, pbar: tqdm):
+        # The end of every chunk is kept to count a marker split between two chunks
+        tail = b""
+        async for chunk in chunks:
+            cfile.write(chunk)
+            window = tail + chunk
+            pbar.update(window.count(marker))
+            # Keep the bytes that may start a marker, but no complete marker
+            tail = window[-(len(marker) - 1) :] if len(marker) > 1 else b""
+
+    @staticmethod
+    def _write_lines(cfile, items):
+        lines = [json.dumps(item, ensure_ascii=False) for item in items]
+        cfile.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+    @staticmethod
+    async def _write_records(chunks, write, pbar: tqdm):
+        """
+        Parse the records of a streamed JSON array and pass them to write as they are completed.
+        """
+        parser = JsonStreamParser()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        async for chunk in chunks:
+            items = parser.feed(decoder.decode(chunk))
+            if items:
+                write(items)
+                pbar.update(len(items))
+        items = parser.feed(decoder.decode(b"", final=True)) + parser.close()
+        if items:
+            write(items)
+            pbar.update(len(items))
+
+    @staticmethod
     def read_json_stream(
         api_url: str,
         headers: Optional[Dict[str, str]] = None,
@@ -82,19 +257,9 @@ class Util:
         :return: The JSON object.
         """
         try:
-            lines = []  # List to store lines for decoding
-            with get(api_url, headers=headers, params=params, stream=True, timeout=30) as response:
-                response.raise_for_status()  # Raise an HTTPError for bad responses
-                print("Connected to the streaming API. Fetching data...")
-
-                # Iterate over the streaming content
-                for line in response.iter_lines():
-                    if line:  # Skip empty lines (common in keep-alive streams)
-                        lines.append(line.decode("utf-8"))
-
-            # Combine lines and parse the JSON object
-            combined_data = "".join(lines)
-            json_obj = json.loads(combined_data)
+            parser = JsonStreamParser()
+            items = list(Util._parse_json_stream(api_url, headers, params, parser))
+            json_obj = items if parser.is_array else items[0]
             print(f"Successfully retrieved {len(json_obj)} items.")
             return json_obj
 
@@ -107,8 +272,56 @@ class Util:
         return None
 
     @staticmethod
-    @sleep_and_retry
-    @limits(calls=1000, period=50)
+    def iter_json_stream(
+        api_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None,
+    ) -> Iterator[Any]:
+        """
+        Iterate over the elements of a JSON array streamed from the given API URL, as soon as they
+        are received, so that memory does not grow with the size of the response. A response that is
+        not an array is yielded as a single element.
+        :param api_url: The URL of the API.
+        :param headers: The headers to be used in the request.
+        :param params: The parameters to be used in the request.
+        :return: iterator over the JSON elements
+        """
+        return Util._parse_json_stream(api_url, headers, params, JsonStreamParser())
+
+    @staticmethod
+    def _parse_json_stream(
+        api_url: str,
+        headers: Optional[Dict[str, str]],
+        params: Optional[Dict[str, str]],
+        parser: JsonStreamParser,
+    ) -> Iterator[Any]:
+        with Util.http_request(
+            "GET", api_url, headers=headers, params=params, stream=True
+        ) as response:
+            response.raise_for_status()  # Raise an HTTPError for bad responses
+            print("Connected to the streaming API. Fetching data...")
+            yield from Util.parse_json_chunks(
+                response.iter_content(chunk_size=Util.JSON_CHUNK_SIZE), parser
+            )
+
+    @staticmethod
+    def parse_json_chunks(
+        chunks: Iterable[bytes], parser: Optional[JsonStreamParser] = None
+    ) -> Iterator[Any]:
+        """
+        Parse a UTF-8 JSON document received in chunks of bytes.
+        :param chunks: chunks of the document, e.g. from a response or a file
+        :param parser: JsonStreamParser, a new one if None
+        :return: iterator over the elements of a top-level array, or over the document itself
+        """
+        parser = parser or JsonStreamParser()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for chunk in chunks:
+            yield from parser.feed(decoder.decode(chunk))
+        yield from parser.feed(decoder.decode(b"", final=True))
+        yield from parser.close()
+
+    @staticmethod
     def post_api_call(url, headers=None, data=None):
         """
         Given a url, this method will do a HTTP request and get the response
@@ -118,7 +331,7 @@ class Util:
         :return: Response
         """
 
-        response = requests.post(url, headers=headers, json=data)
+        response = Util.http_request("POST", url, headers=headers, json=data)
 
         if (not response.ok) or response.status_code != 200:
             raise Exception("PRIDE API response: {}".format(response.status_code))
@@ -134,7 +347,7 @@ class Util:
         :return: Response
         """
 
-        response = requests.put(url, data=data, headers=headers)
+        response = Util.http_request("PUT", url, data=data, headers=headers)
 
         if (not response.ok) or response.status_code != 200:
             raise Exception("PRIDE API response: {}".format(response.status_code))
@@ -142,14 +355,29 @@ class Util:
             logging.debug(response)
 
     @staticmethod
-    def create_session_with_retries():
+    def get_cache_dir() -> str:
+        """
+        Directory of the pridepy caches: PRIDEPY_CACHE_DIR if set, otherwise pridepy in the user
+        cache directory (XDG_CACHE_HOME or ~/.cache).
+        """
+        cache_dir = os.environ.get("PRIDEPY_CACHE_DIR")
+        if cache_dir:
+            return cache_dir
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        return os.path.join(cache_home, "pridepy")
+
+    @staticmethod
+    def create_session_with_retries(pool_maxsize: int = 10):
         session = requests.Session()
         retry_strategy = Retry(
             total=5,  # Retry up to 5 times
             backoff_factor=2,  # Exponential backoff: wait 2^i seconds between retries
             status_forcelist=[429, 500, 502, 503, 504],  # Retry on these HTTP codes
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # pool_maxsize bounds the connections kept per host, e.g. one per parallel segment
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=pool_maxsize)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         return session
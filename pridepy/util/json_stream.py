@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+import json
+from typing import Any, List
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonStreamParser:
+    """
+    Incremental parser of a JSON document received in chunks. The elements of a top-level array
+    are returned as soon as they are complete, so a large response is never held in memory as a
+    whole. Any other document (e.g. an object) is returned once the stream is closed.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._state = "start"  # start, first, separator, value, end, document
+        self.is_array = False
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Add a chunk of the document.
+        :param text: decoded chunk
+        :return: array elements completed by this chunk
+        """
+        self._buffer += text
+        if self._state == "document":
+            return []
+
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+
+            if self._state == "start":
+                if char != "[":
+                    self._state = "document"
+                    break
+                self.is_array = True
+                self._state = "first"
+                pos += 1
+            elif self._state in ("first", "separator") and char == "]":
+                self._state = "end"
+                pos += 1
+            elif self._state == "separator":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+                self._state = "value"
+                pos += 1
+            elif self._state in ("first", "value"):
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # Wait for the rest of the element
+                if end == len(buffer) and not isinstance(item, (dict, list, str)):
+                    break  # A number or literal may continue in the next chunk
+                items.append(item)
+                self._state = "separator"
+                pos = end
+            else:
+                raise ValueError(f"Unexpected data after the end of the JSON array: {char!r}")
+
+        self._buffer = buffer[pos:]
+        return items
+
+    def close(self) -> List[Any]:
+        """
+        Signal the end of the stream.
+        :return: the whole document if it is not an array
+        """
+        if self._state in ("start", "document"):
+            return [json.loads(self._buffer)]
+        if self._state != "end" or self._buffer.strip():
+            raise ValueError("Truncated JSON array")
+        return []
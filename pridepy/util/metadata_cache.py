@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+
+from pridepy.util.api_handling import Util
+
+
+class MetadataCache:
+    """
+    On-disk cache of PRIDE API responses, such as the file listing of a project or a project record.
+    A response is stored per accession and URL with its ETag and Last-Modified headers. It is served
+    from disk while it is younger than the TTL, then revalidated with a conditional request, so that
+    an unchanged response costs a 304 instead of a full download.
+    """
+
+    DEFAULT_TTL = 24 * 3600  # Seconds a response is used without revalidation
+
+    def __init__(self, cache_dir: str = None, ttl: int = None, refresh: bool = False):
+        """
+        :param cache_dir: directory of the cache, metadata in the pridepy cache directory if None
+        :param ttl: seconds a response is used without revalidation, PRIDEPY_CACHE_TTL if None
+        :param refresh: ignore the cached responses and download them again
+        """
+        self.cache_dir = cache_dir or os.path.join(Util.get_cache_dir(), "metadata")
+        if ttl is None:
+            ttl = int(os.environ.get("PRIDEPY_CACHE_TTL", self.DEFAULT_TTL))
+        self.ttl = ttl
+        self.refresh = refresh
+
+    def _paths(self, url: str, accession: str = None):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        folder = os.path.join(self.cache_dir, accession or "_")
+        return os.path.join(folder, f"{key}.json"), os.path.join(folder, f"{key}.meta.json")
+
+    def _load_meta(self, data_path: str, meta_path: str) -> Optional[Dict]:
+        if self.refresh or not os.path.exists(data_path):
+            return None
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_meta(meta_path: str, meta: Dict):
+        tmp_path = f"{meta_path}.{MetadataCache._tmp_suffix()}"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _tmp_suffix() -> str:
+        # Unique per process and thread, as several threads may fetch the same response
+        return f"{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _is_fresh(self, meta: Dict) -> bool:
+        return time.time() - meta.get("fetched_at", 0) < self.ttl
+
+    @staticmethod
+    def _conditional_headers(meta: Optional[Dict], headers: Dict[str, str] = None) -> Dict:
+        request_headers = dict(headers or {})
+        if meta is not None:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+        return request_headers
+
+    @staticmethod
+    def _new_meta(url: str, accession: str, response: requests.Response) -> Dict:
+        return {
+            "url": url,
+            "accession": accession,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+
+    @staticmethod
+    def _get(url: str, headers: Dict[str, str], stream: bool = False) -> requests.Response:
+        return Util.http_request("GET", url, headers=headers, stream=stream)
+
+    def _revalidated(self, url: str, meta: Dict, meta_path: str, status_code: int) -> bool:
+        """Record a 304 answer to a conditional request: the cached response is valid again."""
+        if meta is None or status_code != 304:
+            return False
+        logging.info(f"{url} not modified, using the cached response")
+        meta["fetched_at"] = time.time()
+        self._save_meta(meta_path, meta)
+        return True
+
+    @staticmethod
+    def _iter_cached(data_path: str) -> Iterator[Any]:
+        with open(data_path, "rb") as f:
+            yield from Util.parse_json_chunks(iter(lambda: f.read(Util.JSON_CHUNK_SIZE), b""))
+
+    def iter_json(
+        self, url: str, headers: Dict[str, str] = None, accession: str = None
+    ) -> Iterator[Any]:
+        """
+        Iterate over the elements of a streamed JSON array, from the cache or from the API. A
+        response from the API is written to the cache while it is parsed, and only kept once the
+        stream is complete.
+        :param url: URL of the API call
+        :param headers: HTTP headers
+        :param accession: project accession the response belongs to
+        :return: iterator over the JSON elements
+        """
+        data_path, meta_path = self._paths(url, accession)
+        meta = self._load_meta(data_path, meta_path)
+        if meta is not None and self._is_fresh(meta):
+            logging.info(f"Using the cached response of {url}")
+            yield from self._iter_cached(data_path)
+            return
+
+        with self._get(url, self._conditional_headers(meta, headers), stream=True) as response:
+            if not self._revalidated(url, meta, meta_path, response.status_code):
+                response.raise_for_status()
+                print("Connected to the streaming API. Fetching data...")
+                os.makedirs(os.path.dirname(data_path), exist_ok=True)
+                tmp_path = f"{data_path}.{MetadataCache._tmp_suffix()}"
+                try:
+                    with open(tmp_path, "wb") as f:
+
+                        def tee(chunks):
+                            for chunk in chunks:
+                                f.write(chunk)
+                                yield chunk
+
+                        yield from Util.parse_json_chunks(
+                            tee(response.iter_content(chunk_size=Util.JSON_CHUNK_SIZE))
+                        )
+                    os.replace(tmp_path, data_path)
+                    self._save_meta(meta_path, self._new_meta(url, accession, response))
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)  # Incomplete response, e.g. the iteration was stopped
+                return
+        yield from self._iter_cached(data_path)
+
+    def get_json(self, url: str, headers: Dict[str, str] = None, accession: str = None) -> Any:
+        """
+        Get a JSON response, from the cache or from the API.
+        :param url: URL of the API call
+        :param headers: HTTP headers
+        :param accession: project accession the response belongs to
+        :return: JSON object
+        """
+        data_path, meta_path = self._paths(url, accession)
+        meta = self._load_meta(data_path, meta_path)
+        if meta is None or not self._is_fresh(meta):
+            response = self._get(url, self._conditional_headers(meta, headers))
+            if not self._revalidated(url, meta, meta_path, response.status_code):
+                if (not response.ok) or response.status_code != 200:
+                    raise Exception(
+                        "PRIDE API call {} response: {}".format(url, response.status_code)
+                    )
+                os.makedirs(os.path.dirname(data_path), exist_ok=True)
+                tmp_path = f"{data_path}.{MetadataCache._tmp_suffix()}"
+                with open(tmp_path, "wb") as f:
+                    f.write(response.content)
+                os.replace(tmp_path, data_path)
+                self._save_meta(meta_path, self._new_meta(url, accession, response))
+                return response.json()
+        else:
+            logging.info(f"Using the cached response of {url}")
+        with open(data_path, "rb") as f:
+            return json.load(f)
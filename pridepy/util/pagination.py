@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
+
+
+def get_page_results(response_json: Union[Dict, List]) -> List[Any]:
+    """
+    Get the results of a page of the PRIDE API: the response itself if it is a list, the first
+    list of its _embedded object for HAL responses, or its content.
+    :param response_json: JSON response of a page
+    :return: results of the page
+    """
+    if isinstance(response_json, list):
+        return response_json
+    embedded = response_json.get("_embedded")
+    if isinstance(embedded, dict):
+        return next((v for v in embedded.values() if isinstance(v, list)), [])
+    return response_json.get("content", [])
+
+
+def _max_pages(page_size: int, limit: Optional[int]) -> Optional[int]:
+    return None if limit is None else -(-limit // page_size)
+
+
+def iter_pages(
+    get_page: Callable[[int], List[Any]],
+    page_size: int,
+    prefetch: int = 2,
+    limit: int = None,
+) -> Iterator[Any]:
+    """
+    Iterate over the results of a paged API call, fetching the next pages in background threads
+    while the current one is consumed. The iteration stops at the first page that is not full.
+    :param get_page: function returning the results of a page from its number (0 based)
+    :param page_size: number of results of a full page
+    :param prefetch: number of pages fetched ahead of the current one
+    :param limit: maximum number of results, all of them if None
+    :return: iterator over the results
+    """
+    max_pages = _max_pages(page_size, limit)
+    returned = 0
+    next_page = 0
+    with ThreadPoolExecutor(max_workers=max(1, prefetch)) as executor:
+        pending = deque()
+        try:
+            while True:
+                while len(pending) <= prefetch and (max_pages is None or next_page < max_pages):
+                    pending.append(executor.submit(get_page, next_page))
+                    next_page += 1
+                if not pending:
+                    return
+                results = pending.popleft().result()
+                for result in results:
+                    if limit is not None and returned >= limit:
+                        return
+                    yield result
+                    returned += 1
+                if len(results) < page_size:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def aiter_pages(
+    get_page: Callable[[int], List[Any]],
+    page_size: int,
+    prefetch: int = 2,
+    limit: int = None,
+) -> AsyncIterator[Any]:
+    """
+    Asynchronous version of iter_pages: the pages are fetched in worker threads without blocking
+    the event loop, and the next pages are fetched while the current one is consumed.
+    :param get_page: function returning the results of a page from its number (0 based)
+    :param page_size: number of results of a full page
+    :param prefetch: number of pages fetched ahead of the current one
+    :param limit: maximum number of results, all of them if None
+    :return: asynchronous iterator over the results
+    """
+    max_pages = _max_pages(page_size, limit)
+    returned = 0
+    next_page = 0
+    pending = deque()
+    try:
+        while True:
+            while len(pending) <= prefetch and (max_pages is None or next_page < max_pages):
+                pending.append(asyncio.ensure_future(asyncio.to_thread(get_page, next_page)))
+                next_page += 1
+            if not pending:
+                return
+            results = await pending.popleft()
+            for result in results:
+                if limit is not None and returned >= limit:
+                    return
+                yield result
+                returned += 1
+            if len(results) < page_size:
+                return
+    finally:
+        for task in pending:
+            task.cancel()
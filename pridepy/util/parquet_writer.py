@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+import json
+from typing import Any, Dict, List
+
+# Lists of {name, value} params whose names are fixed labels, flattened into one column per name.
+# The names of other CV param lists (instruments, organisms, ...) are data, so they are kept as JSON.
+NAMED_VALUE_LISTS = {"publicFileLocations"}
+
+
+def flatten_record(record: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten a metadata record into columns. Nested objects become dotted columns (e.g.
+    fileCategory.value), the file locations become one column per protocol (e.g.
+    publicFileLocations.FTP Protocol), and other lists are kept as JSON strings.
+    :param record: JSON record
+    :param prefix: prefix of the column names
+    :return: flat record
+    """
+    columns = {}
+    for key, value in record.items():
+        column = prefix + key
+        if isinstance(value, dict):
+            columns.update(flatten_record(value, column + "."))
+        elif isinstance(value, list):
+            if key in NAMED_VALUE_LISTS and all(
+                isinstance(v, dict) and "name" in v and "value" in v for v in value
+            ):
+                for param in value:
+                    columns.setdefault(f"{column}.{param['name']}", param["value"])
+            else:
+                columns[column] = json.dumps(value, ensure_ascii=False)
+        else:
+            columns[column] = value
+    return columns
+
+
+class ParquetRecordWriter:
+    """
+    Write JSON records to a Parquet file in typed row groups of BATCH_ROWS records, so memory does
+    not grow with the number of records. The schema is inferred from the first batch. Nothing is
+    dropped afterwards: columns that only appear in later batches, and values that do not match the
+    type of their column, are written to the EXTRA_COLUMN of their row as a JSON object.
+    """
+
+    BATCH_ROWS = 50000
+    EXTRA_COLUMN = "_extra"
+
+    def __init__(self, out_file: str, batch_rows: int = None):
+        """
+        :param out_file: output Parquet file
+        :param batch_rows: number of records of a row group
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(
+                "The parquet format needs pyarrow, install it with: pip install pridepy[parquet]"
+            )
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.out_file = out_file
+        self.batch_rows = batch_rows or self.BATCH_ROWS
+        self._rows: List[Dict[str, Any]] = []
+        self._schema = None
+        self._writer = None
+        self._closed = False
+
+    def write(self, records: List[Dict[str, Any]]):
+        """
+        Add records to the file, written once a batch is full.
+        :param records: JSON records
+        """
+        self._rows.extend(flatten_record(record) for record in records)
+        while len(self._rows) >= self.batch_rows:
+            self._write_batch(self._rows[: self.batch_rows])
+            self._rows = self._rows[self.batch_rows :]
+
+    def close(self):
+        """
+        Write the last batch and the footer of the file.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._rows or self._writer is None:
+            self._write_batch(self._rows)
+            self._rows = []
+        self._writer.close()
+
+    def _create_schema(self, rows: List[Dict[str, Any]]):
+        pa = self._pa
+        fields = []
+        for name in dict.fromkeys(name for row in rows for name in row):
+            try:
+                type_ = pa.array([row.get(name) for row in rows]).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                type_ = pa.string()  # Mixed types
+            # Columns without any value in the first batch are kept as strings
+            fields.append(pa.field(name, pa.string() if pa.types.is_null(type_) else type_))
+        fields.append(pa.field(self.EXTRA_COLUMN, pa.string()))
+        self._schema = pa.schema(fields)
+        self._writer = self._pq.ParquetWriter(self.out_file, self._schema)
+
+    def _write_batch(self, rows: List[Dict[str, Any]]):
+        pa = self._pa
+        if self._schema is None:
+            self._create_schema(rows)
+
+        extras = [
+            {name: value for name, value in row.items() if name not in self._schema.names}
+            for row in rows
+        ]
+        columns = []
+        for field in self._schema:
+            if field.name == self.EXTRA_COLUMN:
+                continue
+            values = [row.get(field.name) for row in rows]
+            try:
+                columns.append(pa.array(values, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                if pa.types.is_string(field.type):
+                    values = [value if value is None else str(value) for value in values]
+                    columns.append(pa.array(values, type=field.type))
+                else:
+                    columns.append(self._coerce(field.name, values, field.type, extras))
+        columns.append(
+            pa.array(
+                [json.dumps(extra, ensure_ascii=False) if extra else None for extra in extras],
+                type=pa.string(),
+            )
+        )
+        self._writer.write_table(pa.Table.from_arrays(columns, schema=self._schema))
+
+    def _coerce(self, name: str, values: List[Any], type_, extras: List[Dict[str, Any]]):
+        """
+        Build a column from values of mixed types: the values that do not match the type of the
+        column are moved to the extra column of their row.
+        """
+        pa = self._pa
+        coerced = []
+        for value, extra in zip(values, extras):
+            try:
+                pa.array([value], type=type_)
+                coerced.append(value)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                coerced.append(None)
+                extra[name] = value
+        return pa.array(coerced, type=type_)
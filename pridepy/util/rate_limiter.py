@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket shared by all the requests to the PRIDE API, from any thread or event loop. Every
+    request takes a token; tokens are added at rate per second up to capacity, so bursts are allowed
+    but the average rate is bounded. The rate adapts to the server (AIMD): it is halved when a
+    request is throttled (429/503), with a pause for the Retry-After of the response, and it grows
+    back by a small step after every successful request.
+    """
+
+    DECREASE_FACTOR = 0.5  # Rate multiplier after a throttled request
+    INCREASE_STEP = 0.01  # Fraction of the maximum rate added after a successful request
+
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = None):
+        """
+        :param rate: Maximum number of requests per second
+        :param capacity: Number of requests that can be sent at once, rate if None
+        :param min_rate: Lowest rate after throttled requests, rate / 50 if None
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.min_rate = min_rate or rate / 50
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Take a token, possibly one that is not available yet.
+        :return: seconds to wait before the token can be used
+        """
+        with self._lock:
+            now = time.monotonic()
+            # No tokens are added during a pause, _updated is then in the future
+            elapsed = max(0.0, now - self._updated)
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = max(now, self._updated)
+            self._tokens -= 1
+            wait = max(0.0, self._updated - now)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def acquire(self):
+        """
+        Wait for a token, blocking the calling thread.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Wait for a token without blocking the event loop.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def throttled(self, retry_after: float = None):
+        """
+        Slow down after a throttled request.
+        :param retry_after: seconds the server asked to wait, from the Retry-After header
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.DECREASE_FACTOR)
+            self._tokens = min(self._tokens, 0.0)  # No burst after a throttled request
+            if retry_after:
+                self._updated = max(self._updated, time.monotonic() + retry_after)
+
+    def succeeded(self):
+        """
+        Speed up again after a successful request.
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.INCREASE_STEP)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """
+        :param value: Retry-After header, in seconds or as an HTTP date
+        :return: seconds to wait, or None if the header is missing or invalid
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None